@@ -8,10 +8,74 @@ class Settings(BaseSettings):
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
     BASE_PATH: str = ""  # e.g., "/sundial" for subpath deployment
 
+    # SQLite performance profile, applied as PRAGMAs on every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL lets readers run alongside the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # safe with WAL; FULL fsyncs every commit
+    SQLITE_MMAP_SIZE: int = 268435456  # bytes (256 MiB); 0 disables mmap
+    SQLITE_CACHE_SIZE: int = -65536  # negative = KiB per connection (64 MiB)
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Connection pool (shared by readers; writers additionally take the write lock)
+    DB_POOL_SIZE: int = 8
+    DB_MAX_OVERFLOW: int = 8
+    DB_SERIALIZE_WRITES: bool = True
+    # How long a writer waits for the write lock behind other write
+    # transactions (a reindex or restore can hold it for a while)
+    DB_WRITE_LOCK_TIMEOUT_MS: int = 30000
+    # Auth: validated tokens are cached in-process; last_used_at is written in batches
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 30
+    AUTH_LAST_USED_FLUSH_SECONDS: int = 60
+    # Note .md files are written off the event loop; saves of the same note
+    # within this window are coalesced into one write
+    NOTE_WRITE_COALESCE_MS: int = 250
+    # Watch workspace/notes for edits made outside the app (needs watchfiles)
+    NOTE_WATCHER_ENABLED: bool = False
+    NOTE_WATCHER_DEBOUNCE_MS: int = 500
+    # AI providers: one pooled, keep-alive HTTP client each. The URLs can
+    # point at any OpenAI-compatible endpoint (scripts/mock_llm_provider.py)
+    AI_OPENROUTER_URL: str = "https://openrouter.ai/api/v1/chat/completions"
+    AI_NVIDIA_URL: str = "https://integrate.api.nvidia.com/v1/chat/completions"
+    AI_HTTP_MAX_CONNECTIONS: int = 10
+    AI_HTTP_KEEPALIVE_SECONDS: float = 60.0
+    AI_HTTP2: bool = True  # used when the h2 package is installed
+    # After a 429, calls wait up to this long for the provider's Retry-After;
+    # a longer back-off fails the call (queued AI jobs are rescheduled)
+    AI_RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0
+    # Tag, extract tasks and link events with one LLM call per note instead
+    # of one per operation (falls back to separate calls if it fails)
+    AI_COMBINED_ANALYSIS: bool = True
+    # Background AI jobs (ai_processing_queue): concurrent workers, retries
+    # with exponential backoff, and how long a claimed job may run before
+    # it's considered abandoned and put back in the queue
+    AI_WORKER_CONCURRENCY: int = 2
+    AI_JOB_MAX_ATTEMPTS: int = 5
+    AI_JOB_RETRY_BASE_SECONDS: float = 10.0
+    AI_JOB_STALE_SECONDS: int = 300
+    # A note is analyzed once saves to it have paused this long, or at the
+    # latest this long after the first unprocessed save
+    AI_DEBOUNCE_SECONDS: float = 30.0
+    AI_DEBOUNCE_MAX_DELAY_SECONDS: float = 300.0
+    # Replies to the note and daily suggestion prompts are cached in the
+    # database, so an identical request (same model, prompt and content)
+    # isn't sent again. 0 entries turns the cache off
+    AI_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    AI_CACHE_MAX_ENTRIES: int = 2000
+
     @property
     def cors_origins_list(self) -> list[str]:
         return [o.strip() for o in self.CORS_ORIGINS.split(",") if o.strip()]
 
+    @property
+    def sqlite_pragmas(self) -> list[tuple[str, str | int]]:
+        return [
+            ("journal_mode", self.SQLITE_JOURNAL_MODE),
+            ("synchronous", self.SQLITE_SYNCHRONOUS),
+            ("mmap_size", self.SQLITE_MMAP_SIZE),
+            ("cache_size", self.SQLITE_CACHE_SIZE),
+            ("temp_store", self.SQLITE_TEMP_STORE),
+            ("busy_timeout", self.SQLITE_BUSY_TIMEOUT_MS),
+        ]
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
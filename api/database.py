@@ -1,10 +1,89 @@
+import asyncio
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.util import await_only
 
 from api.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
-async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+def _engine_kwargs(url: str) -> dict:
+    """Pool sizing for file databases (in-memory SQLite uses a single static connection)."""
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        return {}
+    return {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+
+
+engine = create_async_engine(settings.DATABASE_URL, echo=False, **_engine_kwargs(settings.DATABASE_URL))
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in settings.sqlite_pragmas:
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+# SQLite allows one writer at a time. Rather than letting concurrent writers
+# collide on the database lock (and fail with "database is locked" once
+# busy_timeout runs out), sessions take this lock before their first write and
+# hold it until the transaction ends, so writes queue up in order. A writer
+# still waiting after DB_WRITE_LOCK_TIMEOUT_MS gets the OperationalError
+# ("database is locked") SQLite itself would raise.
+#
+# The lock isn't reentrant: code holding a write transaction must not open a
+# second session that writes, or that session waits out the timeout and fails.
+# Finish (commit) the first transaction, or do the write in the same session.
+_write_lock = asyncio.Lock()
+_DML_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class SerializedWriteSession(Session):
+    """Session that takes the process-wide write lock before writing."""
+
+
+def _acquire_write_lock(session: Session) -> None:
+    if not settings.DB_SERIALIZE_WRITES or session.info.get("holds_write_lock"):
+        return
+    timeout = settings.DB_WRITE_LOCK_TIMEOUT_MS / 1000
+    try:
+        # Runs inside the AsyncSession's greenlet, so awaiting is allowed here
+        await_only(asyncio.wait_for(_write_lock.acquire(), timeout))
+    except asyncio.TimeoutError:
+        raise OperationalError(None, None, sqlite3.OperationalError("database is locked")) from None
+    session.info["holds_write_lock"] = True
+
+
+@event.listens_for(SerializedWriteSession, "before_flush")
+def _lock_before_flush(session, flush_context, instances):
+    _acquire_write_lock(session)
+
+
+@event.listens_for(SerializedWriteSession, "do_orm_execute")
+def _lock_before_dml(orm_execute_state):
+    statement = orm_execute_state.statement
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _acquire_write_lock(orm_execute_state.session)
+    elif isinstance(statement, TextClause) and statement.text.lstrip().upper().startswith(_DML_PREFIXES):
+        _acquire_write_lock(orm_execute_state.session)
+
+
+@event.listens_for(SerializedWriteSession, "after_transaction_end")
+def _release_write_lock(session, transaction):
+    if transaction.parent is None and session.info.pop("holds_write_lock", False):
+        _write_lock.release()
+
+
+async_session = async_sessionmaker(
+    engine, class_=AsyncSession, sync_session_class=SerializedWriteSession, expire_on_commit=False,
+)
 
 
 class Base(DeclarativeBase):
@@ -8,6 +8,182 @@ from api.database import Base, engine
 from api.models import *  # noqa: F401, F403 - import all models so Base.metadata is populated
 
 
+# External-content FTS5 indexes: (index, content table, indexed columns).
+# Rows are matched on the content table's implicit rowid; VACUUM may renumber
+# it, so rebuild the indexes after a VACUUM.
+FTS_INDEXES: list[tuple[str, str, list[str]]] = [
+    ("notes_fts", "notes", ["title", "content", "tags_text"]),
+    ("tasks_fts", "tasks", ["title", "description", "checklist_text"]),
+    ("events_fts", "calendar_events", ["title", "description", "location"]),
+    ("projects_fts", "projects", ["name", "description"]),
+]
+
+# Recompute the denormalized columns the FTS indexes read
+TAGS_TEXT_SQL = """COALESCE((SELECT GROUP_CONCAT(name, ' ') FROM (
+        SELECT t.name FROM note_tags nt JOIN tags t ON t.id = nt.tag_id
+        WHERE nt.note_id = notes.id ORDER BY t.name
+    )), '')"""
+REFRESH_TAGS_TEXT_SQL = f"UPDATE notes SET tags_text = {TAGS_TEXT_SQL}"
+
+
+def _refresh_checklist_text(task_id: str) -> str:
+    """UPDATE recomputing tasks.checklist_text for *task_id* (an SQL expression)."""
+    return f"""UPDATE tasks SET checklist_text = COALESCE((SELECT GROUP_CONCAT(text, ' ') FROM (
+                   SELECT text FROM task_checklists WHERE task_id = {task_id} ORDER BY position
+               )), '') WHERE id = {task_id}"""
+
+
+REFRESH_CHECKLIST_TEXT_SQL = _refresh_checklist_text("tasks.id")
+
+
+def fts_triggers(fts_table: str, content_table: str, columns: list[str]) -> list[str]:
+    """Triggers keeping *fts_table* in sync with inserts, deletes and updates of the indexed columns."""
+    cols = ", ".join(columns)
+    new_vals = ", ".join(f"new.{c}" for c in columns)
+    old_vals = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {content_table} BEGIN
+               INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.rowid, {new_vals});
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {content_table} BEGIN
+               INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.rowid, {old_vals});
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF {cols} ON {content_table} BEGIN
+               INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.rowid, {old_vals});
+               INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.rowid, {new_vals});
+           END""",
+    ]
+
+
+# Keep tasks.checklist_text current as checklist items change
+CHECKLIST_TEXT_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS task_checklists_text_insert AFTER INSERT ON task_checklists BEGIN
+           """ + _refresh_checklist_text("new.task_id") + """;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS task_checklists_text_update AFTER UPDATE OF text, position, task_id
+       ON task_checklists BEGIN
+           """ + _refresh_checklist_text("old.task_id") + """;
+           """ + _refresh_checklist_text("new.task_id") + """;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS task_checklists_text_delete AFTER DELETE ON task_checklists BEGIN
+           """ + _refresh_checklist_text("old.task_id") + """;
+       END""",
+]
+
+
+def search_trigger_names() -> list[str]:
+    """Names of every trigger above, for bulk writers that drop and recreate them."""
+    names = [f"{fts_table}_{op}" for fts_table, _, _ in FTS_INDEXES for op in ("insert", "delete", "update")]
+    return names + ["task_checklists_text_insert", "task_checklists_text_update", "task_checklists_text_delete"]
+
+
+def _external_fts(fts_table: str, content_table: str, columns: list[str]) -> list[str]:
+    """Statements (re)creating an external-content FTS5 index and its triggers."""
+    return [
+        f"DROP TABLE IF EXISTS {fts_table}",
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({', '.join(columns)}, content='{content_table}')",
+        *fts_triggers(fts_table, content_table, columns),
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+# Versioned migrations, tracked in SQLite's PRAGMA user_version. Each entry runs
+# once, in order, on databases whose user_version is below its version. Index
+# names match the ones create_all derives from the models, so fresh and
+# migrated databases end up with the same schema.
+SCHEMA_MIGRATIONS: list[tuple[int, list[str]]] = [
+    # 1: secondary indexes on hot filter/sort columns
+    (1, [
+        "CREATE INDEX IF NOT EXISTS ix_notes_title ON notes (title)",
+        "CREATE INDEX IF NOT EXISTS ix_notes_project_id ON notes (project_id)",
+        "CREATE INDEX IF NOT EXISTS ix_notes_created_at ON notes (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_notes_updated_at ON notes (updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_note_links_source_note_id ON note_links (source_note_id)",
+        "CREATE INDEX IF NOT EXISTS ix_note_links_target_note_id ON note_links (target_note_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_project_id ON tasks (project_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_milestone_id ON tasks (milestone_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_status ON tasks (status)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_due_date ON tasks (due_date)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_calendar_event_id ON tasks (calendar_event_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_created_at ON tasks (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_completed_at ON tasks (completed_at)",
+        "CREATE INDEX IF NOT EXISTS ix_task_notes_task_id ON task_notes (task_id)",
+        "CREATE INDEX IF NOT EXISTS ix_task_notes_note_id ON task_notes (note_id)",
+        "CREATE INDEX IF NOT EXISTS ix_calendar_events_start_time_id ON calendar_events (start_time, id)",
+        "CREATE INDEX IF NOT EXISTS ix_calendar_events_external_id ON calendar_events (external_id)",
+        "CREATE INDEX IF NOT EXISTS ix_calendar_events_rrule ON calendar_events (rrule) "
+        "WHERE rrule IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS ix_calendar_events_recurring_event_id_recurrence_id "
+        "ON calendar_events (recurring_event_id, recurrence_id) WHERE recurring_event_id IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS ix_calendar_event_occurrences_start_time "
+        "ON calendar_event_occurrences (start_time)",
+        "CREATE INDEX IF NOT EXISTS ix_note_calendar_links_event_id ON note_calendar_links (event_id)",
+        "CREATE INDEX IF NOT EXISTS ix_ai_processing_queue_entity_id ON ai_processing_queue (entity_id)",
+    ]),
+    # 2: resolve dangling [[title]] links when a note with that title appears
+    (2, [
+        "CREATE INDEX IF NOT EXISTS ix_note_links_target_identifier ON note_links (target_identifier)",
+    ]),
+    # 3: notes_fts becomes an external-content index over notes (title, content,
+    # tags_text) kept in sync by triggers, instead of a second copy of every
+    # note maintained from Python
+    (3, [
+        REFRESH_TAGS_TEXT_SQL,
+        *_external_fts(*FTS_INDEXES[0]),
+    ]),
+    # 4: full-text indexes for tasks (incl. checklist items, denormalized into
+    # tasks.checklist_text by triggers), calendar events and projects
+    (4, [
+        REFRESH_CHECKLIST_TEXT_SQL,
+        *CHECKLIST_TEXT_TRIGGERS,
+        *(statement for index in FTS_INDEXES[1:] for statement in _external_fts(*index)),
+    ]),
+    # 5: the AI worker claims the oldest runnable pending job
+    (5, [
+        "CREATE INDEX IF NOT EXISTS ix_ai_processing_queue_status_run_after "
+        "ON ai_processing_queue (status, run_after)",
+    ]),
+    # 6: checklist items are loaded by task_id for every task list
+    (6, [
+        "CREATE INDEX IF NOT EXISTS ix_task_checklists_task_id ON task_checklists (task_id)",
+    ]),
+]
+
+
+# Notes read per batch when backfilling a derived column
+BACKFILL_BATCH_ROWS = 1000
+
+
+async def _backfill_note_column(session, column: str, compute) -> None:
+    """Fill notes.<column> where it is NULL with compute(content), a batch at a time.
+
+    Each batch is one executemany UPDATE, and only one batch of note
+    content is in memory at once. updated_at is left as it was.
+    """
+    from sqlalchemy import bindparam, select, update
+    from api.models.note import Note
+
+    notes = Note.__table__
+    statement = (
+        update(notes)
+        .where(notes.c.id == bindparam("b_id"))
+        .values({column: bindparam("b_value"), "updated_at": notes.c.updated_at})
+    )
+    last_id = ""
+    while True:
+        result = await session.execute(
+            select(notes.c.id, notes.c.content)
+            .where(notes.c[column].is_(None), notes.c.id > last_id)
+            .order_by(notes.c.id)
+            .limit(BACKFILL_BATCH_ROWS)
+        )
+        rows = result.all()
+        if not rows:
+            return
+        await session.execute(statement, [{"b_id": note_id, "b_value": compute(content)} for note_id, content in rows])
+        last_id = rows[-1][0]
+
+
 async def init_database():
     """Create tables, default data, and workspace directories."""
     # Ensure workspace directory exists before DB connection (SQLite needs it)
@@ -17,12 +193,6 @@ async def init_database():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-        # Create standalone FTS5 virtual table (no content-sync, no triggers)
-        await conn.execute(text("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts
-            USING fts5(id, title, content, tags)
-        """))
-
         # Migrate: add caldav_href and etag columns to calendar_events
         for col, coltype in [("caldav_href", "VARCHAR"), ("etag", "VARCHAR")]:
             try:
@@ -69,6 +239,55 @@ async def init_database():
             except Exception:
                 pass  # column already exists
 
+        # Migrate: add occurrence index coverage columns to calendar_events
+        for col in ("occurrences_from", "occurrences_until"):
+            try:
+                await conn.execute(text(
+                    f"ALTER TABLE calendar_events ADD COLUMN {col} DATETIME"
+                ))
+            except Exception:
+                pass  # column already exists
+
+        # Migrate: add stored preview column to notes (backfilled below)
+        try:
+            await conn.execute(text("ALTER TABLE notes ADD COLUMN preview TEXT"))
+        except Exception:
+            pass  # column already exists
+
+        # Migrate: add content_length column to notes
+        try:
+            await conn.execute(text("ALTER TABLE notes ADD COLUMN content_length INTEGER DEFAULT 0"))
+            await conn.execute(text("UPDATE notes SET content_length = COALESCE(length(content), 0)"))
+        except Exception:
+            pass  # column already exists
+
+        # Migrate: add denormalized tags_text column to notes (filled by migration 3)
+        try:
+            await conn.execute(text("ALTER TABLE notes ADD COLUMN tags_text TEXT DEFAULT ''"))
+        except Exception:
+            pass  # column already exists
+
+        # Migrate: add content_hash column to notes (backfilled below)
+        try:
+            await conn.execute(text("ALTER TABLE notes ADD COLUMN content_hash VARCHAR"))
+        except Exception:
+            pass  # column already exists
+
+        # Migrate: add denormalized checklist_text column to tasks (maintained by triggers)
+        try:
+            await conn.execute(text("ALTER TABLE tasks ADD COLUMN checklist_text TEXT DEFAULT ''"))
+        except Exception:
+            pass  # column already exists
+
+        # Migrate: add retry bookkeeping to ai_processing_queue (now a job queue)
+        for col, coltype in [("attempts", "INTEGER NOT NULL DEFAULT 0"), ("run_after", "DATETIME")]:
+            try:
+                await conn.execute(text(
+                    f"ALTER TABLE ai_processing_queue ADD COLUMN {col} {coltype}"
+                ))
+            except Exception:
+                pass  # column already exists
+
         # Migrate: add ip_address and user_agent columns to auth_tokens
         for col, coltype in [("ip_address", "VARCHAR"), ("user_agent", "VARCHAR")]:
             try:
@@ -111,6 +330,15 @@ async def init_database():
         except Exception:
             pass  # already migrated
 
+        # Apply versioned migrations newer than the stored user_version
+        version = (await conn.execute(text("PRAGMA user_version"))).scalar()
+        for target, statements in SCHEMA_MIGRATIONS:
+            if target <= version:
+                continue
+            for statement in statements:
+                await conn.execute(text(statement))
+            await conn.execute(text(f"PRAGMA user_version = {target}"))
+
     # Seed default data
     from api.database import async_session
     from api.models.project import Project, ProjectMilestone
@@ -127,8 +355,13 @@ async def init_database():
             for i, name in enumerate(["To Do", "In Progress"]):
                 session.add(ProjectMilestone(project_id="proj_inbox", name=name, position=i))
 
-        # Seed default user_settings
+        # Backfill note previews and content hashes (NULL until computed from content once)
         from sqlalchemy import select
+        from api.services.block_parser import build_preview, content_hash
+        await _backfill_note_column(session, "preview", build_preview)
+        await _backfill_note_column(session, "content_hash", content_hash)
+
+        # Seed default user_settings
         for key, value in [("ai_enabled", "false"), ("calendar_sync_enabled", "false"), ("username", "admin")]:
             result = await session.execute(select(UserSettings).where(UserSettings.key == key))
             if result.scalar_one_or_none() is None:
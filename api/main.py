@@ -45,9 +45,33 @@ class UTCJSONResponse(JSONResponse):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    import asyncio
     from api.init_db import init_database
+    from api.services.ai_queue import run_ai_workers
+    from api.services.ai_service import close_http_clients, open_http_clients
+    from api.services.file_service import flush_note_writes
+    from api.services.note_watcher import run_note_watcher
+    from api.utils.auth import run_last_used_flusher
     await init_database()
+    open_http_clients()
+    ai_stop = asyncio.Event()
+    ai_workers = asyncio.create_task(run_ai_workers(ai_stop))
+    flusher = asyncio.create_task(run_last_used_flusher())
+    watcher_stop = asyncio.Event()
+    watcher = asyncio.create_task(run_note_watcher(watcher_stop)) if settings.NOTE_WATCHER_ENABLED else None
     yield
+    if watcher is not None:
+        watcher_stop.set()
+        await watcher
+    ai_stop.set()
+    await ai_workers  # a job in flight goes back to the queue
+    await flush_note_writes()
+    await close_http_clients()
+    flusher.cancel()  # flushes pending last_used_at on the way out
+    try:
+        await flusher
+    except asyncio.CancelledError:
+        pass
 
 
 # Create the actual API application
@@ -8,10 +8,13 @@ import logging
 
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import JSONResponse
 from starlette.routing import Mount, Route
 from mcp.server.sse import SseServerTransport
 
+from api.database import async_session
 from api.mcp.server import mcp_server
+from api.utils.auth import authenticate_token
 
 logger = logging.getLogger(__name__)
 
@@ -34,35 +37,26 @@ async def _check_mcp_enabled(db) -> bool:
     return setting.value.lower() == "true"
 
 
-async def handle_sse(request: Request):
-    """SSE endpoint: opens persistent event stream for MCP protocol."""
-    # Auth check: validate Bearer token
+async def _authorize(request: Request) -> JSONResponse | None:
+    """Validate the Bearer token and MCP setting. Returns an error response, or None if allowed."""
     auth_header = request.headers.get("authorization", "")
     if not auth_header.startswith("Bearer "):
-        from starlette.responses import JSONResponse
         return JSONResponse({"detail": "Not authenticated"}, status_code=401)
 
-    token = auth_header[7:]
-    # Validate the token
-    from api.utils.auth import hash_token
-    from api.database import async_session
-    from api.models.settings import AuthToken, UserSettings
-    from sqlalchemy import select
-
     async with async_session() as db:
-        # Check if MCP is enabled
         if not await _check_mcp_enabled(db):
-            from starlette.responses import JSONResponse
             return JSONResponse({"detail": "MCP is disabled"}, status_code=403)
-
-        token_hash = hash_token(token)
-        result = await db.execute(
-            select(AuthToken).where(AuthToken.token_hash == token_hash)
-        )
-        auth_token = result.scalar_one_or_none()
-        if auth_token is None:
-            from starlette.responses import JSONResponse
+        # Same cached validation path as the REST API
+        if await authenticate_token(db, auth_header[7:]) is None:
             return JSONResponse({"detail": "Invalid token"}, status_code=401)
+    return None
+
+
+async def handle_sse(request: Request):
+    """SSE endpoint: opens persistent event stream for MCP protocol."""
+    error = await _authorize(request)
+    if error is not None:
+        return error
 
     async with sse_transport.connect_sse(
         request.scope, request.receive, request._send
@@ -74,32 +68,9 @@ async def handle_sse(request: Request):
 
 async def handle_messages(request: Request):
     """Handle incoming MCP messages (tool calls, etc.)."""
-    # Auth check
-    auth_header = request.headers.get("authorization", "")
-    if not auth_header.startswith("Bearer "):
-        from starlette.responses import JSONResponse
-        return JSONResponse({"detail": "Not authenticated"}, status_code=401)
-
-    token = auth_header[7:]
-    from api.utils.auth import hash_token
-    from api.database import async_session
-    from api.models.settings import AuthToken, UserSettings
-    from sqlalchemy import select
-
-    async with async_session() as db:
-        # Check if MCP is enabled
-        if not await _check_mcp_enabled(db):
-            from starlette.responses import JSONResponse
-            return JSONResponse({"detail": "MCP is disabled"}, status_code=403)
-
-        token_hash = hash_token(token)
-        result = await db.execute(
-            select(AuthToken).where(AuthToken.token_hash == token_hash)
-        )
-        auth_token = result.scalar_one_or_none()
-        if auth_token is None:
-            from starlette.responses import JSONResponse
-            return JSONResponse({"detail": "Invalid token"}, status_code=401)
+    error = await _authorize(request)
+    if error is not None:
+        return error
 
     await sse_transport.handle_post_message(
         request.scope, request.receive, request._send
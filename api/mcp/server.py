@@ -7,12 +7,11 @@ Tool handlers query the database directly via SQLAlchemy.
 import zoneinfo
 from datetime import datetime, timedelta, timezone
 
-from dateutil.rrule import rrulestr
 from mcp.server import Server
 from mcp.types import TextContent, Tool
 
 from sqlalchemy import case, select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload
 
 from api.database import async_session
 from api.utils.websocket import manager
@@ -20,7 +19,9 @@ from api.models.calendar import CalendarEvent
 from api.models.note import Note, NoteLink, NoteTag, Tag
 from api.models.project import Project
 from api.models.task import Task, TaskNote
+from api.services import occurrence_index, recurrence_engine
 from api.services.block_parser import extract_markdown_text
+from api.services.note_service import NOTE_SUMMARY_COLUMNS
 from api.services.note_service import create_note as service_create_note, update_note as service_update_note, patch_note_content as service_patch_note_content
 
 
@@ -438,38 +439,31 @@ async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
 
 
 async def _search_notes(db, args: dict) -> list[TextContent]:
-    from sqlalchemy import text
-
     query = args.get("query", "")
     limit = min(args.get("limit", 10), 50)
 
     if not query:
         return [TextContent(type="text", text="No query provided.")]
 
-    from api.services.note_service import fts5_prefix_query
-    fts_q = fts5_prefix_query(query)
-    if not fts_q:
-        return [TextContent(type="text", text=f"No notes found matching '{query}'.")]
-
-    fts_result = await db.execute(
-        text("SELECT id FROM notes_fts WHERE notes_fts MATCH :query ORDER BY rank LIMIT :limit"),
-        {"query": fts_q, "limit": limit},
-    )
-    note_ids = [row[0] for row in fts_result.fetchall()]
+    # Shares the ranked, cached search path with the REST API
+    from api.services import search_service
+    hits, _ = await search_service.search(db, query, ["note"], limit=limit)
+    note_ids = [hit["id"] for hit in hits]
 
     if not note_ids:
         return [TextContent(type="text", text=f"No notes found matching '{query}'.")]
 
     result = await db.execute(
-        select(Note).where(Note.id.in_(note_ids)).options(selectinload(Note.tags))
+        select(Note)
+        .where(Note.id.in_(note_ids))
+        .options(load_only(*NOTE_SUMMARY_COLUMNS), selectinload(Note.tags))
     )
-    notes = result.scalars().all()
+    notes = sorted(result.scalars().all(), key=lambda n: note_ids.index(n.id))  # best match first
 
     lines = []
     for note in notes:
         tags = ", ".join(t.name for t in note.tags) if note.tags else "none"
-        preview = extract_markdown_text(note.content or "")[:200]
-        lines.append(f"**{note.title}** (id: {note.id})\nTags: {tags}\n{preview}\n")
+        lines.append(f"**{note.title}** (id: {note.id})\nTags: {tags}\n{note.preview or ''}\n")
 
     return [TextContent(type="text", text="\n---\n".join(lines))]
 
@@ -501,7 +495,7 @@ async def _list_notes(db, args: dict) -> list[TextContent]:
     tag = args.get("tag")
     project_id = args.get("project_id")
 
-    query = select(Note).options(selectinload(Note.tags)).order_by(Note.updated_at.desc())
+    query = select(Note).options(load_only(*NOTE_SUMMARY_COLUMNS), selectinload(Note.tags)).order_by(Note.updated_at.desc())
 
     if project_id:
         query = query.where(Note.project_id == project_id)
@@ -780,16 +774,7 @@ async def _get_calendar_events(db, args: dict) -> list[TextContent]:
     for e in non_recurring_result.scalars().all():
         events_out.append((e.start_time, e.title, e.end_time, e.all_day, e.location, e.id))
 
-    # 2. Recurring masters - expand their RRULEs
-    masters_result = await db.execute(
-        select(CalendarEvent).where(
-            CalendarEvent.rrule.isnot(None),
-            CalendarEvent.recurring_event_id.is_(None),
-        )
-    )
-    masters = masters_result.scalars().all()
-
-    # 3. Exception instances in range
+    # 2. Exception instances in range
     exc_result = await db.execute(
         select(CalendarEvent).where(
             CalendarEvent.recurring_event_id.isnot(None),
@@ -799,64 +784,14 @@ async def _get_calendar_events(db, args: dict) -> list[TextContent]:
     )
     exceptions = exc_result.scalars().all()
 
-    # Build exception map: master_id -> {recurrence_id -> exception}
-    exc_by_master: dict[str, dict[str, CalendarEvent]] = {}
-    for exc in exceptions:
-        if exc.recurring_event_id not in exc_by_master:
-            exc_by_master[exc.recurring_event_id] = {}
-        if exc.recurrence_id:
-            exc_by_master[exc.recurring_event_id][exc.recurrence_id] = exc
-
-    # Expand each master
-    for master in masters:
-        try:
-            duration = (master.end_time - master.start_time) if master.end_time else timedelta(hours=1)
-
-            # Handle timezone-aware expansion
-            orig_tz = None
-            if master.original_timezone:
-                try:
-                    orig_tz = zoneinfo.ZoneInfo(master.original_timezone)
-                except Exception:
-                    pass
-
-            if orig_tz:
-                dtstart_utc = master.start_time
-                if dtstart_utc.tzinfo is None:
-                    dtstart_utc = dtstart_utc.replace(tzinfo=timezone.utc)
-                dtstart_local = dtstart_utc.astimezone(orig_tz)
-                local_start = start.astimezone(orig_tz)
-                local_end = end.astimezone(orig_tz)
-                rule = rrulestr(master.rrule, dtstart=dtstart_local)
-                occurrences_local = rule.between(local_start, local_end, inc=True)
-                occurrences = [occ.astimezone(timezone.utc) for occ in occurrences_local]
-            else:
-                dtstart = master.start_time
-                if dtstart.tzinfo is None:
-                    dtstart = dtstart.replace(tzinfo=timezone.utc)
-                rule = rrulestr(master.rrule, dtstart=dtstart)
-                occurrences = rule.between(start, end, inc=True)
-
-            master_exceptions = exc_by_master.get(master.id, {})
-
-            for occ_dt in occurrences:
-                occ_iso = occ_dt.isoformat()
-                if occ_iso in master_exceptions:
-                    exc_event = master_exceptions[occ_iso]
-                    events_out.append((exc_event.start_time, exc_event.title, exc_event.end_time, exc_event.all_day, exc_event.location, exc_event.id))
-                else:
-                    occ_end = occ_dt + duration
-                    synthetic_id = f"{master.id}__rec__{occ_dt.strftime('%Y%m%dT%H%M%S')}"
-                    events_out.append((occ_dt, master.title, occ_end, master.all_day, master.location, synthetic_id))
-        except Exception:
-            # If RRULE expansion fails, include the master event itself
-            events_out.append((master.start_time, master.title, master.end_time, master.all_day, master.location, master.id))
-
-    # Add any exceptions not already included (edge case: moved outside original date)
-    included_ids = {e[5] for e in events_out}
-    for exc in exceptions:
-        if exc.id not in included_ids:
-            events_out.append((exc.start_time, exc.title, exc.end_time, exc.all_day, exc.location, exc.id))
+    # 3. Recurring occurrences from the index (end is inclusive here), with exceptions applied
+    occurrences = await occurrence_index.occurrences_between(db, start, end + timedelta(seconds=1))
+    for item in recurrence_engine.apply_exceptions(occurrences, exceptions):
+        if isinstance(item, CalendarEvent):
+            events_out.append((item.start_time, item.title, item.end_time, item.all_day, item.location, item.id))
+        else:
+            master = item.master
+            events_out.append((item.start_time, master.title, item.end_time, master.all_day, master.location, item.id))
 
     # Sort by start time and limit
     events_out.sort(key=lambda e: e[0])
@@ -912,15 +847,6 @@ async def _get_dashboard(db, args: dict) -> list[TextContent]:
     for e in non_recurring_result.scalars().all():
         events_out.append((e.start_time, e.title, e.all_day))
 
-    # Recurring masters - expand to today
-    masters_result = await db.execute(
-        select(CalendarEvent).where(
-            CalendarEvent.rrule.isnot(None),
-            CalendarEvent.recurring_event_id.is_(None),
-        )
-    )
-    masters = masters_result.scalars().all()
-
     # Exceptions today
     exc_result = await db.execute(
         select(CalendarEvent).where(
@@ -930,49 +856,14 @@ async def _get_dashboard(db, args: dict) -> list[TextContent]:
         )
     )
     exceptions = exc_result.scalars().all()
-    exc_by_master: dict[str, dict[str, CalendarEvent]] = {}
-    for exc in exceptions:
-        if exc.recurring_event_id not in exc_by_master:
-            exc_by_master[exc.recurring_event_id] = {}
-        if exc.recurrence_id:
-            exc_by_master[exc.recurring_event_id][exc.recurrence_id] = exc
-
-    for master in masters:
-        try:
-            orig_tz = None
-            if master.original_timezone:
-                try:
-                    orig_tz = zoneinfo.ZoneInfo(master.original_timezone)
-                except Exception:
-                    pass
-
-            if orig_tz:
-                dtstart_utc = master.start_time
-                if dtstart_utc.tzinfo is None:
-                    dtstart_utc = dtstart_utc.replace(tzinfo=timezone.utc)
-                dtstart_local = dtstart_utc.astimezone(orig_tz)
-                local_start = today_start.astimezone(orig_tz)
-                local_end = today_end.astimezone(orig_tz)
-                rule = rrulestr(master.rrule, dtstart=dtstart_local)
-                occurrences_local = rule.between(local_start, local_end, inc=True)
-                occurrences = [occ.astimezone(timezone.utc) for occ in occurrences_local]
-            else:
-                dtstart = master.start_time
-                if dtstart.tzinfo is None:
-                    dtstart = dtstart.replace(tzinfo=timezone.utc)
-                rule = rrulestr(master.rrule, dtstart=dtstart)
-                occurrences = rule.between(today_start, today_end, inc=True)
-
-            master_exceptions = exc_by_master.get(master.id, {})
-            for occ_dt in occurrences:
-                occ_iso = occ_dt.isoformat()
-                if occ_iso in master_exceptions:
-                    exc_event = master_exceptions[occ_iso]
-                    events_out.append((exc_event.start_time, exc_event.title, exc_event.all_day))
-                else:
-                    events_out.append((occ_dt, master.title, master.all_day))
-        except Exception:
-            pass
+
+    # Recurring occurrences from the index, with exceptions applied
+    occurrences = await occurrence_index.occurrences_between(db, today_start, today_end + timedelta(seconds=1))
+    for item in recurrence_engine.apply_exceptions(occurrences, exceptions):
+        if isinstance(item, CalendarEvent):
+            events_out.append((item.start_time, item.title, item.all_day))
+        else:
+            events_out.append((item.start_time, item.master.title, item.master.all_day))
 
     # Sort and limit
     events_out.sort(key=lambda e: e[0])
@@ -990,6 +881,7 @@ async def _get_dashboard(db, args: dict) -> list[TextContent]:
     # Recent notes (last 7 days, fallback to 5 most recent if none)
     note_result = await db.execute(
         select(Note)
+        .options(load_only(*NOTE_SUMMARY_COLUMNS))
         .where(Note.updated_at >= seven_days_ago)
         .order_by(Note.updated_at.desc())
         .limit(5)
@@ -998,6 +890,7 @@ async def _get_dashboard(db, args: dict) -> list[TextContent]:
     if not notes:
         note_result = await db.execute(
             select(Note)
+            .options(load_only(*NOTE_SUMMARY_COLUMNS))
             .order_by(Note.updated_at.desc())
             .limit(5)
         )
@@ -1119,12 +1012,15 @@ async def _update_note(db, args: dict) -> list[TextContent]:
         if error:
             return [TextContent(type="text", text=error)]
 
-    note = await service_update_note(
+    updated = await service_update_note(
         db, note_id=note_id, title=title, content=content, tags=tags,
         project_id=project_id,
     )
-    if note is None:
+    if updated is None:
         return [TextContent(type="text", text=f"Failed to update note '{note_id}'.")]
+    note, changed = updated
+    if not changed:
+        return [TextContent(type="text", text=f"No changes: **{note.title}** (id: {note.id}) already matches.")]
 
     await manager.broadcast("note_updated", {"id": note.id, "title": note.title})
     tag_str = ", ".join(t.name for t in note.tags) if note.tags else "none"
@@ -1142,9 +1038,11 @@ async def _patch_note(db, args: dict) -> list[TextContent]:
         return [TextContent(type="text", text="At least one operation is required.")]
 
     try:
-        note = await service_patch_note_content(db, note_id, operations)
+        note, changed = await service_patch_note_content(db, note_id, operations)
     except ValueError as e:
         return [TextContent(type="text", text=f"Patch failed: {e}")]
+    if not changed:
+        return [TextContent(type="text", text=f"No changes: the patched content of **{note.title}** (id: {note.id}) is identical.")]
 
     await manager.broadcast("note_updated", {"id": note.id, "title": note.title})
     return [TextContent(type="text", text=f"Note patched: **{note.title}** (id: {note.id})\n{len(operations)} operation(s) applied.")]
@@ -1212,7 +1110,7 @@ async def _get_note_links(db, args: dict) -> list[TextContent]:
 
     if outgoing_note_link_ids:
         outgoing_notes_result = await db.execute(
-            select(Note).where(Note.id.in_(outgoing_note_link_ids))
+            select(Note).where(Note.id.in_(outgoing_note_link_ids)).options(load_only(*NOTE_SUMMARY_COLUMNS))
         )
         outgoing_notes = outgoing_notes_result.scalars().all()
         for n in outgoing_notes:
@@ -1303,7 +1201,7 @@ async def _get_task_links(db, args: dict) -> list[TextContent]:
     explicit_notes = []
     if explicit_note_ids:
         explicit_notes_result = await db.execute(
-            select(Note).where(Note.id.in_(explicit_note_ids))
+            select(Note).where(Note.id.in_(explicit_note_ids)).options(load_only(*NOTE_SUMMARY_COLUMNS))
         )
         explicit_notes = list(explicit_notes_result.scalars().all())
 
@@ -1322,7 +1220,7 @@ async def _get_task_links(db, args: dict) -> list[TextContent]:
         remaining_ids = [nid for nid in wikilink_note_ids if nid not in explicit_note_ids]
         if remaining_ids:
             wikilink_notes_result = await db.execute(
-                select(Note).where(Note.id.in_(remaining_ids))
+                select(Note).where(Note.id.in_(remaining_ids)).options(load_only(*NOTE_SUMMARY_COLUMNS))
             )
             wikilink_notes = list(wikilink_notes_result.scalars().all())
 
@@ -1431,6 +1329,7 @@ async def _update_calendar_event(db, args: dict) -> list[TextContent]:
             event.start_time = start_time.replace(tzinfo=timezone.utc) if start_time.tzinfo is None else start_time
         except ValueError:
             return [TextContent(type="text", text="Invalid start_time format.")]
+        await occurrence_index.invalidate(db, event)
     if "end_time" in args:
         try:
             end_time = datetime.fromisoformat(args["end_time"].replace("Z", "+00:00"))
@@ -1,13 +1,13 @@
 from api.models.note import Note, Tag, NoteTag, NoteLink
 from api.models.task import Task, TaskChecklist, TaskNote
 from api.models.project import Project, ProjectMilestone
-from api.models.calendar import CalendarEvent, NoteCalendarLink
+from api.models.calendar import CalendarEvent, CalendarEventOccurrence, NoteCalendarLink
 from api.models.settings import UserSettings, AIProcessingQueue, AuthToken
 
 __all__ = [
     "Note", "Tag", "NoteTag", "NoteLink",
     "Task", "TaskChecklist", "TaskNote",
     "Project", "ProjectMilestone",
-    "CalendarEvent", "NoteCalendarLink",
+    "CalendarEvent", "CalendarEventOccurrence", "NoteCalendarLink",
     "UserSettings", "AIProcessingQueue", "AuthToken",
 ]
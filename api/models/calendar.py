@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, String, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, String, Text, text
 from sqlalchemy.orm import relationship
 
 from api.database import Base
@@ -23,7 +23,7 @@ class CalendarEvent(Base):
     location = Column(String, default="")
     calendar_source = Column(String, default="local")  # local, caldav
     calendar_id = Column(String, default="")
-    external_id = Column(String, nullable=True)
+    external_id = Column(String, nullable=True, index=True)
     caldav_href = Column(String, nullable=True)
     etag = Column(String, nullable=True)
     rrule = Column(Text, nullable=True)
@@ -31,19 +31,47 @@ class CalendarEvent(Base):
     recurrence_id = Column(String, nullable=True)
     recurring_event_id = Column(String, ForeignKey("calendar_events.id", ondelete="CASCADE"), nullable=True)
     synced_at = Column(DateTime, nullable=True)
+    # Time range (UTC) materialized into calendar_event_occurrences; NULL = not indexed
+    occurrences_from = Column(DateTime, nullable=True)
+    occurrences_until = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     note_links = relationship("NoteCalendarLink", back_populates="event", cascade="all, delete-orphan")
     recurring_event = relationship("CalendarEvent", remote_side="CalendarEvent.id", foreign_keys=[recurring_event_id], back_populates="exceptions")
     exceptions = relationship("CalendarEvent", foreign_keys=[recurring_event_id], back_populates="recurring_event", cascade="all, delete-orphan")
+    occurrences = relationship("CalendarEventOccurrence", back_populates="master", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Range scans and keyset pagination on (start_time, id)
+        Index("ix_calendar_events_start_time_id", "start_time", "id"),
+        # Partial indexes: an index on a mostly-NULL column would otherwise be
+        # picked for "IS NULL" filters over the whole table
+        Index(
+            "ix_calendar_events_recurring_event_id_recurrence_id", "recurring_event_id", "recurrence_id",
+            sqlite_where=text("recurring_event_id IS NOT NULL"),
+        ),
+        Index("ix_calendar_events_rrule", "rrule", sqlite_where=text("rrule IS NOT NULL")),
+    )
+
+
+class CalendarEventOccurrence(Base):
+    """One expanded RRULE instance of a recurring master, stored in UTC."""
+
+    __tablename__ = "calendar_event_occurrences"
+
+    master_id = Column(String, ForeignKey("calendar_events.id", ondelete="CASCADE"), primary_key=True)
+    start_time = Column(DateTime, primary_key=True, index=True)
+    recurrence_key = Column(String, nullable=False)  # matches an exception's recurrence_id
+
+    master = relationship("CalendarEvent", back_populates="occurrences")
 
 
 class NoteCalendarLink(Base):
     __tablename__ = "note_calendar_links"
 
     note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
-    event_id = Column(String, ForeignKey("calendar_events.id", ondelete="CASCADE"), primary_key=True)
+    event_id = Column(String, ForeignKey("calendar_events.id", ondelete="CASCADE"), primary_key=True, index=True)
     ai_suggested = Column(Boolean, default=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
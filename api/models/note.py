@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, String, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from api.database import Base
@@ -15,13 +15,17 @@ class Note(Base):
     __tablename__ = "notes"
 
     id = Column(String, primary_key=True, default=generate_note_id)
-    title = Column(String, nullable=False)
+    title = Column(String, nullable=False, index=True)
     filepath = Column(String, unique=True, nullable=False)
     content = Column(Text, default="")
-    project_id = Column(String, ForeignKey("projects.id"), nullable=True)
+    preview = Column(Text, default="")  # precomputed from content on write, for list views
+    content_length = Column(Integer, default=0)  # len(content), so list views never load content
+    tags_text = Column(Text, default="")  # space-separated tag names, indexed by notes_fts
+    content_hash = Column(String, nullable=True)  # block_parser.content_hash(content)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=True, index=True)
     is_archived = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), index=True)
 
     tags = relationship("Tag", secondary="note_tags", back_populates="notes")
     outgoing_links = relationship("NoteLink", foreign_keys="NoteLink.source_note_id", back_populates="source_note", cascade="all, delete-orphan")
@@ -53,9 +57,9 @@ class NoteLink(Base):
     __tablename__ = "note_links"
 
     id = Column(String, primary_key=True, default=lambda: f"link_{uuid.uuid4().hex[:8]}")
-    source_note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
-    target_note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), nullable=True)
-    target_identifier = Column(String, nullable=False)  # raw [[link]] text
+    source_note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False, index=True)
+    target_note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), nullable=True, index=True)
+    target_identifier = Column(String, nullable=False, index=True)  # raw [[link]] text
     link_type = Column(String, default="note")  # note, task, event
 
     source_note = relationship("Note", foreign_keys=[source_note_id], back_populates="outgoing_links")
@@ -34,10 +34,24 @@ class AIProcessingQueue(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     entity_type = Column(String, nullable=False, default="note")
-    entity_id = Column(String, nullable=False)
-    operation = Column(String, nullable=False)  # auto_tag, extract_tasks, link_events
-    status = Column(String, default="pending")  # pending, processing, completed, failed
+    entity_id = Column(String, nullable=False, index=True)
+    operation = Column(String, nullable=False)  # process_note (older rows: auto_tag, extract_tasks, link_events)
+    status = Column(String, default="pending")  # pending, processing, completed, skipped, cancelled, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=True)  # not claimed before this (retry backoff)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
+
+
+class AIResponseCache(Base):
+    __tablename__ = "ai_response_cache"
+
+    key = Column(String, primary_key=True)  # sha256 of operation, model, prompt version and messages
+    operation = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    response = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, index=True)  # expires AI_CACHE_TTL_SECONDS after this
+    last_used_at = Column(DateTime, nullable=False, index=True)  # least recently used go first past the cap
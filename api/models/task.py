@@ -17,18 +17,19 @@ class Task(Base):
     id = Column(String, primary_key=True, default=generate_task_id)
     title = Column(String, nullable=False)
     description = Column(Text, default="")
-    status = Column(String, default="in_progress")  # in_progress, done
+    status = Column(String, default="in_progress", index=True)  # in_progress, done
     priority = Column(String, default="medium")  # low, medium, high, urgent
-    due_date = Column(DateTime, nullable=True)
-    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
-    milestone_id = Column(String, ForeignKey("project_milestones.id", ondelete="SET NULL"), nullable=True)
-    calendar_event_id = Column(String, ForeignKey("calendar_events.id", ondelete="SET NULL"), nullable=True)
+    due_date = Column(DateTime, nullable=True, index=True)
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    milestone_id = Column(String, ForeignKey("project_milestones.id", ondelete="SET NULL"), nullable=True, index=True)
+    calendar_event_id = Column(String, ForeignKey("calendar_events.id", ondelete="SET NULL"), nullable=True, index=True)
     ai_suggested = Column(Boolean, default=False)
     position = Column(Integer, default=0)
     recurrence_rule = Column(Text, nullable=True)
     recurring_series_id = Column(String, nullable=True)
-    completed_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    checklist_text = Column(Text, default="")  # checklist item text, kept current by triggers for tasks_fts
+    completed_at = Column(DateTime, nullable=True, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     project = relationship("Project", back_populates="tasks")
@@ -41,7 +42,7 @@ class TaskChecklist(Base):
     __tablename__ = "task_checklists"
 
     id = Column(String, primary_key=True, default=lambda: f"check_{uuid.uuid4().hex[:8]}")
-    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
     text = Column(String, nullable=False)
     is_checked = Column(Boolean, default=False)
     position = Column(Integer, default=0)
@@ -53,8 +54,8 @@ class TaskNote(Base):
     __tablename__ = "task_notes"
 
     id = Column(String, primary_key=True, default=lambda: f"tn_{uuid.uuid4().hex[:8]}")
-    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
-    note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
+    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
+    note_id = Column(String, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     task = relationship("Task", back_populates="notes")
@@ -1,17 +1,22 @@
+import json
 import zoneinfo
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
+from api.config import settings
 from api.database import get_db
 from api.models.calendar import CalendarEvent
 from api.models.note import Note
 from api.models.task import Task
 from api.services import ai_service
 from api.services.block_parser import extract_markdown_text
+from api.services.note_service import NOTE_SUMMARY_COLUMNS
 from api.utils.auth import get_current_user
 from api.utils.timezone import resolve_today
 
@@ -22,6 +27,7 @@ class ChatRequest(BaseModel):
     message: str
     note_id: str | None = None
     context: str | None = None
+    stream: bool = False  # reply as server-sent events, token by token
 
 
 class ChatResponse(BaseModel):
@@ -35,8 +41,30 @@ class DailySuggestionsResponse(BaseModel):
     connections: list[str] = []
 
 
+class CacheLookups(BaseModel):
+    hits: int
+    misses: int
+
+
+class AICacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    ttl_seconds: int
+    hits: int  # lookups since startup
+    misses: int
+    hit_rate: float
+    entry_hits: int  # hits served by the entries currently stored, across restarts
+    operations: dict[str, CacheLookups]
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def ai_chat(body: ChatRequest, db: AsyncSession = Depends(get_db)):
+    """Chat with the configured model.
+
+    With ``stream`` set, the reply is a ``text/event-stream`` of
+    ``data: {"delta": ...}`` events, ended by ``{"done": true}`` or
+    ``{"error": ...}``.
+    """
     # Build context from note if note_id provided
     context = body.context
     if body.note_id and not context:
@@ -45,6 +73,14 @@ async def ai_chat(body: ChatRequest, db: AsyncSession = Depends(get_db)):
         if note and note.content:
             context = f"Title: {note.title}\n\n{extract_markdown_text(note.content)}"
 
+    if body.stream:
+        events = await ai_service.chat_stream(body.message, note_id=body.note_id, context=context, db=db)
+        return StreamingResponse(
+            _sse(events),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # no proxy buffering
+        )
+
     result = await ai_service.chat(body.message, note_id=body.note_id, context=context, db=db)
 
     if "error" in result:
@@ -52,6 +88,11 @@ async def ai_chat(body: ChatRequest, db: AsyncSession = Depends(get_db)):
     return ChatResponse(response=result.get("response", ""))
 
 
+async def _sse(events):
+    async for event in events:
+        yield f"data: {json.dumps(event)}\n\n"
+
+
 class AnalyzeNoteResponse(BaseModel):
     suggested_tags: list[str] = []
     extracted_tasks: list[dict] = []
@@ -86,13 +127,6 @@ async def analyze_note(
     tag_result = await db.execute(select(Tag.name))
     existing_tags = [row[0] for row in tag_result.fetchall()]
 
-    # Run auto-tag
-    suggested_tags = await ai_service.auto_tag(content, existing_tags, db)
-
-    # Run task extraction
-    extracted_tasks = await ai_service.extract_tasks(content, note.title, db)
-
-    # Run event linking
     now = datetime.now(timezone.utc)
     start = now - timedelta(days=7)
     end = now + timedelta(days=30)
@@ -106,7 +140,25 @@ async def analyze_note(
         {"id": e.id, "title": e.title, "description": e.description or "", "start_time": str(e.start_time)}
         for e in events_raw
     ]
-    linked_events = await ai_service.link_events(content, events, db) if events else []
+
+    # One call for all three, unless disabled or it fails
+    operations = {"auto_tag", "extract_tasks", "link_events"} if events else {"auto_tag", "extract_tasks"}
+    result = None
+    try:
+        if settings.AI_COMBINED_ANALYSIS:
+            result = await ai_service.analyze_note(content, note.title, operations, existing_tags, events, db)
+        if result is not None:
+            return AnalyzeNoteResponse(
+                suggested_tags=result["tags"],
+                extracted_tasks=result["tasks"],
+                linked_events=result["event_ids"],
+            )
+
+        suggested_tags = await ai_service.auto_tag(content, existing_tags, db)
+        extracted_tasks = await ai_service.extract_tasks(content, note.title, db)
+        linked_events = await ai_service.link_events(content, events, db) if events else []
+    except ai_service.AIProviderError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
     return AnalyzeNoteResponse(
         suggested_tags=suggested_tags,
@@ -115,6 +167,12 @@ async def analyze_note(
     )
 
 
+@router.get("/cache/stats", response_model=AICacheStats)
+async def ai_cache_stats(db: AsyncSession = Depends(get_db)):
+    """Size and hit rate of the cache of AI replies to note and daily suggestion prompts."""
+    return AICacheStats(**await ai_service.cache_stats(db))
+
+
 @router.get("/suggestions/daily", response_model=DailySuggestionsResponse)
 async def daily_suggestions(db: AsyncSession = Depends(get_db), tz: str | None = Query(None)):
     today_start, today_end, local_date = resolve_today(tz)
@@ -160,6 +218,7 @@ async def daily_suggestions(db: AsyncSession = Depends(get_db), tz: str | None =
     # Recent notes
     note_result = await db.execute(
         select(Note)
+        .options(load_only(*NOTE_SUMMARY_COLUMNS))
         .where(Note.updated_at >= seven_days_ago)
         .order_by(Note.updated_at.desc())
         .limit(10)
@@ -19,9 +19,11 @@ from api.schemas.auth import (
 )
 from api.utils.auth import (
     CurrentUser,
+    flush_last_used,
     generate_token,
     get_current_user,
     hash_password,
+    invalidate_token_cache,
     verify_password,
 )
 
@@ -143,6 +145,7 @@ async def change_username(
     else:
         db.add(UserSettings(key="username", value=request.username.strip()))
     await db.commit()
+    invalidate_token_cache()  # cached validations carry the old username
 
     return UserResponse(
         username=request.username.strip(),
@@ -174,6 +177,7 @@ async def change_password(
         delete(AuthToken).where(AuthToken.id != current_user.token_id)
     )
     await db.commit()
+    invalidate_token_cache()
 
     return {"detail": "Password changed. All other sessions have been revoked."}
 
@@ -186,6 +190,7 @@ async def list_tokens(
     current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    await flush_last_used()  # show up-to-date last_used_at
     result = await db.execute(
         select(AuthToken).order_by(AuthToken.created_at.desc())
     )
@@ -254,6 +259,7 @@ async def revoke_token(
 
     await db.delete(token)
     await db.commit()
+    invalidate_token_cache(token_id)
 
     return {"detail": "Token revoked"}
 
@@ -272,5 +278,6 @@ async def logout(
         if token:
             await db.delete(token)
             await db.commit()
+        invalidate_token_cache(current_user.token_id)
 
     return {"detail": "Logged out"}
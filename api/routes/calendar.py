@@ -1,11 +1,12 @@
+import base64
+import heapq
 import json
 import logging
 from datetime import datetime, timedelta, timezone
+from itertools import islice
 
-import zoneinfo
-from dateutil.rrule import rrulestr
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, and_
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.database import get_db
@@ -25,7 +26,9 @@ from api.schemas.calendar import (
     LinkedNoteRef,
     LinkedTaskRef,
 )
+from api.services import occurrence_index
 from api.services.calendar_sync import caldav_sync_service
+from api.services.recurrence_engine import Occurrence
 from api.utils.auth import get_current_user
 from api.utils.websocket import get_client_id, manager
 
@@ -75,48 +78,83 @@ async def _upsert_setting(db: AsyncSession, key: str, value: str):
         db.add(UserSettings(key=key, value=value, updated_at=now))
 
 
-async def _build_event_response(event: CalendarEvent, db: AsyncSession) -> EventResponse:
-    """Build EventResponse with linked notes and tasks."""
+async def _build_event_responses(events: list[CalendarEvent], db: AsyncSession) -> list[EventResponse]:
+    """Build EventResponses for a page of events, loading links in two IN queries."""
+    if not events:
+        return []
+    event_ids = list({e.id for e in events})
+
     # Linked notes via note_calendar_links
+    notes_by_event: dict[str, list[LinkedNoteRef]] = {}
     note_link_result = await db.execute(
-        select(Note.id, Note.title)
+        select(NoteCalendarLink.event_id, Note.id, Note.title)
         .join(NoteCalendarLink, NoteCalendarLink.note_id == Note.id)
-        .where(NoteCalendarLink.event_id == event.id)
+        .where(NoteCalendarLink.event_id.in_(event_ids))
     )
-    linked_notes = [LinkedNoteRef(id=row[0], title=row[1]) for row in note_link_result.fetchall()]
+    for event_id, note_id, note_title in note_link_result.fetchall():
+        notes_by_event.setdefault(event_id, []).append(LinkedNoteRef(id=note_id, title=note_title))
 
     # Linked tasks via tasks.calendar_event_id
+    tasks_by_event: dict[str, list[LinkedTaskRef]] = {}
     task_result = await db.execute(
-        select(Task.id, Task.title, Task.status).where(Task.calendar_event_id == event.id)
+        select(Task.calendar_event_id, Task.id, Task.title, Task.status)
+        .where(Task.calendar_event_id.in_(event_ids))
     )
-    linked_tasks = [LinkedTaskRef(id=row[0], title=row[1], status=row[2]) for row in task_result.fetchall()]
+    for event_id, task_id, task_title, task_status in task_result.fetchall():
+        tasks_by_event.setdefault(event_id, []).append(LinkedTaskRef(id=task_id, title=task_title, status=task_status))
+
+    # Datetimes go out UTC-aware for consistent frontend parsing
+    return [
+        EventResponse(
+            id=event.id,
+            title=event.title,
+            description=event.description or "",
+            start_time=_ensure_utc(event.start_time),
+            end_time=_ensure_utc(event.end_time),
+            all_day=event.all_day,
+            location=event.location or "",
+            calendar_source=event.calendar_source or "local",
+            calendar_id=event.calendar_id or "",
+            rrule=event.rrule,
+            recurring_event_id=event.recurring_event_id,
+            recurrence_id=event.recurrence_id,
+            synced_at=_ensure_utc(event.synced_at),
+            linked_notes=notes_by_event.get(event.id, []),
+            linked_tasks=tasks_by_event.get(event.id, []),
+            created_at=_ensure_utc(event.created_at),
+            updated_at=_ensure_utc(event.updated_at),
+        )
+        for event in events
+    ]
+
+
+async def _build_event_response(event: CalendarEvent, db: AsyncSession) -> EventResponse:
+    """Build EventResponse with linked notes and tasks."""
+    return (await _build_event_responses([event], db))[0]
+
 
-    # Ensure all datetimes are UTC-aware for consistent frontend parsing
-    def ensure_utc_aware(dt: datetime | None) -> datetime | None:
-        if dt is None:
-            return None
-        if dt.tzinfo is None:
-            return dt.replace(tzinfo=timezone.utc)
-        return dt
+def _occurrence_response(occ: Occurrence) -> EventResponse:
+    """Build EventResponse for a virtual instance of a recurring master."""
+    master = occ.master
 
     return EventResponse(
-        id=event.id,
-        title=event.title,
-        description=event.description or "",
-        start_time=ensure_utc_aware(event.start_time),
-        end_time=ensure_utc_aware(event.end_time),
-        all_day=event.all_day,
-        location=event.location or "",
-        calendar_source=event.calendar_source or "local",
-        calendar_id=event.calendar_id or "",
-        rrule=event.rrule,
-        recurring_event_id=event.recurring_event_id,
-        recurrence_id=event.recurrence_id,
-        synced_at=ensure_utc_aware(event.synced_at),
-        linked_notes=linked_notes,
-        linked_tasks=linked_tasks,
-        created_at=ensure_utc_aware(event.created_at),
-        updated_at=ensure_utc_aware(event.updated_at),
+        id=occ.id,
+        title=master.title,
+        description=master.description or "",
+        start_time=occ.start_time,
+        end_time=occ.end_time,
+        all_day=master.all_day,
+        location=master.location or "",
+        calendar_source=master.calendar_source or "local",
+        calendar_id=master.calendar_id or "",
+        rrule=master.rrule,
+        recurring_event_id=master.id,
+        recurrence_id=None,
+        synced_at=_ensure_utc(master.synced_at),
+        linked_notes=[],
+        linked_tasks=[],
+        created_at=_ensure_utc(master.created_at),
+        updated_at=_ensure_utc(master.updated_at),
     )
 
 
@@ -173,154 +211,101 @@ async def create_event(body: EventCreate, db: AsyncSession = Depends(get_db), cl
     return await _build_event_response(event, db)
 
 
+def _event_sort_key(item: CalendarEvent | Occurrence) -> tuple[datetime, str]:
+    """Keyset order shared by stored events and virtual occurrences."""
+    return (_ensure_utc(item.start_time), item.id)
+
+
+def _encode_cursor(item: CalendarEvent | Occurrence) -> str:
+    start_time, event_id = _event_sort_key(item)
+    return base64.urlsafe_b64encode(f"{start_time.isoformat()}|{event_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        start_raw, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return _ensure_utc(datetime.fromisoformat(start_raw)), event_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _stored_events_query(range_start: datetime, range_end: datetime, after: tuple[datetime, str] | None):
+    """Stored events (non-recurring and exceptions) in range, in keyset order."""
+    query = select(CalendarEvent).where(
+        CalendarEvent.start_time >= range_start,
+        CalendarEvent.start_time < range_end,
+    )
+    if after is not None:
+        after_start, after_id = after
+        query = query.where(or_(
+            CalendarEvent.start_time > after_start,
+            and_(CalendarEvent.start_time == after_start, CalendarEvent.id > after_id),
+        ))
+    return query.order_by(CalendarEvent.start_time, CalendarEvent.id)
+
+
 @router.get("/events", response_model=EventList)
 async def list_events(
     start: datetime | None = Query(None),
     end: datetime | None = Query(None),
     limit: int = Query(500, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
     db: AsyncSession = Depends(get_db),
 ):
-    # 1. Non-recurring events (no rrule) and non-exception events in range
-    query = select(CalendarEvent).where(
+    # Without an explicit range, fall back to the occurrence index's rolling
+    # horizon rather than all time. A lone bound outside that horizon gets
+    # a horizon's worth of range from itself, so it never comes out empty.
+    default_start, default_end = occurrence_index.default_window()
+    range_start = _ensure_utc(start) if start else None
+    range_end = (_ensure_utc(end) + timedelta(days=1)) if end else None
+    if range_start is None:
+        range_start = default_start if range_end is None else min(
+            default_start, range_end - timedelta(days=occurrence_index.HORIZON_PAST_DAYS)
+        )
+    if range_end is None:
+        range_end = max(default_end, range_start + timedelta(days=occurrence_index.HORIZON_FUTURE_DAYS))
+    if range_start >= range_end:
+        raise HTTPException(status_code=422, detail="start must be on or before end")
+    after = _decode_cursor(cursor) if cursor else None
+
+    # Each stream is already sorted by (start_time, id), so fetching one row
+    # past the page from each is enough to fill it and detect a next page
+    fetch = offset + limit + 1
+    non_recurring_query = _stored_events_query(range_start, range_end, after).where(
         CalendarEvent.rrule.is_(None),
         CalendarEvent.recurring_event_id.is_(None),
-    ).order_by(CalendarEvent.start_time)
-    if start:
-        query = query.where(CalendarEvent.start_time >= start)
-    if end:
-        query = query.where(CalendarEvent.start_time < end + timedelta(days=1))
-
-    result = await db.execute(query)
-    non_recurring = list(result.scalars().all())
-    event_responses = [await _build_event_response(e, db) for e in non_recurring]
-
-    # 2. Recurring masters (rrule IS NOT NULL, recurring_event_id IS NULL)
-    master_query = select(CalendarEvent).where(
-        CalendarEvent.rrule.isnot(None),
-        CalendarEvent.recurring_event_id.is_(None),
     )
-    master_result = await db.execute(master_query)
-    masters = list(master_result.scalars().all())
-
-    # 3. Exception instances in the range
-    exc_query = select(CalendarEvent).where(
+    exception_query = _stored_events_query(range_start, range_end, after).where(
         CalendarEvent.recurring_event_id.isnot(None),
     )
-    if start:
-        exc_query = exc_query.where(CalendarEvent.start_time >= start)
-    if end:
-        exc_query = exc_query.where(CalendarEvent.start_time < end + timedelta(days=1))
-    exc_result = await db.execute(exc_query)
-    exceptions = list(exc_result.scalars().all())
-
-    # Build a map of exception dates per master for override matching
-    exc_by_master: dict[str, dict[str, CalendarEvent]] = {}
-    for exc in exceptions:
-        master_id = exc.recurring_event_id
-        if master_id not in exc_by_master:
-            exc_by_master[master_id] = {}
-        if exc.recurrence_id:
-            exc_by_master[master_id][exc.recurrence_id] = exc
-
-    # 4. Expand each master's RRULE into virtual instances
-    # Ensure range bounds are timezone-aware (query params may be naive)
-    range_start = start or datetime(2000, 1, 1)
-    range_end = (end + timedelta(days=1)) if end else datetime(2100, 1, 1)
-    if range_start.tzinfo is None:
-        range_start = range_start.replace(tzinfo=timezone.utc)
-    if range_end.tzinfo is None:
-        range_end = range_end.replace(tzinfo=timezone.utc)
-
-    for master in masters:
-        try:
-            duration = (master.end_time - master.start_time) if master.end_time else timedelta(hours=1)
-
-            # Expand RRULE in the event's original timezone so DST is handled
-            # correctly (e.g. "11 AM Eastern" stays 11 AM regardless of DST).
-            orig_tz = None
-            if master.original_timezone:
-                try:
-                    orig_tz = zoneinfo.ZoneInfo(master.original_timezone)
-                except Exception:
-                    pass
-
-            if orig_tz:
-                # Convert stored UTC start back to original local time for expansion
-                dtstart_utc = master.start_time
-                if dtstart_utc.tzinfo is None:
-                    dtstart_utc = dtstart_utc.replace(tzinfo=timezone.utc)
-                dtstart_local = dtstart_utc.astimezone(orig_tz)
-
-                # Expand in local timezone
-                local_range_start = range_start.astimezone(orig_tz)
-                local_range_end = range_end.astimezone(orig_tz)
-                rule = rrulestr(master.rrule, dtstart=dtstart_local)
-                occurrences_local = rule.between(local_range_start, local_range_end, inc=True)
-
-                # Convert each occurrence back to UTC
-                occurrences = [occ.astimezone(timezone.utc) for occ in occurrences_local]
-            else:
-                dtstart = master.start_time
-                if dtstart.tzinfo is None:
-                    dtstart = dtstart.replace(tzinfo=timezone.utc)
-                rule = rrulestr(master.rrule, dtstart=dtstart)
-                occurrences = rule.between(range_start, range_end, inc=True)
-
-            master_exceptions = exc_by_master.get(master.id, {})
-
-            for occ_dt in occurrences:
-                occ_iso = occ_dt.isoformat()
-                # Check if an exception overrides this occurrence
-                if occ_iso in master_exceptions:
-                    exc_event = master_exceptions[occ_iso]
-                    event_responses.append(await _build_event_response(exc_event, db))
-                    continue
-
-                # Generate virtual instance
-                occ_end = occ_dt + duration
-                synthetic_id = f"{master.id}__rec__{occ_dt.strftime('%Y%m%dT%H%M%S')}"
-                # Ensure datetimes are UTC-aware
-                synced = master.synced_at.replace(tzinfo=timezone.utc) if master.synced_at and master.synced_at.tzinfo is None else master.synced_at
-                created = master.created_at.replace(tzinfo=timezone.utc) if master.created_at and master.created_at.tzinfo is None else master.created_at
-                updated = master.updated_at.replace(tzinfo=timezone.utc) if master.updated_at and master.updated_at.tzinfo is None else master.updated_at
-                event_responses.append(EventResponse(
-                    id=synthetic_id,
-                    title=master.title,
-                    description=master.description or "",
-                    start_time=occ_dt,
-                    end_time=occ_end,
-                    all_day=master.all_day,
-                    location=master.location or "",
-                    calendar_source=master.calendar_source or "local",
-                    calendar_id=master.calendar_id or "",
-                    rrule=master.rrule,
-                    recurring_event_id=master.id,
-                    recurrence_id=None,
-                    synced_at=synced,
-                    linked_notes=[],
-                    linked_tasks=[],
-                    created_at=created,
-                    updated_at=updated,
-                ))
-        except Exception as e:
-            logger.warning("Failed to expand RRULE for event %s: %s", master.id, e)
-            event_responses.append(await _build_event_response(master, db))
-
-    # Add any exception instances not already included (edge case: exception moved outside original date)
-    included_exc_ids = set()
-    for resp in event_responses:
-        if resp.recurrence_id:
-            included_exc_ids.add(resp.id)
-    for exc in exceptions:
-        if exc.id not in included_exc_ids:
-            event_responses.append(await _build_event_response(exc, db))
-
-    # Sort by start_time
-    event_responses.sort(key=lambda e: e.start_time)
-    total = len(event_responses)
-    event_responses = event_responses[offset:offset + limit]
-    return EventList(events=event_responses, total=total)
+    non_recurring = (await db.execute(non_recurring_query.limit(fetch))).scalars().all()
+    exceptions = (await db.execute(exception_query.limit(fetch))).scalars().all()
+    occurrences = await occurrence_index.occurrences_page(db, range_start, range_end, after=after, limit=fetch)
+
+    merged = list(islice(heapq.merge(non_recurring, exceptions, occurrences, key=_event_sort_key), fetch))
+    page = merged[offset:offset + limit]
+    next_cursor = _encode_cursor(page[-1]) if page and len(merged) == fetch else None
+
+    # Totals come from COUNT queries, never from materializing the range
+    stored_total = await db.execute(
+        select(func.count()).select_from(CalendarEvent).where(
+            CalendarEvent.start_time >= range_start,
+            CalendarEvent.start_time < range_end,
+            or_(CalendarEvent.rrule.is_(None), CalendarEvent.recurring_event_id.isnot(None)),
+        )
+    )
+    total = stored_total.scalar_one() + await occurrence_index.count_between(db, range_start, range_end)
+
+    # Only the page is turned into responses; stored events share one link lookup
+    stored_responses = iter(await _build_event_responses(
+        [item for item in page if isinstance(item, CalendarEvent)], db
+    ))
+    event_responses = [
+        next(stored_responses) if isinstance(item, CalendarEvent) else _occurrence_response(item)
+        for item in page
+    ]
+    return EventList(events=event_responses, total=total, next_cursor=next_cursor)
 
 
 @router.get("/events/{event_id}", response_model=EventResponse)
@@ -337,12 +322,16 @@ async def update_event(event_id: str, body: EventUpdate, db: AsyncSession = Depe
     if event is None:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    for field, value in body.model_dump(exclude_unset=True).items():
+    updates = body.model_dump(exclude_unset=True)
+    for field, value in updates.items():
         # Convert datetime fields to UTC
         if field in ("start_time", "end_time") and value is not None:
             value = _ensure_utc(value)
         setattr(event, field, value)
 
+    if "rrule" in updates or "start_time" in updates:
+        await occurrence_index.invalidate(db, event)
+
     await db.commit()
     await db.refresh(event)
     await manager.broadcast("event_updated", {"id": event.id, "title": event.title}, exclude_client_id=client_id)
@@ -418,6 +407,7 @@ async def update_event_recurrence(event_id: str, body: EventUpdate, db: AsyncSes
 
     if body.rrule is not None:
         event.rrule = body.rrule if body.rrule else None
+        await occurrence_index.invalidate(db, event)
 
     await db.commit()
     await db.refresh(event)
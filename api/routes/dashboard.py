@@ -1,16 +1,18 @@
 import zoneinfo
 from datetime import datetime, timedelta, timezone
 
-from dateutil.rrule import rrulestr
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from api.database import get_db
 from api.models.calendar import CalendarEvent
 from api.models.note import Note
 from api.models.task import Task
+from api.services import occurrence_index, recurrence_engine
+from api.services.note_service import NOTE_SUMMARY_COLUMNS
 from api.utils.auth import get_current_user
 from api.utils.timezone import resolve_today
 
@@ -126,15 +128,6 @@ async def get_today(db: AsyncSession = Depends(get_db), tz: str | None = Query(N
         if st.astimezone(user_tz).strftime("%Y-%m-%d") == local_date:
             events_out.append((st, e.title, e.end_time, e.all_day, e.id))
 
-    # Recurring masters - expand their RRULEs
-    masters_result = await db.execute(
-        select(CalendarEvent).where(
-            CalendarEvent.rrule.isnot(None),
-            CalendarEvent.recurring_event_id.is_(None),
-        )
-    )
-    masters = masters_result.scalars().all()
-
     # Exception instances: wider range for all-day edge cases, filter in Python
     exc_result = await db.execute(
         select(CalendarEvent).where(
@@ -143,99 +136,19 @@ async def get_today(db: AsyncSession = Depends(get_db), tz: str | None = Query(N
             CalendarEvent.start_time < today_end + timedelta(days=1),
         )
     )
-    exceptions = []
-    for exc in exc_result.scalars().all():
-        st = _ensure_utc(exc.start_time)
-        if exc.all_day:
-            if st.astimezone(user_tz).strftime("%Y-%m-%d") == local_date:
-                exceptions.append(exc)
+    window = (today_start, today_end)
+    exceptions = [
+        exc for exc in exc_result.scalars().all()
+        if recurrence_engine.in_window(exc.start_time, bool(exc.all_day), window, user_tz)
+    ]
+
+    # Recurring occurrences from the index; all-day ones matched by local date
+    occurrences = await occurrence_index.occurrences_between(db, today_start, today_end, tz=user_tz)
+    for item in recurrence_engine.apply_exceptions(occurrences, exceptions):
+        if isinstance(item, CalendarEvent):
+            events_out.append((_ensure_utc(item.start_time), item.title, item.end_time, item.all_day, item.id))
         else:
-            if today_start <= st < today_end:
-                exceptions.append(exc)
-
-    exc_by_master: dict[str, dict[str, CalendarEvent]] = {}
-    for exc in exceptions:
-        if exc.recurring_event_id not in exc_by_master:
-            exc_by_master[exc.recurring_event_id] = {}
-        if exc.recurrence_id:
-            exc_by_master[exc.recurring_event_id][exc.recurrence_id] = exc
-
-    # Expand each master's RRULE
-    for master in masters:
-        try:
-            duration = (master.end_time - master.start_time) if master.end_time else timedelta(hours=1)
-
-            # Handle timezone-aware expansion
-            orig_tz = None
-            if master.original_timezone:
-                try:
-                    orig_tz = zoneinfo.ZoneInfo(master.original_timezone)
-                except Exception:
-                    pass
-
-            if orig_tz:
-                dtstart_utc = master.start_time
-                if dtstart_utc.tzinfo is None:
-                    dtstart_utc = dtstart_utc.replace(tzinfo=timezone.utc)
-                dtstart_local = dtstart_utc.astimezone(orig_tz)
-                rule = rrulestr(master.rrule, dtstart=dtstart_local)
-
-                if master.all_day:
-                    # Widen range for all-day, filter by local date
-                    wide_start = (today_start - timedelta(days=1)).astimezone(orig_tz)
-                    wide_end = (today_end + timedelta(days=1)).astimezone(orig_tz)
-                    occurrences_local = rule.between(wide_start, wide_end, inc=True)
-                    occurrences = [
-                        occ.astimezone(timezone.utc) for occ in occurrences_local
-                        if occ.astimezone(timezone.utc).astimezone(user_tz).strftime("%Y-%m-%d") == local_date
-                    ]
-                else:
-                    local_start = today_start.astimezone(orig_tz)
-                    local_end = today_end.astimezone(orig_tz)
-                    occurrences_local = rule.between(local_start, local_end, inc=True)
-                    # Exclude end boundary for timed events
-                    occurrences = [
-                        occ.astimezone(timezone.utc) for occ in occurrences_local
-                        if occ.astimezone(timezone.utc) < today_end
-                    ]
-            else:
-                dtstart = master.start_time
-                if dtstart.tzinfo is None:
-                    dtstart = dtstart.replace(tzinfo=timezone.utc)
-                rule = rrulestr(master.rrule, dtstart=dtstart)
-
-                if master.all_day:
-                    wide_start = today_start - timedelta(days=1)
-                    wide_end = today_end + timedelta(days=1)
-                    raw_occurrences = rule.between(wide_start, wide_end, inc=True)
-                    occurrences = [
-                        occ for occ in raw_occurrences
-                        if occ.astimezone(user_tz).strftime("%Y-%m-%d") == local_date
-                    ]
-                else:
-                    raw_occurrences = rule.between(today_start, today_end, inc=True)
-                    occurrences = [occ for occ in raw_occurrences if occ < today_end]
-
-            master_exceptions = exc_by_master.get(master.id, {})
-
-            for occ_dt in occurrences:
-                occ_iso = occ_dt.isoformat()
-                if occ_iso in master_exceptions:
-                    exc_event = master_exceptions[occ_iso]
-                    events_out.append((_ensure_utc(exc_event.start_time), exc_event.title, exc_event.end_time, exc_event.all_day, exc_event.id))
-                else:
-                    occ_end = occ_dt + duration
-                    synthetic_id = f"{master.id}__rec__{occ_dt.strftime('%Y%m%dT%H%M%S')}"
-                    events_out.append((occ_dt, master.title, occ_end, master.all_day, synthetic_id))
-        except Exception:
-            # If RRULE expansion fails, skip this master
-            pass
-
-    # Add any exceptions not already included (edge case: moved outside original date)
-    included_ids = {e[4] for e in events_out}
-    for exc in exceptions:
-        if exc.id not in included_ids:
-            events_out.append((_ensure_utc(exc.start_time), exc.title, exc.end_time, exc.all_day, exc.id))
+            events_out.append((item.start_time, item.master.title, item.end_time, item.master.all_day, item.id))
 
     # Sort by start time and limit
     events_out.sort(key=lambda e: e[0])
@@ -259,6 +172,7 @@ async def get_today(db: AsyncSession = Depends(get_db), tz: str | None = Query(N
     # Recent notes (last 7 days, fallback to 5 most recent if none)
     note_result = await db.execute(
         select(Note)
+        .options(load_only(*NOTE_SUMMARY_COLUMNS))
         .where(Note.updated_at >= seven_days_ago)
         .order_by(Note.updated_at.desc())
         .limit(10)
@@ -267,6 +181,7 @@ async def get_today(db: AsyncSession = Depends(get_db), tz: str | None = Query(N
     if not notes:
         note_result = await db.execute(
             select(Note)
+            .options(load_only(*NOTE_SUMMARY_COLUMNS))
             .order_by(Note.updated_at.desc())
             .limit(5)
         )
@@ -298,6 +213,7 @@ async def get_journal_data(db: AsyncSession = Depends(get_db), tz: str | None =
     # Notes created today
     notes_created_result = await db.execute(
         select(Note)
+        .options(load_only(*NOTE_SUMMARY_COLUMNS))
         .where(Note.created_at.between(today_start, today_end))
         .order_by(Note.created_at.desc())
     )
@@ -307,6 +223,7 @@ async def get_journal_data(db: AsyncSession = Depends(get_db), tz: str | None =
     # Notes updated today (excluding those created today)
     notes_updated_result = await db.execute(
         select(Note)
+        .options(load_only(*NOTE_SUMMARY_COLUMNS))
         .where(
             Note.updated_at.between(today_start, today_end),
             ~Note.id.in_(notes_created_ids) if notes_created_ids else True,
@@ -1,8 +1,9 @@
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from api.database import get_db
 from api.models.calendar import CalendarEvent
@@ -23,7 +24,9 @@ from api.schemas.note import (
     NoteUpdate,
 )
 from api.services import note_service
-from api.services.block_parser import extract_markdown_text, parse_blocks, serialize_blocks
+from api.services.ai_queue import enqueue_note_ai
+from api.services.note_service import NOTE_SUMMARY_COLUMNS
+from api.services.block_parser import parse_blocks, serialize_blocks
 from api.utils.auth import get_current_user
 from api.utils.websocket import get_client_id, manager
 
@@ -31,7 +34,7 @@ router = APIRouter(prefix="/notes", tags=["notes"], dependencies=[Depends(get_cu
 
 
 @router.post("", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
-async def create_note(body: NoteCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db), client_id: str | None = Depends(get_client_id)):
+async def create_note(body: NoteCreate, db: AsyncSession = Depends(get_db), client_id: str | None = Depends(get_client_id)):
     content = body.content
     if body.blocks is not None:
         content = serialize_blocks(body.blocks)
@@ -41,8 +44,7 @@ async def create_note(body: NoteCreate, background_tasks: BackgroundTasks, db: A
     resp = await _note_to_response(note, db)
     await manager.broadcast("note_created", {"id": note.id, "title": note.title}, exclude_client_id=client_id)
 
-    from api.services.ai_background import process_note_ai
-    background_tasks.add_task(process_note_ai, note.id)
+    await enqueue_note_ai(db, note.id)
 
     return resp
 
@@ -65,7 +67,7 @@ async def list_notes(
         tags=tag_list, search=search, date_from=date_from, date_to=date_to,
     )
     return NoteList(
-        notes=[await _note_to_list_item(n, db) for n in notes],
+        notes=await _notes_to_list_items(notes, db),
         total=total,
         limit=limit,
         offset=offset,
@@ -81,28 +83,30 @@ async def get_note(note_id: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.put("/{note_id}", response_model=NoteResponse)
-async def update_note(note_id: str, body: NoteUpdate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db), client_id: str | None = Depends(get_client_id)):
+async def update_note(note_id: str, body: NoteUpdate, db: AsyncSession = Depends(get_db), client_id: str | None = Depends(get_client_id)):
     content = body.content
     if body.blocks is not None:
         content = serialize_blocks(body.blocks)
-    note = await note_service.update_note(
+    updated = await note_service.update_note(
         db, note_id, title=body.title, content=content, tags=body.tags, project_id=body.project_id,
     )
-    if note is None:
+    if updated is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    resp = await _note_to_response(note, db)
+    note, changed = updated
+    resp = await _note_to_response(note, db, unchanged=not changed)
+    if not changed:
+        return resp
     await manager.broadcast("note_updated", {"id": note.id, "title": note.title}, exclude_client_id=client_id)
 
-    from api.services.ai_background import process_note_ai
-    background_tasks.add_task(process_note_ai, note.id)
+    await enqueue_note_ai(db, note.id)
 
     return resp
 
 
 @router.patch("/{note_id}/content", response_model=NoteResponse)
-async def patch_note_content(note_id: str, body: NotePatchContent, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db), client_id: str | None = Depends(get_client_id)):
+async def patch_note_content(note_id: str, body: NotePatchContent, db: AsyncSession = Depends(get_db), client_id: str | None = Depends(get_client_id)):
     try:
-        note = await note_service.patch_note_content(
+        note, changed = await note_service.patch_note_content(
             db, note_id, operations=[op.model_dump() for op in body.operations],
         )
     except ValueError as e:
@@ -110,11 +114,12 @@ async def patch_note_content(note_id: str, body: NotePatchContent, background_ta
         if "not found" in msg:
             raise HTTPException(status_code=404, detail=msg)
         raise HTTPException(status_code=422, detail=msg)
-    resp = await _note_to_response(note, db)
+    resp = await _note_to_response(note, db, unchanged=not changed)
+    if not changed:
+        return resp
     await manager.broadcast("note_updated", {"id": note.id, "title": note.title}, exclude_client_id=client_id)
 
-    from api.services.ai_background import process_note_ai
-    background_tasks.add_task(process_note_ai, note.id)
+    await enqueue_note_ai(db, note.id)
 
     return resp
 
@@ -177,7 +182,7 @@ async def get_links(note_id: str, db: AsyncSession = Depends(get_db)):
 
     from api.models.note import Note
     outgoing_notes_result = await db.execute(
-        select(Note).where(Note.id.in_(outgoing_note_link_ids))
+        select(Note).where(Note.id.in_(outgoing_note_link_ids)).options(load_only(*NOTE_SUMMARY_COLUMNS))
     ) if outgoing_note_link_ids else None
     outgoing_notes = list(outgoing_notes_result.scalars().all()) if outgoing_notes_result else []
 
@@ -249,7 +254,7 @@ async def get_links(note_id: str, db: AsyncSession = Depends(get_db)):
     )
 
 
-async def _note_to_response(note, db: AsyncSession) -> NoteResponse:
+async def _note_to_response(note, db: AsyncSession, unchanged: bool = False) -> NoteResponse:
     # Gather linked notes (from incoming_links)
     linked_notes = []
     if hasattr(note, "incoming_links") and note.incoming_links:
@@ -285,31 +290,35 @@ async def _note_to_response(note, db: AsyncSession) -> NoteResponse:
         linked_events=linked_events,
         created_at=note.created_at,
         updated_at=note.updated_at,
+        unchanged=unchanged,
     )
 
 
-async def _note_to_list_item(note, db: AsyncSession) -> NoteListItem:
-    preview = ""
-    if note.content:
-        md_text = extract_markdown_text(note.content)
-        preview = md_text[:200].strip()
-
+async def _notes_to_list_items(notes, db: AsyncSession) -> list[NoteListItem]:
+    """Build list items for a page of notes, with one TaskNote query for the page."""
     # Gather linked tasks via TaskNote table
     from api.models.task import TaskNote
-    task_result = await db.execute(
-        select(TaskNote.task_id).where(TaskNote.note_id == note.id)
-    )
-    linked_tasks = list(task_result.scalars().all())
-
-    return NoteListItem(
-        id=note.id,
-        title=note.title,
-        filepath=note.filepath,
-        tags=[t.name for t in note.tags],
-        project_id=note.project_id,
-        linked_tasks=linked_tasks,
-        linked_events=[],
-        preview=preview,
-        created_at=note.created_at,
-        updated_at=note.updated_at,
-    )
+    tasks_by_note: dict[str, list[str]] = {}
+    if notes:
+        task_result = await db.execute(
+            select(TaskNote.note_id, TaskNote.task_id).where(TaskNote.note_id.in_([n.id for n in notes]))
+        )
+        for note_id, task_id in task_result.fetchall():
+            tasks_by_note.setdefault(note_id, []).append(task_id)
+
+    return [
+        NoteListItem(
+            id=note.id,
+            title=note.title,
+            filepath=note.filepath,
+            tags=[t.name for t in note.tags],
+            project_id=note.project_id,
+            linked_tasks=tasks_by_note.get(note.id, []),
+            linked_events=[],
+            preview=note.preview or "",
+            content_length=note.content_length or 0,
+            created_at=note.created_at,
+            updated_at=note.updated_at,
+        )
+        for note in notes
+    ]
@@ -1,87 +1,51 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, text, func, or_
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.database import get_db
-from api.models.task import Task
-from api.schemas.search import SearchResult, SearchResultItem, TaskSearchResultItem
-from api.services.note_service import fts5_prefix_query
+from api.schemas.search import SearchCacheStats, SearchResult, SearchResultItem
+from api.services import search_service
 from api.utils.auth import get_current_user
 
 router = APIRouter(prefix="/search", tags=["search"], dependencies=[Depends(get_current_user)])
 
+# Accepted values of the type parameter, mapped to search_service types
+SEARCH_TYPES = {"notes": "note", "tasks": "task", "events": "event", "projects": "project"}
+
 
 @router.get("", response_model=SearchResult)
 async def search(
     q: str = Query(..., min_length=1),
-    type: str = Query("all", description="Search type: notes, tasks, or all"),
+    type: str = Query("all", description="all, or a comma-separated list of: notes, tasks, events, projects"),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     db: AsyncSession = Depends(get_db),
 ):
-    note_items: list[SearchResultItem] = []
-    task_items: list[TaskSearchResultItem] = []
-    total = 0
+    if type == "all":
+        types = list(SEARCH_TYPES.values())
+    else:
+        requested = [t.strip() for t in type.split(",") if t.strip()]
+        unknown = [t for t in requested if t not in SEARCH_TYPES]
+        if unknown or not requested:
+            raise HTTPException(status_code=400, detail=f"Invalid search type: {type}")
+        types = [SEARCH_TYPES[t] for t in requested]
+
+    try:
+        hits, counts = await search_service.search(db, q, types, limit=limit, offset=offset)
+    except Exception:
+        # Malformed FTS5 query syntax
+        hits, counts = [], {t: 0 for t in types}
 
-    # Search notes via FTS5
-    if type in ("all", "notes"):
-        fts_q = fts5_prefix_query(q)
-        fts_query = text("""
-            SELECT n.id, n.title, n.filepath, snippet(notes_fts, 2, '<mark>', '</mark>', '...', 32) as snippet, rank
-            FROM notes_fts
-            JOIN notes n ON notes_fts.id = n.id
-            WHERE notes_fts MATCH :query
-            ORDER BY rank
-            LIMIT :limit OFFSET :offset
-        """)
-        count_query = text("""
-            SELECT COUNT(*)
-            FROM notes_fts
-            WHERE notes_fts MATCH :query
-        """)
-        try:
-            count_result = await db.execute(count_query, {"query": fts_q})
-            total = count_result.scalar() or 0
-            result = await db.execute(fts_query, {"query": fts_q, "limit": limit, "offset": offset})
-            rows = result.fetchall()
-            note_items = [
-                SearchResultItem(
-                    id=row[0], title=row[1], filepath=row[2],
-                    snippet=row[3] or "", rank=float(row[4]),
-                )
-                for row in rows
-            ]
-        except Exception:
-            pass
+    return SearchResult(
+        results=[
+            SearchResultItem(**{**hit, "snippet": hit["snippet"] or "", "rank": float(hit["rank"])})
+            for hit in hits
+        ],
+        counts=counts,
+        total=sum(counts.values()),
+        query=q,
+    )
 
-    # Search tasks via LIKE on title/description
-    if type in ("all", "tasks"):
-        pattern = f"%{q}%"
-        task_query = (
-            select(Task)
-            .where(or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
-            .order_by(Task.updated_at.desc())
-            .limit(limit)
-            .offset(offset)
-        )
-        task_count_query = (
-            select(func.count())
-            .select_from(Task)
-            .where(or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
-        )
-        try:
-            task_count_result = await db.execute(task_count_query)
-            task_total = task_count_result.scalar() or 0
-            total += task_total
-            task_result = await db.execute(task_query)
-            task_items = [
-                TaskSearchResultItem(
-                    id=t.id, title=t.title, description=t.description or "",
-                    status=t.status, project_id=t.project_id,
-                )
-                for t in task_result.scalars().all()
-            ]
-        except Exception:
-            pass
 
-    return SearchResult(results=note_items, tasks=task_items, total=total, query=q)
+@router.get("/stats", response_model=SearchCacheStats)
+async def search_cache_stats():
+    return SearchCacheStats(**search_service.cache_stats())
@@ -60,6 +60,7 @@ class EventResponse(BaseModel):
 class EventList(BaseModel):
     events: list[EventResponse]
     total: int
+    next_cursor: str | None = None
 
 
 class CalendarSettingsResponse(BaseModel):
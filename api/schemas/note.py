@@ -55,6 +55,7 @@ class NoteResponse(BaseModel):
     linked_events: list[str] = []
     created_at: datetime
     updated_at: datetime
+    unchanged: bool = False  # the save matched the stored note and was skipped
 
     model_config = {"from_attributes": True}
 
@@ -68,6 +69,7 @@ class NoteListItem(BaseModel):
     linked_tasks: list[str] = []
     linked_events: list[str] = []
     preview: str = ""
+    content_length: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -8,23 +10,27 @@ class SearchQuery(BaseModel):
 
 
 class SearchResultItem(BaseModel):
+    type: str  # note, task, event, project
     id: str
     title: str
-    filepath: str
     snippet: str
     rank: float
-
-
-class TaskSearchResultItem(BaseModel):
-    id: str
-    title: str
-    description: str
-    status: str
-    project_id: str
+    project_id: str | None = None
+    status: str | None = None  # tasks and projects
+    start_time: datetime | None = None  # events
 
 
 class SearchResult(BaseModel):
     results: list[SearchResultItem]
-    tasks: list[TaskSearchResultItem] = []
+    counts: dict[str, int] = {}  # matches per type, across all pages
     total: int
     query: str
+
+
+class SearchCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    hit_rate: float
+    generation: int  # bumped by every committed write to searchable data
@@ -0,0 +1,281 @@
+"""Durable queue for background AI work, backed by ``ai_processing_queue``.
+
+Note routes call enqueue_note_ai() inside the request, which writes a
+pending "process_note" row, at most one per note. Saves are debounced on
+the trailing edge: the row's run_after is pushed to AI_DEBOUNCE_SECONDS
+after the latest save, but no later than AI_DEBOUNCE_MAX_DELAY_SECONDS
+after the first, so the AI runs once, on the content the user settled on,
+even during a long editing session. A save that lands while the note's job
+is running cancels that job, as the pending one covers the newer content,
+unless the job has already been put off for the maximum delay.
+run_ai_workers(), started by the lifespan, runs AI_WORKER_CONCURRENCY
+workers that claim the oldest runnable row with a single UPDATE ...
+RETURNING, so two workers never get the same job, and hand it to
+ai_background.process_note_ai().
+
+Failures are retried with exponential backoff (AI_JOB_RETRY_BASE_SECONDS,
+doubling) up to AI_JOB_MAX_ATTEMPTS. A 429 from the provider doesn't use up
+an attempt: the job goes back to the queue for when the provider said to
+return, and ai_service refuses further calls to that provider until then,
+so the workers back off together. Jobs left "processing" by a crashed or
+killed process are put back in the queue once AI_JOB_STALE_SECONDS pass.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from api.database import async_session
+from api.models.settings import AIProcessingQueue, UserSettings
+from api.services import ai_background, ai_service
+
+logger = logging.getLogger(__name__)
+
+JOB_OPERATION = "process_note"
+# Idle workers look for delayed (retry) jobs and stale claims this often
+AI_WORKER_POLL_SECONDS = 5.0
+AI_JOB_RETRY_MAX_SECONDS = 3600.0
+
+_jobs = AIProcessingQueue.__table__
+_wakeup: asyncio.Event | None = None
+# note id -> (job id, max-delay deadline, task) for jobs running in this process
+_running: dict[str, tuple[int, datetime, asyncio.Task]] = {}
+_superseded: set[int] = set()  # running job ids cancelled by a newer save
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)  # SQLite drops the offset
+
+
+def _notify() -> None:
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def enqueue_note_ai(db: AsyncSession, note_id: str) -> bool:
+    """Queue (or push back) background AI processing for a note, and commit.
+
+    Returns False, queueing nothing, when AI or every background operation
+    is switched off.
+    """
+    keys = ["ai_enabled", *ai_background.OPERATION_SETTINGS.values()]
+    result = await db.execute(select(UserSettings.key, UserSettings.value).where(UserSettings.key.in_(keys)))
+    enabled = {key for key, value in result.tuples().all() if (value or "").lower() == "true"}
+    if "ai_enabled" not in enabled or len(enabled) == 1:
+        return False
+
+    now = _now()
+    run_after = now + timedelta(seconds=settings.AI_DEBOUNCE_SECONDS)
+    pending = (await db.execute(
+        select(_jobs.c.id, _jobs.c.created_at, _jobs.c.run_after, _jobs.c.attempts).where(
+            _jobs.c.entity_type == "note", _jobs.c.entity_id == note_id,
+            _jobs.c.operation == JOB_OPERATION, _jobs.c.status == "pending",
+        ).limit(1)
+    )).first()
+    moved = 0
+    if pending is not None:
+        # Reset the quiet-period timer, within the cap counted from the first save
+        new_run_after = min(run_after, _deadline(pending.created_at))
+        if pending.attempts and pending.run_after is not None:
+            new_run_after = max(new_run_after, _as_utc(pending.run_after))  # don't cut a retry backoff short
+        result = await db.execute(
+            update(_jobs).where(_jobs.c.id == pending.id, _jobs.c.status == "pending").values(run_after=new_run_after)
+        )
+        moved = result.rowcount
+    if not moved:  # no pending job, or a worker claimed it just now
+        await db.execute(insert(_jobs).values(
+            entity_type="note", entity_id=note_id, operation=JOB_OPERATION,
+            status="pending", attempts=0, created_at=now, run_after=run_after,
+        ))
+    await db.commit()
+    _cancel_running(note_id)
+    _notify()
+    return True
+
+
+def _deadline(created_at: datetime) -> datetime:
+    return _as_utc(created_at) + timedelta(seconds=settings.AI_DEBOUNCE_MAX_DELAY_SECONDS)
+
+
+def _cancel_running(note_id: str) -> None:
+    """Cancel the note's running job: it's analyzing content that was just replaced.
+
+    A job past its max-delay deadline is left to finish, or a note that is
+    saved more often than it takes to analyze would never be analyzed.
+    """
+    running = _running.get(note_id)
+    if running is not None:
+        job_id, deadline, task = running
+        if _now() < deadline:
+            _superseded.add(job_id)
+            task.cancel()
+
+
+async def claim_job(db: AsyncSession) -> tuple[int, str, int, datetime] | None:
+    """Atomically mark the oldest runnable pending job as processing.
+
+    Returns (id, note id, attempts including this one, created_at), or None.
+    The runnable job is looked up with a plain SELECT first, so polling an
+    empty queue never takes the write lock.
+    """
+    now = _now()
+    job_id = (await db.execute(
+        select(_jobs.c.id)
+        .where(
+            _jobs.c.status == "pending", _jobs.c.operation == JOB_OPERATION,
+            or_(_jobs.c.run_after.is_(None), _jobs.c.run_after <= now),
+        )
+        .order_by(_jobs.c.id)
+        .limit(1)
+    )).scalar()
+    if job_id is None:
+        return None
+    # Still pending: another worker may have claimed it since the SELECT
+    result = await db.execute(
+        update(_jobs)
+        .where(_jobs.c.id == job_id, _jobs.c.status == "pending")
+        .values(status="processing", started_at=now, completed_at=None, attempts=_jobs.c.attempts + 1)
+        .returning(_jobs.c.id, _jobs.c.entity_id, _jobs.c.attempts, _jobs.c.created_at)
+    )
+    row = result.first()
+    await db.commit()
+    return tuple(row) if row else None
+
+
+async def recover_stale_jobs(db: AsyncSession) -> int:
+    """Put jobs claimed more than AI_JOB_STALE_SECONDS ago back in the queue."""
+    cutoff = _now() - timedelta(seconds=settings.AI_JOB_STALE_SECONDS)
+    result = await db.execute(
+        update(_jobs)
+        .where(_jobs.c.status == "processing", _jobs.c.operation == JOB_OPERATION, _jobs.c.started_at < cutoff)
+        .values(status="pending", run_after=None, error_message="Abandoned by a stopped worker; requeued")
+    )
+    await db.commit()
+    if result.rowcount:
+        logger.warning("Requeued %d stale AI jobs", result.rowcount)
+    return result.rowcount
+
+
+async def _set_status(job_id: int, **values) -> None:
+    async with async_session() as db:
+        await db.execute(update(_jobs).where(_jobs.c.id == job_id).values(**values))
+        await db.commit()
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(settings.AI_JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), AI_JOB_RETRY_MAX_SECONDS)
+
+
+async def _run_job(job_id: int, note_id: str, attempts: int) -> float:
+    """Run one claimed job and record the outcome. Returns seconds to pause the worker."""
+    try:
+        async with async_session() as db:
+            status = await ai_background.process_note_ai(db, note_id)
+    except ai_service.RateLimitedError as e:
+        # Not the job's fault: don't count the attempt, come back when allowed
+        await _set_status(
+            job_id, status="pending", attempts=attempts - 1, error_message=str(e),
+            run_after=_now() + timedelta(seconds=e.retry_after),
+        )
+        return e.retry_after
+    except Exception as e:
+        if attempts >= settings.AI_JOB_MAX_ATTEMPTS:
+            logger.exception("AI job %d for note %s failed after %d attempts", job_id, note_id, attempts)
+            await _set_status(job_id, status="failed", error_message=str(e), completed_at=_now())
+        else:
+            delay = _retry_delay(attempts)
+            logger.warning("AI job %d for note %s failed (%s); retrying in %.0fs", job_id, note_id, e, delay)
+            await _set_status(
+                job_id, status="pending", error_message=str(e), run_after=_now() + timedelta(seconds=delay),
+            )
+        return 0.0
+    await _set_status(job_id, status=status, error_message=None, completed_at=_now())
+    return 0.0
+
+
+async def _seconds_to_next_job(db: AsyncSession) -> float:
+    """How long until the earliest delayed job becomes runnable, capped at the poll interval."""
+    result = await db.execute(
+        select(func.min(_jobs.c.run_after)).where(_jobs.c.status == "pending", _jobs.c.operation == JOB_OPERATION)
+    )
+    next_run = result.scalar()
+    if next_run is None:
+        return AI_WORKER_POLL_SECONDS
+    return min(max((_as_utc(next_run) - _now()).total_seconds(), 0.05), AI_WORKER_POLL_SECONDS)
+
+
+async def _run_claimed(job_id: int, note_id: str, attempts: int, created_at: datetime) -> float:
+    """_run_job() in a task a newer save of the note can cancel."""
+    task = asyncio.create_task(_run_job(job_id, note_id, attempts))
+    _running[note_id] = (job_id, _deadline(created_at), task)
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if job_id in _superseded and not asyncio.current_task().cancelling():
+            await _set_status(job_id, status="cancelled", error_message="Superseded by a newer save",
+                              completed_at=_now())
+            return 0.0
+        # Shutting down mid-job: hand it back rather than wait for it to go stale
+        await _set_status(job_id, status="pending", attempts=attempts - 1)
+        raise
+    finally:
+        _superseded.discard(job_id)
+        if _running.get(note_id, (None,))[0] == job_id:
+            del _running[note_id]
+
+
+async def _worker(stop_event: asyncio.Event) -> None:
+    while not stop_event.is_set():
+        pause = 0.0
+        _wakeup.clear()  # before claiming, so a job queued after the claim still wakes us
+        try:
+            async with async_session() as db:
+                job = await claim_job(db)
+                if job is None:
+                    pause = await _seconds_to_next_job(db)
+            if job is not None:
+                pause = await _run_claimed(*job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("AI worker error")
+            pause = AI_WORKER_POLL_SECONDS
+
+        if pause:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=pause)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _recover_periodically(stop_event: asyncio.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            async with async_session() as db:
+                await recover_stale_jobs(db)
+        except Exception:
+            logger.exception("Stale AI job recovery failed")
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=settings.AI_JOB_STALE_SECONDS / 2)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_ai_workers(stop_event: asyncio.Event) -> None:
+    """Process queued AI jobs until *stop_event* is set."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    tasks = [asyncio.create_task(_recover_periodically(stop_event))]
+    tasks += [asyncio.create_task(_worker(stop_event)) for _ in range(max(1, settings.AI_WORKER_CONCURRENCY))]
+    await stop_event.wait()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
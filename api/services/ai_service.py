@@ -1,14 +1,26 @@
+import asyncio
+import hashlib
+import importlib.util
 import json
 import logging
 import re
+import time
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timedelta, timezone
 
 import httpx
-from sqlalchemy import select
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.models.settings import UserSettings
+from api.config import settings
+from api.database import SerializedWriteSession, async_session
+from api.models.settings import AIResponseCache, UserSettings
 from api.utils.encryption import decrypt_value
 from api.services.ai_prompts import (
+    ANALYZE_NOTE_FIELDS,
+    PROMPTS_VERSION,
+    SYSTEM_ANALYZE_NOTE,
     SYSTEM_AUTO_TAG,
     SYSTEM_CHAT,
     SYSTEM_DAILY_SUGGESTIONS,
@@ -18,10 +30,47 @@ from api.services.ai_prompts import (
 
 logger = logging.getLogger(__name__)
 
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
-NVIDIA_URL = "https://integrate.api.nvidia.com/v1/chat/completions"
 MAX_CONTENT_CHARS = 8000
 
+PROVIDER_NAMES = {"openrouter": "OpenRouter", "nvidia": "NVIDIA"}
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]");
+# without it the pooled clients keep HTTP/1.1 connections alive instead
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# One pooled client per provider, so calls reuse warm TCP/TLS connections
+_clients: dict[str, httpx.AsyncClient] = {}
+
+# Back-off after a 429 that didn't say how long to wait (no Retry-After)
+RATE_LIMIT_DEFAULT_SECONDS = 30.0
+
+# provider -> time.monotonic() until which it asked us to stop sending (429)
+_rate_limited_until: dict[str, float] = {}
+
+_cache = AIResponseCache.__table__
+# operation -> response cache lookups since startup
+_cache_hits: dict[str, int] = {}
+_cache_misses: dict[str, int] = {}
+# Cache writes deferred until the caller's write transaction ended
+_cache_write_tasks: set[asyncio.Task] = set()
+
+
+class AIProviderError(RuntimeError):
+    """A provider call failed: network error, error status or an unusable reply."""
+
+
+class RateLimitedError(AIProviderError):
+    """The provider answered 429. No calls are sent to it for *retry_after* seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def rate_limit_remaining(provider: str) -> float:
+    """Seconds left before *provider* may be called again after a 429 (0 if it may)."""
+    return max(0.0, _rate_limited_until.get(provider, 0.0) - time.monotonic())
+
 
 async def _get_config(db: AsyncSession) -> dict:
     """Read AI config from user_settings table."""
@@ -55,6 +104,80 @@ async def _get_config(db: AsyncSession) -> dict:
     }
 
 
+def _provider_url(provider: str) -> str:
+    return settings.AI_NVIDIA_URL if provider == "nvidia" else settings.AI_OPENROUTER_URL
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_HTTP2 and settings.AI_HTTP2,
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=settings.AI_HTTP_KEEPALIVE_SECONDS,
+        ),
+    )
+
+
+def open_http_clients() -> None:
+    """Create the provider clients. Called from the app lifespan."""
+    for provider in PROVIDER_NAMES:
+        if provider not in _clients:
+            _clients[provider] = _new_client()
+
+
+async def close_http_clients() -> None:
+    """Close the provider clients and their pooled connections."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def _client(provider: str) -> httpx.AsyncClient:
+    # Created on first use too, for callers running outside the app (scripts)
+    if provider not in _clients:
+        _clients[provider] = _new_client()
+    return _clients[provider]
+
+
+def _request_headers(provider: str, api_key: str) -> dict:
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    if provider == "openrouter":
+        headers["HTTP-Referer"] = "http://localhost:8000"
+        headers["X-Title"] = "Sundial"
+    return headers
+
+
+async def _wait_for_rate_limit(provider: str) -> None:
+    """Sleep out a short back-off; raise RateLimitedError for one longer than AI_RATE_LIMIT_MAX_WAIT_SECONDS."""
+    remaining = rate_limit_remaining(provider)
+    if remaining > settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS:
+        name = PROVIDER_NAMES.get(provider, provider)
+        raise RateLimitedError(f"Rate limited by {name}. Please try again later.", remaining)
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+
+
+def _check_status(provider: str, resp: httpx.Response) -> None:
+    name = PROVIDER_NAMES.get(provider, provider)
+    if resp.status_code == 429:
+        try:
+            retry_after = float(resp.headers.get("Retry-After", ""))
+        except ValueError:
+            retry_after = RATE_LIMIT_DEFAULT_SECONDS  # missing, or an HTTP date
+        _rate_limited_until[provider] = time.monotonic() + retry_after
+        raise RateLimitedError(f"Rate limited by {name}. Please try again later.", retry_after)
+    if resp.status_code == 401:
+        raise AIProviderError(f"Invalid {name} API key. Check your settings.")
+    if resp.status_code >= 400:
+        raise AIProviderError(f"{name} returned HTTP {resp.status_code}.")
+
+
 async def _call_openrouter(
     api_key: str,
     model: str,
@@ -63,35 +186,7 @@ async def _call_openrouter(
     max_tokens: int = 1024,
 ) -> str:
     """Call OpenRouter chat completions API. Returns the assistant message content."""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "http://localhost:8000",
-        "X-Title": "Sundial",
-    }
-    payload = {
-        "model": model,
-        "messages": messages,
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-    }
-
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(OPENROUTER_URL, json=payload, headers=headers)
-
-        if resp.status_code == 429:
-            raise RuntimeError("Rate limited by OpenRouter. Please try again later.")
-        if resp.status_code == 401:
-            raise RuntimeError("Invalid OpenRouter API key. Check your settings.")
-
-        resp.raise_for_status()
-        data = resp.json()
-
-    choices = data.get("choices", [])
-    if not choices:
-        raise RuntimeError("No response from AI model.")
-
-    return choices[0]["message"]["content"]
+    return await _complete("openrouter", api_key, model, messages, temperature, max_tokens)
 
 
 async def _call_nvidia(
@@ -102,33 +197,51 @@ async def _call_nvidia(
     max_tokens: int = 1024,
 ) -> str:
     """Call NVIDIA chat completions API. Returns the assistant message content."""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+    return await _complete("nvidia", api_key, model, messages, temperature, max_tokens)
+
+
+async def _complete(
+    provider: str,
+    api_key: str,
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """POST a chat completion on the provider's pooled client.
+
+    A 429 asking for a short back-off is waited out and the call retried;
+    a longer one raises RateLimitedError, as does calling while it lasts.
+    Other failures raise AIProviderError.
+    """
     payload = {
         "model": model,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
+    while True:
+        await _wait_for_rate_limit(provider)
+        try:
+            resp = await _client(provider).post(
+                _provider_url(provider), json=payload, headers=_request_headers(provider, api_key)
+            )
+        except httpx.HTTPError as e:
+            raise AIProviderError(f"Could not reach {PROVIDER_NAMES.get(provider, provider)}: {e}") from e
+        try:
+            _check_status(provider, resp)
+            break
+        except RateLimitedError as e:
+            if e.retry_after > settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS:
+                raise
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(NVIDIA_URL, json=payload, headers=headers)
-
-        if resp.status_code == 429:
-            raise RuntimeError("Rate limited by NVIDIA. Please try again later.")
-        if resp.status_code == 401:
-            raise RuntimeError("Invalid NVIDIA API key. Check your settings.")
-
-        resp.raise_for_status()
-        data = resp.json()
-
-    choices = data.get("choices", [])
-    if not choices:
-        raise RuntimeError("No response from AI model.")
-
-    return choices[0]["message"]["content"]
+    try:
+        choices = resp.json().get("choices", [])
+        if not choices:
+            raise AIProviderError("No response from AI model.")
+        return choices[0]["message"]["content"]
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise AIProviderError("Malformed response from AI model.") from e
 
 
 async def _call_provider(
@@ -145,6 +258,55 @@ async def _call_provider(
     return await _call_openrouter(api_key, model, messages, temperature, max_tokens)
 
 
+async def _stream_provider(
+    provider: str,
+    api_key: str,
+    model: str,
+    messages: list[dict],
+    temperature: float = 0.3,
+    max_tokens: int = 1024,
+) -> AsyncIterator[str]:
+    """Stream a chat completion, yielding content deltas as the provider sends them.
+
+    Both providers speak the OpenAI streaming format: SSE ``data:`` lines
+    carrying ``choices[0].delta.content``, ended by ``data: [DONE]``.
+    Failures raise AIProviderError, as in _complete().
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True,
+    }
+    await _wait_for_rate_limit(provider)
+    try:
+        async with _client(provider).stream(
+            "POST", _provider_url(provider), json=payload, headers=_request_headers(provider, api_key)
+        ) as resp:
+            if resp.status_code >= 400:
+                await resp.aread()
+            _check_status(provider, resp)
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue  # blank separators and ": keep-alive" comments
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError as e:
+                    raise AIProviderError("Malformed response from AI model.") from e
+                if chunk.get("error"):
+                    raise AIProviderError(chunk["error"].get("message") or "AI provider error.")
+                for choice in chunk.get("choices", []):
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+    except httpx.HTTPError as e:
+        raise AIProviderError(f"Could not reach {PROVIDER_NAMES.get(provider, provider)}: {e}") from e
+
+
 def _parse_json_response(text: str) -> any:
     """Parse JSON from LLM response, stripping markdown code block wrappers."""
     text = text.strip()
@@ -155,24 +317,139 @@ def _parse_json_response(text: str) -> any:
     return json.loads(text)
 
 
+def _cache_key(operation: str, config: dict, messages: list[dict], temperature: float, max_tokens: int) -> str:
+    request = {
+        "operation": operation, "provider": config["provider"], "model": config["model"],
+        "prompts_version": PROMPTS_VERSION, "temperature": temperature, "max_tokens": max_tokens,
+        "messages": messages,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+async def _write_cache(db: AsyncSession, *statements) -> None:
+    """Run response cache writes in a transaction of their own.
+
+    While *db* is in the middle of a write it holds the write lock (see
+    api.database), which the cache's session would wait on, so the writes
+    are queued on *db* and run once its transaction ends.
+    """
+    if db.sync_session.info.get("holds_write_lock"):
+        db.sync_session.info.setdefault("ai_cache_writes", []).extend(statements)
+        return
+    await _run_cache_writes(statements)
+
+
+@event.listens_for(SerializedWriteSession, "after_transaction_end")
+def _write_cache_after_transaction(session, transaction):
+    if transaction.parent is not None or "ai_cache_writes" not in session.info:
+        return
+    statements = session.info.pop("ai_cache_writes")
+    # Registered after api.database's listener, so the write lock is free by now
+    task = asyncio.get_running_loop().create_task(_run_cache_writes(statements))
+    _cache_write_tasks.add(task)
+    task.add_done_callback(_cache_write_tasks.discard)
+
+
+async def _run_cache_writes(statements: list) -> None:
+    try:
+        async with async_session() as session:
+            for statement in statements:
+                await session.execute(statement)
+            await session.commit()
+    except Exception:
+        logger.exception("Could not update the AI response cache")
+
+
+async def _cached_call(
+    db: AsyncSession,
+    operation: str,
+    config: dict,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+    check: Callable[[object], bool],
+) -> object:
+    """_call_provider() through the response cache; returns the reply parsed as JSON.
+
+    An identical request (operation, model, PROMPTS_VERSION and messages)
+    made within AI_CACHE_TTL_SECONDS is answered from the cache. A reply
+    that doesn't parse or fails *check* raises ValueError and isn't cached.
+    """
+    enabled = settings.AI_CACHE_MAX_ENTRIES > 0
+    key = _cache_key(operation, config, messages, temperature, max_tokens)
+    now = datetime.now(timezone.utc)
+    expired = now - timedelta(seconds=settings.AI_CACHE_TTL_SECONDS)
+    if enabled:
+        result = await db.execute(select(_cache.c.response).where(_cache.c.key == key, _cache.c.created_at >= expired))
+        cached = result.scalar_one_or_none()
+        if cached is not None:
+            _cache_hits[operation] = _cache_hits.get(operation, 0) + 1
+            await _write_cache(db, update(_cache).where(_cache.c.key == key).values(
+                hits=_cache.c.hits + 1, last_used_at=now,
+            ))
+            return _parse_json_response(cached)
+        _cache_misses[operation] = _cache_misses.get(operation, 0) + 1
+
+    response = await _call_provider(
+        config["provider"], config["api_key"], config["model"], messages,
+        temperature=temperature, max_tokens=max_tokens,
+    )
+    parsed = _parse_json_response(response)
+    if not check(parsed):
+        raise ValueError("Unexpected JSON in AI reply")
+    if enabled:
+        values = {"response": response, "hits": 0, "created_at": now, "last_used_at": now}
+        await _write_cache(
+            db,
+            sqlite_insert(_cache).values(key=key, operation=operation, model=config["model"], **values)
+            .on_conflict_do_update(index_elements=[_cache.c.key], set_=values),
+            *cache_eviction_statements(expired),
+        )
+    return parsed
+
+
+def cache_eviction_statements(expired: datetime) -> list:
+    """Deletes for cache entries created before *expired*, then for those past AI_CACHE_MAX_ENTRIES."""
+    least_recent = select(_cache.c.key).order_by(_cache.c.last_used_at.desc()).offset(settings.AI_CACHE_MAX_ENTRIES)
+    return [
+        delete(_cache).where(_cache.c.created_at < expired),
+        delete(_cache).where(_cache.c.key.in_(least_recent)),
+    ]
+
+
+async def cache_stats(db: AsyncSession) -> dict:
+    """Size of the AI response cache, and its hits and misses since startup."""
+    result = await db.execute(select(func.count(), func.coalesce(func.sum(_cache.c.hits), 0)).select_from(_cache))
+    entries, entry_hits = result.one()
+    hits, misses = sum(_cache_hits.values()), sum(_cache_misses.values())
+    return {
+        "entries": entries,
+        "max_entries": settings.AI_CACHE_MAX_ENTRIES,
+        "ttl_seconds": settings.AI_CACHE_TTL_SECONDS,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "entry_hits": entry_hits,
+        "operations": {
+            op: {"hits": _cache_hits.get(op, 0), "misses": _cache_misses.get(op, 0)}
+            for op in sorted(_cache_hits.keys() | _cache_misses.keys())
+        },
+    }
+
+
 def _truncate(content: str) -> str:
     if len(content) > MAX_CONTENT_CHARS:
         return content[:MAX_CONTENT_CHARS] + "\n...(truncated)"
     return content
 
 
-async def chat(
-    message: str,
-    note_id: str | None,
-    context: str | None,
-    db: AsyncSession,
-) -> dict:
-    """Chat completion with optional note context."""
+async def _chat_setup(message: str, context: str | None, db: AsyncSession) -> tuple[dict, list[dict]]:
+    """AI config and the message list for a chat turn. Raises ValueError if AI is unavailable."""
     config = await _get_config(db)
     if not config["enabled"]:
-        return {"error": "AI is disabled. Enable it in Settings."}
+        raise ValueError("AI is disabled. Enable it in Settings.")
     if not config["api_key"]:
-        return {"error": "API key not configured. Add it in Settings > AI."}
+        raise ValueError("API key not configured. Add it in Settings > AI.")
 
     messages = [{"role": "system", "content": SYSTEM_CHAT}]
 
@@ -180,6 +457,20 @@ async def chat(
         messages.append({"role": "system", "content": f"Note context:\n{_truncate(context)}"})
 
     messages.append({"role": "user", "content": message})
+    return config, messages
+
+
+async def chat(
+    message: str,
+    note_id: str | None,
+    context: str | None,
+    db: AsyncSession,
+) -> dict:
+    """Chat completion with optional note context."""
+    try:
+        config, messages = await _chat_setup(message, context, db)
+    except ValueError as e:
+        return {"error": str(e)}
 
     try:
         response = await _call_provider(
@@ -192,6 +483,45 @@ async def chat(
         return {"error": str(e)}
 
 
+async def chat_stream(
+    message: str,
+    note_id: str | None,
+    context: str | None,
+    db: AsyncSession,
+) -> AsyncIterator[dict]:
+    """Streaming chat(): returns an iterator of {"delta"} events, then {"done"} or {"error"}.
+
+    Settings are read before returning, so the iterator doesn't need *db*
+    and can outlive the request's session.
+    """
+    try:
+        config, messages = await _chat_setup(message, context, db)
+    except ValueError as e:
+        error = str(e)
+
+        async def failed():
+            yield {"error": error}
+        return failed()
+
+    async def events():
+        try:
+            async for delta in _stream_provider(
+                config["provider"], config["api_key"], config["model"], messages,
+                temperature=0.5, max_tokens=2048,
+            ):
+                yield {"delta": delta}
+        except Exception as e:
+            logger.exception("Chat stream failed")
+            yield {"error": str(e)}
+            return
+        yield {"done": True}
+    return events()
+
+
+# The note operations below raise AIProviderError when the provider call
+# fails, so the AI job queue can retry the note later; a reply that doesn't
+# parse counts as no suggestions.
+
 async def auto_tag(
     content: str,
     existing_tags: list[str],
@@ -209,15 +539,13 @@ async def auto_tag(
     ]
 
     try:
-        response = await _call_provider(
-            config["provider"], config["api_key"], config["model"], messages,
-            temperature=0.2, max_tokens=256,
+        tags = await _cached_call(
+            db, "auto_tag", config, messages, temperature=0.2, max_tokens=256,
+            check=lambda reply: isinstance(reply, list),
         )
-        tags = _parse_json_response(response)
-        if isinstance(tags, list):
-            return [str(t).strip().lower() for t in tags if t]
-    except Exception:
-        logger.exception("Auto-tag failed")
+        return [str(t).strip().lower() for t in tags if t]
+    except ValueError:
+        logger.warning("Auto-tag returned unparseable output")
 
     return []
 
@@ -239,15 +567,12 @@ async def extract_tasks(
     ]
 
     try:
-        response = await _call_provider(
-            config["provider"], config["api_key"], config["model"], messages,
-            temperature=0.2, max_tokens=512,
+        return await _cached_call(
+            db, "extract_tasks", config, messages, temperature=0.2, max_tokens=512,
+            check=lambda reply: isinstance(reply, list),
         )
-        tasks = _parse_json_response(response)
-        if isinstance(tasks, list):
-            return tasks
-    except Exception:
-        logger.exception("Extract tasks failed")
+    except ValueError:
+        logger.warning("Extract tasks returned unparseable output")
 
     return []
 
@@ -273,19 +598,67 @@ async def link_events(
     ]
 
     try:
-        response = await _call_provider(
-            config["provider"], config["api_key"], config["model"], messages,
-            temperature=0.1, max_tokens=256,
+        ids = await _cached_call(
+            db, "link_events", config, messages, temperature=0.1, max_tokens=256,
+            check=lambda reply: isinstance(reply, list),
         )
-        ids = _parse_json_response(response)
-        if isinstance(ids, list):
-            return [str(i) for i in ids]
-    except Exception:
-        logger.exception("Link events failed")
+        return [str(i) for i in ids]
+    except ValueError:
+        logger.warning("Link events returned unparseable output")
 
     return []
 
 
+async def analyze_note(
+    content: str,
+    note_title: str,
+    operations: set[str],
+    existing_tags: list[str],
+    events: list[dict],
+    db: AsyncSession,
+) -> dict | None:
+    """auto_tag, extract_tasks and link_events for one note in a single call.
+
+    *operations* names the ones to run. Returns {"tags", "tasks",
+    "event_ids"} with the results of the requested operations (the rest are
+    empty lists), or None if the reply wasn't the expected JSON, so the
+    caller can fall back to the separate calls.
+    """
+    config = await _get_config(db)
+    if not config["enabled"] or not config["api_key"]:
+        return None
+
+    fields = [ANALYZE_NOTE_FIELDS[op] for op in ANALYZE_NOTE_FIELDS if op in operations]
+    context_parts = [f"Note title: {note_title}"]
+    if "auto_tag" in operations:
+        context_parts.append(f"Existing tags in system: {json.dumps(existing_tags)}")
+    if "link_events" in operations:
+        context_parts.append(f"Calendar events:\n{json.dumps(events, default=str)}")
+    context_parts.append(f"Note content:\n{_truncate(content)}")
+    messages = [
+        {"role": "system", "content": "\n".join([SYSTEM_ANALYZE_NOTE, *fields])},
+        {"role": "user", "content": "\n\n".join(context_parts)},
+    ]
+
+    keys = {"auto_tag": "tags", "extract_tasks": "tasks", "link_events": "event_ids"}
+    try:
+        result = await _cached_call(
+            db, "analyze_note", config, messages, temperature=0.2, max_tokens=1024,
+            check=lambda reply: isinstance(reply, dict) and all(
+                isinstance(reply.get(keys[op]), list) for op in operations
+            ),
+        )
+    except ValueError:
+        logger.warning("Combined note analysis returned unparseable or unexpected output")
+        return None
+
+    return {
+        "tags": [str(t).strip().lower() for t in result.get("tags", []) if t] if "auto_tag" in operations else [],
+        "tasks": [t for t in result.get("tasks", []) if isinstance(t, dict)] if "extract_tasks" in operations else [],
+        "event_ids": [str(i) for i in result.get("event_ids", [])] if "link_events" in operations else [],
+    }
+
+
 async def daily_suggestions(
     events: list[dict],
     tasks: list[dict],
@@ -319,17 +692,15 @@ async def daily_suggestions(
     ]
 
     try:
-        response = await _call_provider(
-            config["provider"], config["api_key"], config["model"], messages,
-            temperature=0.4, max_tokens=512,
+        result = await _cached_call(
+            db, "daily_suggestions", config, messages, temperature=0.4, max_tokens=512,
+            check=lambda reply: isinstance(reply, dict),
         )
-        result = _parse_json_response(response)
-        if isinstance(result, dict):
-            return {
-                "summary": result.get("summary", ""),
-                "priorities": result.get("priorities", []),
-                "connections": result.get("connections", []),
-            }
+        return {
+            "summary": result.get("summary", ""),
+            "priorities": result.get("priorities", []),
+            "connections": result.get("connections", []),
+        }
     except Exception:
         logger.exception("Daily suggestions failed")
 
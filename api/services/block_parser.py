@@ -18,6 +18,7 @@ If content has no block delimiters, it is treated as a single markdown block.
 
 from __future__ import annotations
 
+import hashlib
 import re
 import uuid
 
@@ -171,3 +172,15 @@ def extract_markdown_text(content: str) -> str:
     blocks = parse_blocks(content)
     md_parts = [b["content"] for b in blocks if b["type"] == "md" and b["content"]]
     return "\n\n".join(md_parts)
+
+
+def content_hash(content: str | None) -> str:
+    """SHA-256 of note content, stored in Note.content_hash to detect no-op saves."""
+    return hashlib.sha256((content or "").encode()).hexdigest()
+
+
+def build_preview(content: str | None, length: int = 200) -> str:
+    """Short markdown-only preview of note content, stored in Note.preview."""
+    if not content:
+        return ""
+    return extract_markdown_text(content)[:length].strip()
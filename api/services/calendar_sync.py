@@ -8,10 +8,18 @@ import caldav
 from icalendar import Calendar as iCalendar, Event as iEvent
 
 from api.models.calendar import CalendarEvent
+from api.services import occurrence_index
 
 logger = logging.getLogger(__name__)
 
 
+def _as_naive_utc(dt: datetime | None) -> datetime | None:
+    """Normalize to naive UTC so stored and freshly parsed times compare equal."""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 def _resolve_caldav_url(url: str, username: str, password: str) -> str:
     """Follow server redirects to discover the actual CalDAV endpoint.
 
@@ -392,6 +400,10 @@ class CalDAVSyncService:
         existing = result.scalar_one_or_none()
 
         if existing:
+            if (existing.rrule != rrule_str
+                    or existing.original_timezone != master_fields.get("original_timezone")
+                    or _as_naive_utc(existing.start_time) != _as_naive_utc(master_fields["start_time"])):
+                await occurrence_index.invalidate(db, existing)
             existing.title = master_fields["summary"]
             existing.description = master_fields["description"]
             existing.location = master_fields["location"]
@@ -1,12 +1,20 @@
+import asyncio
+import logging
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
+from typing import Callable
 
 import frontmatter
+import yaml
 
 from api.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 def _workspace_path() -> Path:
     return Path(settings.WORKSPACE_DIR).resolve()
@@ -73,8 +81,19 @@ def write_note_file(
 
     full_path = _workspace_path() / filepath
     ensure_dir(filepath)
-    with open(full_path, "w", encoding="utf-8") as f:
-        f.write(frontmatter.dumps(post))
+    # Write beside the target and rename over it, so a crash leaves either
+    # the old file or the new one, never a truncated mix
+    tmp_path = full_path.with_name(f".{full_path.name}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(frontmatter.dumps(post))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, full_path)
+        _own_writes[filepath] = full_path.stat().st_mtime_ns
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
 
 def read_note_file(filepath: str) -> dict | None:
@@ -91,8 +110,63 @@ def read_note_file(filepath: str) -> dict | None:
     }
 
 
+def _frontmatter_datetime(value) -> datetime | None:
+    """YAML already turns most ISO timestamps into datetimes; accept either."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class _LibYAMLHandler(frontmatter.YAMLHandler):
+    """YAML frontmatter through libyaml's C loader when PyYAML was built with it."""
+
+    def load(self, fm: str, **kwargs):
+        kwargs.setdefault("Loader", getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+        return super().load(fm, **kwargs)
+
+
+_yaml_handler = _LibYAMLHandler()
+
+
+def parse_note_file(full_path: str) -> dict:
+    """Parse a note file into the values a notes row is built from.
+
+    Used by reindexing, which runs it in worker processes, so it only
+    returns plain data. Raises OSError or ValueError for unreadable files.
+    """
+    from api.services.block_parser import build_preview, content_hash
+    from api.services.link_parser import parse_links
+
+    with open(full_path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    # Files without frontmatter are parsed as all content
+    metadata, content = frontmatter.parse(raw, handler=_yaml_handler)
+    mtime = datetime.fromtimestamp(os.stat(full_path).st_mtime, timezone.utc)
+    tags = metadata.get("tags") or []
+    tag_names = sorted({str(t).strip().lower() for t in (tags if isinstance(tags, list) else [tags])} - {""})
+    return {
+        "id": str(metadata["id"]) if metadata.get("id") else None,
+        "title": str(metadata.get("title") or Path(full_path).stem),
+        "content": content,
+        "content_hash": content_hash(content),
+        "preview": build_preview(content),
+        "tags": tag_names,
+        "project_id": str(metadata["project_id"]) if metadata.get("project_id") else None,
+        "created_at": _frontmatter_datetime(metadata.get("created")) or mtime,
+        "updated_at": _frontmatter_datetime(metadata.get("updated")) or mtime,
+        "mtime": mtime,
+        "links": list({(link["identifier"], link["link_type"]): None for link in parse_links(content)}),
+    }
+
+
 def delete_note_file(filepath: str) -> bool:
     full_path = _workspace_path() / filepath
+    _own_writes.pop(filepath, None)
     if full_path.exists():
         full_path.unlink()
         # Clean up empty date directories
@@ -111,3 +185,85 @@ def list_note_files() -> list[str]:
         str(p.relative_to(_workspace_path()))
         for p in notes_dir.rglob("*.md")
     ]
+
+
+# --- Background writer ---
+#
+# Request handlers queue note file writes instead of doing disk I/O and YAML
+# serialization on the event loop. Operations run on one dedicated thread, so
+# they are serialized (and ordered per filepath). A path's operation waits
+# NOTE_WRITE_COALESCE_MS before it is handed to the thread; anything queued
+# for the same path meanwhile replaces it, so a burst of autosaves writes the
+# file once. Anything that reads note files from disk (exports, restores,
+# reindexing) must await flush_note_writes() first, and the note watcher
+# uses is_own_write() to tell these writes from external edits.
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="note-writer")
+_pending: dict[str, Callable[[], object]] = {}  # filepath -> latest queued operation
+_timers: dict[str, asyncio.TimerHandle] = {}
+_in_flight: set[asyncio.Future] = set()
+_running: dict[str, int] = {}  # filepath -> operations handed to the thread, not yet done
+_own_writes: dict[str, int] = {}  # filepath -> st_mtime_ns of the last file we wrote
+
+
+def _queue(filepath: str, operation: Callable[[], object]) -> None:
+    if filepath not in _pending:
+        _timers[filepath] = asyncio.get_running_loop().call_later(
+            settings.NOTE_WRITE_COALESCE_MS / 1000, _dispatch, filepath
+        )
+    _pending[filepath] = operation
+
+
+def _dispatch(filepath: str) -> None:
+    _timers.pop(filepath, None)
+    operation = _pending.pop(filepath, None)
+    if operation is None:
+        return
+    future = asyncio.get_running_loop().run_in_executor(_writer, operation)
+    _running[filepath] = _running.get(filepath, 0) + 1
+    _in_flight.add(future)
+    future.add_done_callback(partial(_operation_done, filepath))
+
+
+def _operation_done(filepath: str, future: asyncio.Future) -> None:
+    _in_flight.discard(future)
+    if _running[filepath] > 1:
+        _running[filepath] -= 1
+    else:
+        del _running[filepath]
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Writing note file %s failed", filepath, exc_info=future.exception())
+
+
+def queue_note_write(filepath: str, **kwargs) -> None:
+    """Queue write_note_file(filepath, **kwargs) on the background writer."""
+    _queue(filepath, partial(write_note_file, filepath, **kwargs))
+
+
+def queue_note_delete(filepath: str) -> None:
+    """Queue delete_note_file(filepath) on the background writer."""
+    _queue(filepath, partial(delete_note_file, filepath))
+
+
+async def flush_note_writes() -> None:
+    """Start every queued operation now and wait until all have finished."""
+    for filepath, timer in list(_timers.items()):
+        timer.cancel()
+        _dispatch(filepath)
+    if _in_flight:
+        await asyncio.gather(*_in_flight, return_exceptions=True)
+
+
+def is_own_write(filepath: str) -> bool:
+    """Whether the file's current state comes from (or is about to be replaced by) this process.
+
+    True while an operation for the path is queued or running, since the
+    database is then ahead of the file, and when the file still has the
+    mtime of our last write.
+    """
+    if filepath in _pending or filepath in _running:
+        return True
+    try:
+        return _own_writes.get(filepath) == (_workspace_path() / filepath).stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
@@ -1,16 +1,24 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import delete, select, func, text
+from sqlalchemy import delete, select, func, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload
 
 from api.models.note import Note, NoteLink, NoteTag, Tag
-from api.services.file_service import build_filepath, delete_note_file, write_note_file
+from api.services.block_parser import build_preview, content_hash
+from api.services.file_service import build_filepath, queue_note_delete, queue_note_write
 from api.services.link_parser import parse_links
 
 
 import re
 
+# Columns list views need. Everything except the full content, which is only
+# loaded when a single note is fetched.
+NOTE_SUMMARY_COLUMNS = (
+    Note.id, Note.title, Note.filepath, Note.project_id, Note.is_archived,
+    Note.preview, Note.content_length, Note.created_at, Note.updated_at,
+)
+
 
 def fts5_prefix_query(raw: str) -> str:
     """Convert a user search string into an FTS5 prefix query.
@@ -27,28 +35,6 @@ def fts5_prefix_query(raw: str) -> str:
     return " ".join(f"{t}*" for t in clean)
 
 
-# --- FTS5 manual sync helpers ---
-
-async def _fts_insert(db: AsyncSession, note_id: str, title: str, content: str, tags: list[str]) -> None:
-    tags_str = " ".join(tags) if tags else ""
-    await db.execute(
-        text("INSERT INTO notes_fts(id, title, content, tags) VALUES (:id, :title, :content, :tags)"),
-        {"id": note_id, "title": title, "content": content, "tags": tags_str},
-    )
-
-
-async def _fts_update(db: AsyncSession, note_id: str, title: str, content: str, tags: list[str]) -> None:
-    await _fts_delete(db, note_id)
-    await _fts_insert(db, note_id, title, content, tags)
-
-
-async def _fts_delete(db: AsyncSession, note_id: str) -> None:
-    await db.execute(
-        text("DELETE FROM notes_fts WHERE id = :id"),
-        {"id": note_id},
-    )
-
-
 # --- Tag helpers ---
 
 async def _get_or_create_tags(db: AsyncSession, tag_names: list[str]) -> list[Tag]:
@@ -67,6 +53,23 @@ async def _get_or_create_tags(db: AsyncSession, tag_names: list[str]) -> list[Ta
     return tags
 
 
+async def refresh_tags_text(db: AsyncSession, note_id: str) -> None:
+    """Recompute a note's denormalized tags_text from note_tags.
+
+    notes_fts indexes this column, so call it after any change to a note's
+    tags. Does not bump updated_at or commit.
+    """
+    result = await db.execute(
+        select(Tag.name).join(NoteTag).where(NoteTag.note_id == note_id).order_by(Tag.name)
+    )
+    await db.execute(
+        update(Note)
+        .where(Note.id == note_id)
+        .values(tags_text=" ".join(result.scalars().all()), updated_at=Note.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
 async def _sync_note_tags(db: AsyncSession, note_id: str, tag_names: list[str]) -> None:
     """Replace all tags for a note using explicit junction table operations."""
     # Get current tag IDs before removing associations
@@ -88,6 +91,8 @@ async def _sync_note_tags(db: AsyncSession, note_id: str, tag_names: list[str])
         if count_result.scalar() == 0:
             await db.execute(delete(Tag).where(Tag.id == tag_id))
 
+    await refresh_tags_text(db, note_id)
+
 
 # --- CRUD ---
 
@@ -106,20 +111,28 @@ async def create_note(db: AsyncSession, title: str, content: str = "", tags: lis
         filepath = base_filepath[:-3] + f"-{suffix}.md"
         suffix += 1
 
-    note = Note(title=title, filepath=filepath, content=content, project_id=project_id, created_at=now, updated_at=now)
+    note = Note(
+        title=title, filepath=filepath, content=content,
+        preview=build_preview(content), content_length=len(content), content_hash=content_hash(content),
+        project_id=project_id, created_at=now, updated_at=now,
+    )
     db.add(note)
     await db.flush()
 
     if tags:
         await _sync_note_tags(db, note.id, tags)
 
-    # Parse and store wiki-links
+    # Parse and store wiki-links, and resolve existing [[title]] links to this note
     await _update_links(db, note, content)
+    await _resolve_dangling_links(db, [title])
+
+    note_id = note.id
+    await db.commit()
 
     # Write markdown file
-    write_note_file(
-        filepath=filepath,
-        note_id=note.id,
+    queue_note_write(
+        filepath,
+        note_id=note_id,
         title=title,
         content=content,
         created_at=now,
@@ -128,13 +141,8 @@ async def create_note(db: AsyncSession, title: str, content: str = "", tags: lis
         project_id=project_id,
     )
 
-    # Update FTS index
-    await _fts_insert(db, note.id, title, content, tags or [])
-
-    await db.commit()
-
     # Re-fetch with eager-loaded tags
-    return await get_note(db, note.id)
+    return await get_note(db, note_id)
 
 
 async def get_note(db: AsyncSession, note_id: str) -> Note | None:
@@ -175,14 +183,17 @@ async def list_notes(
         if not fts_q:
             return [], 0
         fts_result = await db.execute(
-            text("SELECT id FROM notes_fts WHERE notes_fts MATCH :query ORDER BY rank LIMIT 500"),
+            text("""
+                SELECT n.id FROM notes_fts JOIN notes n ON n.rowid = notes_fts.rowid
+                WHERE notes_fts MATCH :query ORDER BY rank LIMIT 500
+            """),
             {"query": fts_q},
         )
         fts_note_ids = [row[0] for row in fts_result.fetchall()]
         if not fts_note_ids:
             return [], 0
 
-    query = select(Note).options(selectinload(Note.tags)).order_by(Note.updated_at.desc())
+    query = select(Note).options(load_only(*NOTE_SUMMARY_COLUMNS), selectinload(Note.tags)).order_by(Note.updated_at.desc())
     count_query = select(func.count()).select_from(Note)
 
     if fts_note_ids is not None:
@@ -229,22 +240,37 @@ async def list_notes(
     return notes, total
 
 
-async def update_note(db: AsyncSession, note_id: str, title: str | None = None, content: str | None = None, tags: list[str] | None = None, project_id: str | None = None) -> Note | None:
+async def update_note(db: AsyncSession, note_id: str, title: str | None = None, content: str | None = None, tags: list[str] | None = None, project_id: str | None = None) -> tuple[Note, bool] | None:
+    """Returns (note, changed), or None if the note doesn't exist.
+
+    changed is False when the save would leave the note as it is: autosave
+    re-sends identical notes constantly, so the file, link, FTS and AI work
+    is skipped, and callers can skip their broadcasts too.
+    """
     note = await get_note(db, note_id)
     if note is None:
         return None
 
+    if _is_noop_update(note, title, content, tags, project_id):
+        return note, False
+
     now = datetime.now(timezone.utc)
 
+    old_title = note.title
     if title is not None:
         note.title = title
     if content is not None:
         note.content = content
+        note.preview = build_preview(content)
+        note.content_length = len(content)
+        note.content_hash = content_hash(content)
         await _update_links(db, note, content)
     if tags is not None:
         await _sync_note_tags(db, note.id, tags)
     if project_id is not None:
         note.project_id = project_id
+    if note.title != old_title:
+        await _relink_renamed_note(db, note, old_title)
 
     note.updated_at = now
 
@@ -261,8 +287,8 @@ async def update_note(db: AsyncSession, note_id: str, title: str | None = None,
 
     linked_event_ids = [cl.event_id for cl in note.calendar_links]
 
-    write_note_file(
-        filepath=note.filepath,
+    filepath = note.filepath
+    file_fields = dict(
         note_id=note.id,
         title=note.title,
         content=note.content,
@@ -274,20 +300,30 @@ async def update_note(db: AsyncSession, note_id: str, title: str | None = None,
         linked_events=linked_event_ids if linked_event_ids else None,
     )
 
-    # Update FTS index
-    await _fts_update(db, note.id, note.title, note.content, tag_names)
-
     note_id = note.id
     await db.commit()
+    queue_note_write(filepath, **file_fields)
 
     # Expire cached state so re-fetch loads fresh tags
     db.expire_all()
-    return await get_note(db, note_id)
+    return await get_note(db, note_id), True
+
+
+def _is_noop_update(note: Note, title: str | None, content: str | None, tags: list[str] | None, project_id: str | None) -> bool:
+    """Whether update_note with these arguments would leave *note* as it is."""
+    return (
+        (title is None or title == note.title)
+        and (content is None or (note.content_hash is not None and content_hash(content) == note.content_hash))
+        and (project_id is None or project_id == note.project_id)
+        and (tags is None or {t.strip().lower() for t in tags} - {""} == {t.name for t in note.tags})
+    )
 
 
-async def patch_note_content(db: AsyncSession, note_id: str, operations: list[dict]) -> Note:
+async def patch_note_content(db: AsyncSession, note_id: str, operations: list[dict]) -> tuple[Note, bool]:
     """Apply string-match patch operations to a note's content.
 
+    Returns (note, changed), as update_note does.
+
     Each operation has old_string and new_string.
     - old_string must be non-empty and appear exactly once in the current content.
     - new_string replaces old_string (empty new_string = deletion).
@@ -339,13 +375,10 @@ async def delete_note(db: AsyncSession, note_id: str) -> bool:
     )
     tag_ids = [row[0] for row in result.all()]
 
-    delete_note_file(note.filepath)
-
-    # Remove from FTS index
-    await _fts_delete(db, note_id)
-
+    filepath = note.filepath
     await db.delete(note)
     await db.commit()
+    queue_note_delete(filepath)
 
     # Clean up orphaned tags (tags with no remaining notes)
     if tag_ids:
@@ -365,30 +398,96 @@ async def get_backlinks(db: AsyncSession, note_id: str) -> list[Note]:
         select(Note)
         .join(NoteLink, NoteLink.source_note_id == Note.id)
         .where(NoteLink.target_note_id == note_id)
+        .options(load_only(*NOTE_SUMMARY_COLUMNS))
     )
     return list(result.scalars().all())
 
 
-async def _update_links(db: AsyncSession, note: Note, content: str) -> None:
-    # Remove existing outgoing links
-    await db.execute(
-        delete(NoteLink).where(NoteLink.source_note_id == note.id)
+async def _resolve_titles(db: AsyncSession, titles: set[str]) -> dict[str, str]:
+    """Map note titles to note IDs in a single query (oldest note wins on duplicates)."""
+    if not titles:
+        return {}
+    result = await db.execute(
+        select(Note.id, Note.title).where(Note.title.in_(titles)).order_by(Note.created_at)
     )
+    resolved: dict[str, str] = {}
+    for note_id, title in result.all():
+        resolved.setdefault(title, note_id)
+    return resolved
+
+
+async def _update_links(db: AsyncSession, note: Note, content: str) -> None:
+    """Sync a note's outgoing links with its content.
+
+    Only links that were added or removed are written; repeated links are
+    stored once. Note titles are resolved in one query, and kept links whose
+    target changed (e.g. the target note was created since) are re-pointed.
+    """
+    wanted: dict[tuple[str, str], None] = {}
+    for link_data in parse_links(content):
+        wanted.setdefault((link_data["identifier"], link_data["link_type"]), None)
+    targets = await _resolve_titles(db, {identifier for identifier, link_type in wanted if link_type == "note"})
 
-    links = parse_links(content)
-    for link_data in links:
-        identifier = link_data["identifier"]
-        link_type = link_data["link_type"]
+    result = await db.execute(
+        select(NoteLink.id, NoteLink.target_identifier, NoteLink.link_type, NoteLink.target_note_id)
+        .where(NoteLink.source_note_id == note.id)
+    )
+    removed_ids = []
+    for link_id, identifier, link_type, target_note_id in result.all():
+        key = (identifier, link_type)
+        if key not in wanted:
+            removed_ids.append(link_id)  # no longer in content, or a duplicate row
+            continue
+        del wanted[key]
+        resolved = targets.get(identifier) if link_type == "note" else None
+        if resolved != target_note_id:
+            await db.execute(
+                update(NoteLink).where(NoteLink.id == link_id).values(target_note_id=resolved)
+            )
 
-        target_note_id = None
-        if link_type == "note":
-            target = await get_note_by_title(db, identifier)
-            if target:
-                target_note_id = target.id
+    if removed_ids:
+        await db.execute(delete(NoteLink).where(NoteLink.id.in_(removed_ids)))
 
+    for identifier, link_type in wanted:
         db.add(NoteLink(
             source_note_id=note.id,
-            target_note_id=target_note_id,
+            target_note_id=targets.get(identifier) if link_type == "note" else None,
             target_identifier=identifier,
             link_type=link_type,
         ))
+
+
+async def _resolve_dangling_links(db: AsyncSession, titles: list[str]) -> None:
+    """Point unresolved [[title]] links at the note that now has that title."""
+    await db.execute(
+        update(NoteLink)
+        .where(
+            NoteLink.link_type == "note",
+            NoteLink.target_note_id.is_(None),
+            NoteLink.target_identifier.in_(titles),
+        )
+        .values(target_note_id=(
+            select(Note.id)
+            .where(Note.title == NoteLink.target_identifier)
+            .order_by(Note.created_at)
+            .limit(1)
+            .scalar_subquery()
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _relink_renamed_note(db: AsyncSession, note: Note, old_title: str) -> None:
+    """After a rename, [[old title]] links stop resolving to *note* and [[new title]] links start."""
+    await db.execute(
+        update(NoteLink)
+        .where(
+            NoteLink.link_type == "note",
+            NoteLink.target_note_id == note.id,
+            NoteLink.target_identifier != note.title,
+        )
+        .values(target_note_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    # Old-title links may still resolve to another note with that title
+    await _resolve_dangling_links(db, [old_title, note.title])
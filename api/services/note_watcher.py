@@ -0,0 +1,91 @@
+"""Pick up external edits to note files while the app runs.
+
+When NOTE_WATCHER_ENABLED is set, the lifespan starts run_note_watcher(),
+which subscribes to filesystem events under ``workspace/notes`` (inotify on
+Linux, via watchfiles; nothing is polled). Events are debounced, so a git
+pull or a sync client touching hundreds of files arrives as one batch. Only
+the files in the batch are parsed and synced through reindex_service, and
+connected clients get the usual note_created / note_updated / note_deleted
+broadcasts.
+
+Files written by the app itself are skipped (see file_service.is_own_write),
+both to avoid needless work and so a stale file on disk never overwrites a
+newer save that is still queued.
+"""
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from api.config import settings
+from api.database import async_session
+from api.services import reindex_service
+from api.services.file_service import is_own_write
+from api.utils.websocket import manager
+
+try:
+    from watchfiles import awatch
+except ImportError:  # optional; installed with uvicorn[standard]
+    awatch = None
+
+logger = logging.getLogger(__name__)
+
+
+def _is_note_file(change, path: str) -> bool:
+    name = os.path.basename(path)
+    return name.endswith(".md") and not name.startswith(".")  # not the writer's temp files
+
+
+def _notes_dir() -> Path:
+    return Path(settings.WORKSPACE_DIR).resolve() / "notes"
+
+
+async def apply_changes(paths: set[str]) -> reindex_service.SyncResult | None:
+    """Sync the notes for a batch of changed file paths and broadcast what changed."""
+    workspace = Path(settings.WORKSPACE_DIR).resolve()
+    present: list[str] = []
+    removed: list[str] = []
+    for path in sorted(paths):
+        filepath = Path(os.path.relpath(path, workspace)).as_posix()
+        if is_own_write(filepath):
+            continue
+        (present if os.path.isfile(path) else removed).append(filepath)
+    if not present and not removed:
+        return None
+
+    parsed = await asyncio.to_thread(
+        lambda: [reindex_service.parse_or_error(str(workspace / fp)) for fp in present]
+    )
+    async with async_session() as db:
+        sync = await reindex_service.sync_note_files(db, list(zip(present, parsed)), removed)
+
+    for filepath, error in sync.errors.items():
+        logger.warning("Skipping externally edited %s: %s", filepath, error)
+    for note_id, title in sync.created:
+        await manager.broadcast("note_created", {"id": note_id, "title": title})
+    for note_id, title in sync.updated:
+        await manager.broadcast("note_updated", {"id": note_id, "title": title})
+    for note_id in sync.deleted:
+        await manager.broadcast("note_deleted", {"id": note_id})
+    return sync
+
+
+async def run_note_watcher(stop_event: asyncio.Event) -> None:
+    """Apply external note file changes until *stop_event* is set."""
+    if awatch is None:
+        logger.warning("NOTE_WATCHER_ENABLED is set but watchfiles isn't installed; not watching notes")
+        return
+    notes_dir = _notes_dir()
+    notes_dir.mkdir(parents=True, exist_ok=True)
+    logger.info("Watching %s for external note edits", notes_dir)
+    async for changes in awatch(
+        notes_dir,
+        watch_filter=_is_note_file,
+        debounce=settings.NOTE_WATCHER_DEBOUNCE_MS,
+        stop_event=stop_event,
+    ):
+        try:
+            await apply_changes({path for _, path in changes})
+        except Exception:
+            logger.exception("Failed to apply external note file changes")
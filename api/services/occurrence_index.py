@@ -0,0 +1,211 @@
+"""Materialized occurrence index for recurring calendar events.
+
+Recurring masters are expanded once into ``calendar_event_occurrences`` for a
+rolling horizon around today, so calendar reads become a single indexed range
+query instead of re-running ``rrulestr(...).between(...)`` for every master on
+every request.
+
+Each master records the UTC range it has been expanded for
+(``occurrences_from`` / ``occurrences_until``). Reads outside that range fill
+only the missing segments. Changing ``rrule``, ``start_time`` or
+``original_timezone`` must call :func:`invalidate`, which drops the master's
+rows so they are rebuilt on the next read.
+"""
+
+from datetime import datetime, timedelta, timezone, tzinfo
+
+from sqlalchemy import and_, delete, exists, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from api.models.calendar import CalendarEvent, CalendarEventOccurrence
+from api.services import recurrence_engine
+from api.services.recurrence_engine import Occurrence, as_utc
+
+# Rolling horizon materialized the first time a master is indexed
+HORIZON_PAST_DAYS = 90
+HORIZON_FUTURE_DAYS = 365
+
+
+def default_window() -> tuple[datetime, datetime]:
+    """The rolling horizon (UTC) around today that masters are expanded for by default.
+
+    Snapped to whole UTC days, so every read on the same day asks for the
+    same range and finds it already covered instead of re-expanding every
+    master to reach a few seconds further out.
+    """
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=HORIZON_PAST_DAYS), today + timedelta(days=HORIZON_FUTURE_DAYS + 1)
+
+
+async def invalidate(db: AsyncSession, event: CalendarEvent) -> None:
+    """Drop materialized occurrences for *event* so they are rebuilt on next read.
+
+    Call whenever ``rrule``, ``start_time`` or ``original_timezone`` may have
+    changed. Does not commit.
+    """
+    event.occurrences_from = None
+    event.occurrences_until = None
+    await db.execute(
+        delete(CalendarEventOccurrence).where(CalendarEventOccurrence.master_id == event.id)
+    )
+
+
+async def ensure_window(db: AsyncSession, start: datetime, end: datetime) -> None:
+    """Make sure every recurring master is materialized for [start, end).
+
+    Only masters whose coverage doesn't include the window are loaded, so in
+    the steady state (including repeated reads of :func:`default_window`
+    within a day) this is a single query returning no rows. Commits if any
+    master had to be (re)expanded.
+    """
+    start, end = as_utc(start), as_utc(end)
+    result = await db.execute(
+        select(CalendarEvent).where(
+            CalendarEvent.rrule.isnot(None),
+            CalendarEvent.recurring_event_id.is_(None),
+            or_(
+                CalendarEvent.occurrences_from.is_(None),
+                CalendarEvent.occurrences_until.is_(None),
+                CalendarEvent.occurrences_from > start,
+                CalendarEvent.occurrences_until < end,
+            ),
+        )
+    )
+    stale = list(result.scalars().all())
+    if not stale:
+        return
+
+    horizon_start, horizon_end = default_window()
+    for master in stale:
+        if master.occurrences_from is None or master.occurrences_until is None:
+            # Never indexed (or invalidated): rebuild over the horizon plus the window
+            await db.execute(
+                delete(CalendarEventOccurrence).where(CalendarEventOccurrence.master_id == master.id)
+            )
+            covered_from = min(start, horizon_start)
+            covered_until = max(end, horizon_end)
+            segments = [(covered_from, covered_until)]
+        else:
+            # Extend the existing coverage with only the missing segments
+            old_from = as_utc(master.occurrences_from)
+            old_until = as_utc(master.occurrences_until)
+            covered_from = min(start, old_from)
+            covered_until = max(end, old_until)
+            segments = []
+            if start < old_from:
+                segments.append((start, old_from))
+            if end > old_until:
+                segments.append((old_until, end))
+
+        rows = [
+            {"master_id": master.id, "start_time": occ.start_time, "recurrence_key": occ.recurrence_key}
+            for seg_start, seg_end in segments
+            for occ in recurrence_engine.expand([master], (seg_start, seg_end))
+        ]
+
+        if rows:
+            await db.execute(insert(CalendarEventOccurrence).prefix_with("OR IGNORE"), rows)
+
+        # Core update so bookkeeping doesn't bump the event's updated_at
+        await db.execute(
+            update(CalendarEvent)
+            .where(CalendarEvent.id == master.id)
+            .values(
+                occurrences_from=covered_from,
+                occurrences_until=covered_until,
+                updated_at=CalendarEvent.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    await db.commit()
+
+
+async def occurrences_between(
+    db: AsyncSession, start: datetime, end: datetime, tz: tzinfo | None = None,
+) -> list[Occurrence]:
+    """Return indexed occurrences in [start, end), ordered by start time.
+
+    With a viewer timezone, all-day instances are matched by local date (see
+    :func:`recurrence_engine.in_window`).
+    """
+    window = (start, end)
+    search_start, search_end = recurrence_engine.search_window(window, tz)
+    await ensure_window(db, search_start, search_end)
+
+    result = await db.execute(
+        select(CalendarEventOccurrence.start_time, CalendarEvent)
+        .join(CalendarEvent, CalendarEvent.id == CalendarEventOccurrence.master_id)
+        .where(
+            CalendarEvent.rrule.isnot(None),
+            CalendarEvent.recurring_event_id.is_(None),
+            CalendarEventOccurrence.start_time >= search_start,
+            CalendarEventOccurrence.start_time < search_end,
+        )
+        .order_by(CalendarEventOccurrence.start_time)
+    )
+    return [
+        Occurrence(master=master, start_time=as_utc(occ_start))
+        for occ_start, master in result.all()
+        if recurrence_engine.in_window(occ_start, bool(master.all_day), window, tz)
+    ]
+
+
+def _visible_occurrences(query, start: datetime, end: datetime):
+    """Restrict *query* to indexed rows in [start, end) not replaced by an exception."""
+    exception = aliased(CalendarEvent)
+    return query.join(CalendarEvent, CalendarEvent.id == CalendarEventOccurrence.master_id).where(
+        CalendarEvent.rrule.isnot(None),
+        CalendarEvent.recurring_event_id.is_(None),
+        CalendarEventOccurrence.start_time >= as_utc(start),
+        CalendarEventOccurrence.start_time < as_utc(end),
+        ~exists().where(
+            exception.recurring_event_id == CalendarEventOccurrence.master_id,
+            exception.recurrence_id == CalendarEventOccurrence.recurrence_key,
+        ),
+    )
+
+
+async def occurrences_page(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    after: tuple[datetime, str] | None = None,
+    limit: int = 500,
+) -> list[Occurrence]:
+    """Return up to *limit* occurrences in [start, end) ordered by (start, id).
+
+    Occurrences overridden by an exception are left out (the exception is a
+    stored event of its own). *after* is a ``(start_time, id)`` keyset
+    cursor; only occurrences sorting strictly after it are returned.
+    """
+    await ensure_window(db, start, end)
+
+    # Synthetic IDs share the timestamp suffix for equal start times, so
+    # ordering ties by "<master_id>__rec__" matches ordering by Occurrence.id
+    id_prefix = CalendarEventOccurrence.master_id.concat("__rec__")
+    query = _visible_occurrences(select(CalendarEventOccurrence.start_time, CalendarEvent), start, end)
+    if after is not None:
+        after_start, after_id = as_utc(after[0]), after[1]
+        suffix = after_start.strftime("%Y%m%dT%H%M%S")
+        query = query.where(or_(
+            CalendarEventOccurrence.start_time > after_start,
+            and_(
+                CalendarEventOccurrence.start_time == after_start,
+                id_prefix.concat(suffix) > after_id,
+            ),
+        ))
+    result = await db.execute(
+        query.order_by(CalendarEventOccurrence.start_time, id_prefix).limit(limit)
+    )
+    return [Occurrence(master=master, start_time=as_utc(occ_start)) for occ_start, master in result.all()]
+
+
+async def count_between(db: AsyncSession, start: datetime, end: datetime) -> int:
+    """Number of occurrences :func:`occurrences_page` would return for [start, end)."""
+    await ensure_window(db, start, end)
+    result = await db.execute(
+        _visible_occurrences(select(func.count()).select_from(CalendarEventOccurrence), start, end)
+    )
+    return result.scalar_one()
@@ -0,0 +1,238 @@
+"""Shared RRULE expansion engine for recurring calendar events.
+
+Single home for the recurrence rules that used to be copied across the
+calendar routes, the dashboard and the MCP tools:
+
+- expansion in the event's original timezone (so DST is handled correctly)
+- all-day widening: all-day instances are matched by local date in the
+  viewer's timezone rather than by UTC instant
+- exception override by ``recurrence_id``
+- synthetic ``<master_id>__rec__<YYYYMMDDTHHMMSS>`` IDs for virtual instances
+
+Parsed ``rrulestr`` objects are kept in an LRU cache keyed by
+``(master id, updated_at)`` (plus the rule text, in case a write skips
+``updated_at``), so a master is only reparsed after it changes. Rules are
+built with ``cache=True`` so instances already generated are reused too.
+``ZoneInfo`` lookups (including failed ones) are cached as well.
+"""
+
+import logging
+import threading
+import zoneinfo
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+
+from dateutil.rrule import rrulebase, rrulestr
+
+from api.models.calendar import CalendarEvent
+
+logger = logging.getLogger(__name__)
+
+RULE_CACHE_SIZE = 4096
+
+
+def as_utc(dt: datetime) -> datetime:
+    """Return *dt* as an aware UTC datetime. Naive datetimes are assumed to be UTC."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+@lru_cache(maxsize=512)
+def get_zone(name: str | None) -> zoneinfo.ZoneInfo | None:
+    """Cached ZoneInfo lookup. Returns None for empty or unknown names."""
+    if not name:
+        return None
+    try:
+        return zoneinfo.ZoneInfo(name)
+    except Exception:
+        return None
+
+
+class _RuleCache:
+    """Thread-safe LRU of compiled rules keyed by (master id, updated_at)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[rrulebase, tzinfo | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple[rrulebase, tzinfo | None] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: tuple[rrulebase, tzinfo | None]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_rule_cache = _RuleCache(RULE_CACHE_SIZE)
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for the compiled-rule cache."""
+    return _rule_cache.stats()
+
+
+def clear_cache() -> None:
+    """Drop all compiled rules and zone lookups (used by benchmarks)."""
+    _rule_cache.clear()
+    get_zone.cache_clear()
+
+
+def compile_rule(master: CalendarEvent) -> tuple[rrulebase, tzinfo | None]:
+    """Return the parsed rule for *master* and the timezone it expands in.
+
+    The rule's dtstart is the master's start converted to its original
+    timezone when one is set, otherwise the start in UTC.
+    """
+    key = (master.id, master.updated_at, master.rrule)
+    entry = _rule_cache.get(key)
+    if entry is not None:
+        return entry
+
+    orig_tz = get_zone(master.original_timezone)
+    dtstart = as_utc(master.start_time)
+    if orig_tz:
+        dtstart = dtstart.astimezone(orig_tz)
+    entry = (rrulestr(master.rrule, dtstart=dtstart, cache=True), orig_tz)
+    _rule_cache.put(key, entry)
+    return entry
+
+
+@dataclass
+class Occurrence:
+    """A virtual instance of a recurring master."""
+
+    master: CalendarEvent
+    start_time: datetime  # aware UTC
+
+    @property
+    def end_time(self) -> datetime:
+        master = self.master
+        duration = (master.end_time - master.start_time) if master.end_time else timedelta(hours=1)
+        return self.start_time + duration
+
+    @property
+    def recurrence_key(self) -> str:
+        """Matches the ``recurrence_id`` of an exception overriding this instance."""
+        return self.start_time.isoformat()
+
+    @property
+    def id(self) -> str:
+        return f"{self.master.id}__rec__{self.start_time.strftime('%Y%m%dT%H%M%S')}"
+
+
+def search_window(window: tuple[datetime, datetime], tz: tzinfo | None = None) -> tuple[datetime, datetime]:
+    """UTC range to search so all-day instances can be matched by local date.
+
+    With a viewer timezone the window is widened by a day on each side; use
+    :func:`in_window` to filter the results back down.
+    """
+    start, end = as_utc(window[0]), as_utc(window[1])
+    if tz is None:
+        return start, end
+    return start - timedelta(days=1), end + timedelta(days=1)
+
+
+def in_window(start_time: datetime, all_day: bool, window: tuple[datetime, datetime], tz: tzinfo | None = None) -> bool:
+    """Whether an instance starting at *start_time* belongs in [start, end).
+
+    Timed instances are compared by UTC instant. With a viewer timezone,
+    all-day instances are compared by their local date instead.
+    """
+    start_time = as_utc(start_time)
+    start, end = as_utc(window[0]), as_utc(window[1])
+    if all_day and tz is not None:
+        local_date = start_time.astimezone(tz).date()
+        return start.astimezone(tz).date() <= local_date < end.astimezone(tz).date()
+    return start <= start_time < end
+
+
+def expand(
+    masters: list[CalendarEvent],
+    window: tuple[datetime, datetime],
+    tz: tzinfo | None = None,
+) -> list[Occurrence]:
+    """Expand recurring masters into occurrences within the window [start, end).
+
+    A master whose rule fails to parse or expand is logged and yields its
+    own start as a single occurrence, so a malformed (e.g. synced) series
+    still shows up. Results are sorted by start time.
+    """
+    search_start, search_end = search_window(window, tz)
+    occurrences: list[Occurrence] = []
+
+    for master in masters:
+        try:
+            rule, orig_tz = compile_rule(master)
+            if orig_tz:
+                raw = rule.between(search_start.astimezone(orig_tz), search_end.astimezone(orig_tz), inc=True)
+            else:
+                raw = rule.between(search_start, search_end, inc=True)
+        except Exception as e:
+            logger.warning("Failed to expand RRULE for event %s: %s", master.id, e)
+            raw = [as_utc(master.start_time)]
+
+        for occ in raw:
+            occ = occ.astimezone(timezone.utc)
+            if in_window(occ, bool(master.all_day), window, tz):
+                occurrences.append(Occurrence(master=master, start_time=occ))
+
+    occurrences.sort(key=lambda o: o.start_time)
+    return occurrences
+
+
+def apply_exceptions(
+    occurrences: list[Occurrence],
+    exceptions: list[CalendarEvent],
+) -> list[Occurrence | CalendarEvent]:
+    """Replace overridden occurrences with their exception instances.
+
+    Exceptions that don't match any occurrence (e.g. moved outside their
+    original date) are appended, so every exception passed in is returned.
+    Callers should pass only exceptions that fall within their window.
+    """
+    exc_by_master: dict[str, dict[str, CalendarEvent]] = {}
+    for exc in exceptions:
+        if exc.recurrence_id:
+            exc_by_master.setdefault(exc.recurring_event_id, {})[exc.recurrence_id] = exc
+
+    items: list[Occurrence | CalendarEvent] = []
+    included_exc_ids: set[str] = set()
+    for occ in occurrences:
+        exc = exc_by_master.get(occ.master.id, {}).get(occ.recurrence_key)
+        if exc is not None:
+            if exc.id not in included_exc_ids:
+                items.append(exc)
+                included_exc_ids.add(exc.id)
+            continue
+        items.append(occ)
+
+    for exc in exceptions:
+        if exc.id not in included_exc_ids:
+            items.append(exc)
+    return items
@@ -0,0 +1,284 @@
+"""Rebuild note rows from the markdown files in ``workspace/notes``.
+
+For when the files changed behind the app's back: edited in another
+editor, synced from another machine, or restored from a file-level backup.
+Files are parsed in a process pool (frontmatter, preview and wiki-links are
+the expensive part), then diffed against the notes table by id (falling
+back to filepath for files without one) and by content hash. Only notes
+that changed are written, in executemany batches; the FTS triggers keep
+notes_fts in step, and wiki-link targets are re-resolved at the end.
+
+sync_note_files() applies the same diff to a handful of files, for the
+note watcher.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+from sqlalchemy import bindparam, case, delete, insert, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from api.models.note import Note, NoteLink, NoteTag, Tag, generate_note_id
+from api.models.project import Project
+from api.services.block_parser import content_hash
+from api.services.file_service import flush_note_writes, list_note_files, parse_note_file
+
+REINDEX_BATCH_ROWS = 1000
+# Below this many files a pool costs more to start than it saves
+REINDEX_POOL_MIN_FILES = 200
+
+_notes = Note.__table__
+
+# Resolves [[title]] links the way note_service does: the oldest note wins
+_RESOLVE_LINKS_SQL = """
+    UPDATE note_links SET target_note_id = (
+        SELECT id FROM notes WHERE notes.title = note_links.target_identifier
+        ORDER BY created_at LIMIT 1)
+    WHERE link_type = 'note'"""
+
+
+@dataclass
+class SyncResult:
+    created: list[tuple[str, str]] = field(default_factory=list)  # (id, title)
+    updated: list[tuple[str, str]] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    conflicts: list[str] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+def _parse_all(full_paths: list[str], workers: int) -> list[dict | str]:
+    """Parse every file, in a pool when it pays off."""
+    if workers <= 1 or len(full_paths) < REINDEX_POOL_MIN_FILES:
+        return [parse_or_error(path) for path in full_paths]
+    # spawn, not fork: the server process has threads (the note writer, the
+    # database driver) that a forked child would inherit mid-operation
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(parse_or_error, full_paths, chunksize=max(1, len(full_paths) // (workers * 8))))
+
+
+def parse_or_error(full_path: str) -> dict | str:
+    """parse_note_file(), with a failure returned as an error string."""
+    try:
+        return parse_note_file(full_path)
+    except (OSError, UnicodeDecodeError, ValueError, yaml.YAMLError) as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def _chunks(items: list, size: int = REINDEX_BATCH_ROWS):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def _ensure_tags(db: AsyncSession, names: set[str]) -> dict[str, str]:
+    """Tag name -> id for *names*, creating the missing tags."""
+    ids: dict[str, str] = {}
+    for chunk in _chunks(sorted(names)):
+        result = await db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(chunk)))
+        ids.update(result.tuples().all())
+    missing = [{"name": name} for name in sorted(names - ids.keys())]
+    for chunk in _chunks(missing):
+        await db.execute(insert(Tag.__table__), chunk)
+        result = await db.execute(select(Tag.name, Tag.id).where(Tag.name.in_([row["name"] for row in chunk])))
+        ids.update(result.tuples().all())
+    return ids
+
+
+def _select_rows():
+    # Content is only needed (to hash it) for rows from before content_hash existed
+    return select(_notes.c.id, _notes.c.filepath, _notes.c.title, _notes.c.content_hash,
+                  case((_notes.c.content_hash.is_(None), _notes.c.content)).label("content"),
+                  _notes.c.project_id, _notes.c.tags_text)
+
+
+async def _apply_files(
+    db: AsyncSession,
+    files: list[tuple[str, dict | str]],
+    existing: dict,
+    delete_ids: list[str],
+) -> SyncResult:
+    """Write the notes in *files* ((filepath, parsed) pairs) that differ from *existing*.
+
+    *existing* maps note id -> notes row for every row the files may match.
+    Notes in *delete_ids* are deleted. Doesn't commit.
+    """
+    workspace = Path(settings.WORKSPACE_DIR).resolve()
+    by_filepath = {row.filepath: row.id for row in existing.values()}
+    project_ids = set((await db.execute(select(Project.id))).scalars().all())
+
+    sync = SyncResult()
+    inserts: list[dict] = []
+    updates: list[dict] = []
+    tag_changes: dict[str, list[str]] = {}  # note id -> tag names
+    link_changes: dict[str, list[tuple[str, str]]] = {}  # note id -> (identifier, link_type)
+    titles: set[str] = set()  # titles that appeared or went away
+    new_ids: set[str] = set()
+
+    for filepath, note in files:
+        if isinstance(note, str):
+            sync.errors[filepath] = note
+            continue
+        note_id = note["id"] if note["id"] in existing else by_filepath.get(filepath)
+        if note_id is None and note["id"] in new_ids:
+            sync.conflicts.append(filepath)  # two new files with the same id
+            continue
+        if note_id is not None and existing[note_id].filepath != filepath and (
+            (workspace / existing[note_id].filepath).exists()
+        ):
+            sync.conflicts.append(filepath)  # a copy of another note file, id and all
+            continue
+        project_id = note["project_id"] if note["project_id"] in project_ids else None
+        tags_text = " ".join(note["tags"])
+        values = {
+            "title": note["title"],
+            "filepath": filepath,
+            "content": note["content"],
+            "preview": note["preview"],
+            "content_length": len(note["content"]),
+            "content_hash": note["content_hash"],
+            "tags_text": tags_text,
+            "project_id": project_id,
+        }
+
+        if note_id is None:
+            note_id = note["id"] or generate_note_id()
+            new_ids.add(note_id)
+            inserts.append({**values, "id": note_id, "created_at": note["created_at"], "updated_at": note["updated_at"]})
+            tag_changes[note_id] = note["tags"]
+            link_changes[note_id] = note["links"]
+            titles.add(note["title"])
+            sync.created.append((note_id, note["title"]))
+            continue
+
+        row = existing[note_id]
+        content_changed = (row.content_hash or content_hash(row.content)) != note["content_hash"]
+        if (
+            not content_changed
+            and (row.title, row.filepath, row.project_id, row.tags_text or "")
+            == (note["title"], filepath, project_id, tags_text)
+        ):
+            sync.unchanged += 1
+            continue
+        updates.append({**values, "b_id": note_id, "updated_at": note["mtime"]})
+        if (row.tags_text or "") != tags_text:
+            tag_changes[note_id] = note["tags"]
+        if content_changed:
+            link_changes[note_id] = note["links"]
+        if row.title != note["title"]:
+            titles.update((row.title, note["title"]))
+        sync.updated.append((note_id, note["title"]))
+
+    for chunk in _chunks(inserts):
+        await db.execute(insert(_notes), chunk)
+    for chunk in _chunks(updates):
+        await db.execute(
+            update(_notes).where(_notes.c.id == bindparam("b_id")).execution_options(synchronize_session=False),
+            chunk,
+        )
+
+    if tag_changes:
+        tag_ids = await _ensure_tags(db, {name for names in tag_changes.values() for name in names})
+        for chunk in _chunks(list(tag_changes)):
+            await db.execute(delete(NoteTag).where(NoteTag.note_id.in_(chunk)))
+        pairs = [{"note_id": nid, "tag_id": tag_ids[name]} for nid, names in tag_changes.items() for name in names]
+        for chunk in _chunks(pairs):
+            await db.execute(insert(NoteTag.__table__), chunk)
+
+    if link_changes:
+        for chunk in _chunks(list(link_changes)):
+            await db.execute(delete(NoteLink).where(NoteLink.source_note_id.in_(chunk)))
+        links = [
+            {"source_note_id": nid, "target_note_id": None, "target_identifier": identifier, "link_type": link_type}
+            for nid, note_links in link_changes.items() for identifier, link_type in note_links
+        ]
+        for chunk in _chunks(links):
+            await db.execute(insert(NoteLink.__table__), chunk)
+
+    for chunk in _chunks(delete_ids):
+        notes = (await db.execute(select(Note).where(Note.id.in_(chunk)))).scalars().all()
+        for note in notes:
+            titles.add(note.title)
+            await db.delete(note)
+            sync.deleted.append(note.id)
+    await db.flush()
+
+    # New, renamed and deleted notes change what [[title]] points at, both
+    # for their own links and for every link naming one of those titles
+    if len(link_changes) + len(titles) > REINDEX_BATCH_ROWS:
+        await db.execute(text(_RESOLVE_LINKS_SQL))
+    elif link_changes or titles:
+        await db.execute(
+            text(f"{_RESOLVE_LINKS_SQL} AND (source_note_id IN :ids OR target_identifier IN :titles)")
+            .bindparams(bindparam("ids", expanding=True), bindparam("titles", expanding=True)),
+            {"ids": list(link_changes), "titles": list(titles)},
+        )
+    if tag_changes or sync.deleted:
+        await db.execute(text("DELETE FROM tags WHERE id NOT IN (SELECT tag_id FROM note_tags)"))
+    return sync
+
+
+async def reindex_notes(db: AsyncSession, prune: bool = False, workers: int | None = None) -> dict:
+    """Bring the notes table in line with the note files on disk.
+
+    Notes whose file is gone are left alone (and counted as missing_files)
+    unless *prune* is set, in which case they are deleted. Returns counts
+    of what was written.
+    """
+    started = time.perf_counter()
+    await flush_note_writes()  # our own pending writes are part of what's on disk
+
+    workspace = Path(settings.WORKSPACE_DIR).resolve()
+    filepaths = sorted(await asyncio.to_thread(list_note_files))
+    parsed = await asyncio.to_thread(
+        _parse_all, [str(workspace / fp) for fp in filepaths], workers or os.cpu_count() or 1
+    )
+
+    existing = {row.id: row for row in (await db.execute(_select_rows())).all()}
+    on_disk = set(filepaths)
+    missing = [note_id for note_id, row in existing.items() if row.filepath not in on_disk]
+    sync = await _apply_files(db, list(zip(filepaths, parsed)), existing, missing if prune else [])
+    await db.commit()
+
+    return {
+        "status": "ok",
+        "files": len(filepaths),
+        "inserted": len(sync.created),
+        "updated": len(sync.updated),
+        "unchanged": sync.unchanged,
+        "pruned": len(sync.deleted),
+        "missing_files": len(missing) - len(sync.deleted),
+        "conflicts": sync.conflicts,
+        "errors": sync.errors,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def sync_note_files(
+    db: AsyncSession,
+    files: list[tuple[str, dict | str]],
+    removed: list[str],
+) -> SyncResult:
+    """Apply a few changed note files and removed filepaths, and commit.
+
+    *files* are (filepath, parse_or_error() result) pairs. Only the rows
+    those files and paths can match are loaded.
+    """
+    ids = [note["id"] for _, note in files if isinstance(note, dict) and note["id"]]
+    filepaths = [filepath for filepath, _ in files] + removed
+    result = await db.execute(
+        _select_rows().where(or_(_notes.c.id.in_(ids), _notes.c.filepath.in_(filepaths)))
+    )
+    existing = {row.id: row for row in result.all()}
+    # A removed path whose note reappeared under another path was moved, not deleted
+    present_ids = set(ids)
+    delete_ids = [row.id for row in existing.values() if row.filepath in removed and row.id not in present_ids]
+    sync = await _apply_files(db, files, existing, delete_ids)
+    await db.commit()
+    return sync
@@ -0,0 +1,226 @@
+"""Unified full-text search across notes, tasks, calendar events and projects.
+
+Each entity type has an external-content FTS5 index kept in sync by triggers
+(see the schema migrations in ``init_db``). A search runs one ``UNION ALL``
+query over the selected indexes and ranks every hit together by ``bm25()``,
+with titles weighted above body text. Per-type totals come from window
+counts over the same result set, so each index's MATCH runs once per request.
+
+Results are kept in an LRU cache keyed by (normalized query, types, limit,
+offset), since the search box and MCP clients repeat the same prefix queries
+while the user types. The cache is tied to a write generation that is bumped
+whenever a transaction that wrote to an indexed table commits; that drops
+every cached page, and a search that raced with the write doesn't store its
+result.
+"""
+
+import threading
+from collections import OrderedDict
+from itertools import chain
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from api.services.note_service import fts5_prefix_query
+
+SEARCH_CACHE_SIZE = 512
+
+# type -> (FTS table, SELECT producing: type, id, title, snippet, rank,
+# project_id, status, start_time). bm25() weights follow the FTS column order.
+SEARCH_INDEXES: dict[str, tuple[str, str]] = {
+    "note": ("notes_fts", """
+        SELECT 'note' AS type, n.id, n.title,
+               snippet(notes_fts, 1, '<mark>', '</mark>', '...', 32) AS snippet,
+               bm25(notes_fts, 10.0, 1.0, 5.0) AS rank,
+               n.project_id, NULL AS status, NULL AS start_time
+        FROM notes_fts JOIN notes n ON n.rowid = notes_fts.rowid
+        WHERE notes_fts MATCH :query
+    """),
+    "task": ("tasks_fts", """
+        SELECT 'task' AS type, t.id, t.title,
+               snippet(tasks_fts, 1, '<mark>', '</mark>', '...', 32) AS snippet,
+               bm25(tasks_fts, 10.0, 1.0, 1.0) AS rank,
+               t.project_id, t.status, NULL AS start_time
+        FROM tasks_fts JOIN tasks t ON t.rowid = tasks_fts.rowid
+        WHERE tasks_fts MATCH :query
+    """),
+    "event": ("events_fts", """
+        SELECT 'event' AS type, e.id, e.title,
+               snippet(events_fts, 1, '<mark>', '</mark>', '...', 32) AS snippet,
+               bm25(events_fts, 10.0, 1.0, 2.0) AS rank,
+               NULL AS project_id, NULL AS status, e.start_time
+        FROM events_fts JOIN calendar_events e ON e.rowid = events_fts.rowid
+        WHERE events_fts MATCH :query
+    """),
+    "project": ("projects_fts", """
+        SELECT 'project' AS type, p.id, p.name AS title,
+               snippet(projects_fts, 1, '<mark>', '</mark>', '...', 32) AS snippet,
+               bm25(projects_fts, 10.0, 1.0) AS rank,
+               p.id AS project_id, p.status, NULL AS start_time
+        FROM projects_fts JOIN projects p ON p.rowid = projects_fts.rowid
+        WHERE projects_fts MATCH :query
+    """),
+}
+
+
+# Tables whose contents feed the indexes above
+_INDEXED_TABLES = frozenset({
+    "notes", "note_tags", "tags", "tasks", "task_checklists", "calendar_events", "projects",
+})
+_DML_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class _SearchCache:
+    """Thread-safe LRU of search pages, emptied whenever the write generation moves."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[list[dict], dict[str, int]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple[list[dict], dict[str, int]] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, generation: int, entry: tuple[list[dict], dict[str, int]]) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return  # computed against data that has since changed
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def bump(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "generation": self.generation,
+            }
+
+
+_cache = _SearchCache(SEARCH_CACHE_SIZE)
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters and current write generation of the result cache."""
+    return _cache.stats()
+
+
+def bump_generation() -> None:
+    """Invalidate all cached results. Writes through a Session do this on commit."""
+    _cache.bump()
+
+
+# Every writer (note and task services, calendar and project routes, MCP
+# tools, AI background jobs, imports) goes through a Session, so the write
+# generation is tracked here rather than at each call site: mark the session
+# when it touches an indexed table, bump once its transaction commits.
+
+@event.listens_for(Session, "after_flush")
+def _mark_indexed_flush(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if getattr(obj, "__tablename__", None) in _INDEXED_TABLES:
+            session.info["search_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_indexed_statement(orm_execute_state):
+    statement = orm_execute_state.statement
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(statement, "table", None)
+        if table is None or table.name in _INDEXED_TABLES:
+            orm_execute_state.session.info["search_dirty"] = True
+    elif isinstance(statement, TextClause) and statement.text.lstrip().upper().startswith(_DML_PREFIXES):
+        orm_execute_state.session.info["search_dirty"] = True  # raw SQL: assume it matters
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session):
+    if session.info.pop("search_dirty", False):
+        _cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session):
+    session.info.pop("search_dirty", None)
+
+
+async def _count_matches(db: AsyncSession, fts_q: str, types: list[str]) -> dict[str, int]:
+    """One COUNT per index, in a single statement."""
+    columns = ", ".join(
+        f"(SELECT COUNT(*) FROM {SEARCH_INDEXES[t][0]} WHERE {SEARCH_INDEXES[t][0]} MATCH :query)"
+        for t in types
+    )
+    row = (await db.execute(text(f"SELECT {columns}"), {"query": fts_q})).one()
+    return dict(zip(types, row))
+
+
+async def search(
+    db: AsyncSession,
+    query: str,
+    types: list[str],
+    limit: int = 20,
+    offset: int = 0,
+) -> tuple[list[dict], dict[str, int]]:
+    """Search the given types and return one page of hits plus per-type totals.
+
+    Hits are dicts with the SEARCH_INDEXES columns, best match first.
+    Results are served from the cache when nothing indexed has changed.
+    """
+    fts_q = fts5_prefix_query(query)
+    if not fts_q or not types:
+        return [], {t: 0 for t in types}
+
+    key = (fts_q.lower(), tuple(types), limit, offset)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    generation = _cache.generation
+
+    hits_sql = " UNION ALL ".join(SEARCH_INDEXES[t][1] for t in types)
+    counts_sql = ", ".join(f"SUM(type = '{t}') OVER () AS count_{t}" for t in types)
+    result = await db.execute(
+        text(f"""
+            WITH hits AS ({hits_sql})
+            SELECT *, {counts_sql} FROM hits
+            ORDER BY rank, id
+            LIMIT :limit OFFSET :offset
+        """),
+        {"query": fts_q, "limit": limit, "offset": offset},
+    )
+    rows = [dict(row) for row in result.mappings().all()]
+
+    if rows:
+        counts = {t: rows[0][f"count_{t}"] for t in types}
+    elif offset:
+        # Paged past the end: the window counts had no row to ride on
+        counts = await _count_matches(db, fts_q, types)
+    else:
+        counts = {t: 0 for t in types}
+
+    hits = [{k: v for k, v in row.items() if not k.startswith("count_")} for row in rows]
+    _cache.put(key, generation, (hits, counts))
+    return hits, counts
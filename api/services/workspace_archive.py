@@ -0,0 +1,527 @@
+"""Workspace backup archives.
+
+A backup is a ZIP containing:
+
+- ``manifest.json``: format version, archive id, creation time, row count per
+  table and the size, mtime and SHA-256 of every note file
+- ``tables/<table>.ndjson``: one JSON object per row
+- ``notes/...``: the markdown note files
+
+An incremental backup is taken against a previous backup's manifest (its
+parent). It only holds the rows written since the parent was taken and the
+note files whose content changed, plus ``keys/<table>.ndjson`` with every
+primary key still present so deletions can be replayed (before the rows,
+so a recreated row never meets the one it replaced). Restoring a full
+backup followed by its chain of incrementals reproduces the workspace.
+
+Exports are streamed: rows are fetched in chunks and each chunk is
+compressed and handed to the client before the next one is read, so peak
+memory stays bounded by the chunk size rather than the workspace size.
+
+Imports read the (spooled) upload in one pass: each table's NDJSON is parsed
+in chunks and bulk-inserted with executemany, all in one transaction, with
+the search triggers dropped so the FTS indexes are rebuilt once at the end.
+Older backups with a single ``data.json`` are still accepted.
+"""
+
+import asyncio
+import json
+import shutil
+import hashlib
+import resource
+import sys
+import time
+import uuid
+import zipfile
+from collections.abc import AsyncIterator, Iterator
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO
+
+from sqlalchemy import DateTime, delete, insert, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from api.database import async_session
+from api.init_db import (
+    CHECKLIST_TEXT_TRIGGERS,
+    FTS_INDEXES,
+    REFRESH_CHECKLIST_TEXT_SQL,
+    REFRESH_TAGS_TEXT_SQL,
+    fts_triggers,
+    search_trigger_names,
+)
+from api.models.calendar import CalendarEvent, CalendarEventOccurrence, NoteCalendarLink
+from api.models.note import Note, NoteLink, NoteTag, Tag
+from api.models.project import Project, ProjectMilestone
+from api.models.settings import UserSettings
+from api.models.task import Task, TaskChecklist, TaskNote
+from api.services.block_parser import build_preview, content_hash
+from api.services.file_service import flush_note_writes
+
+ARCHIVE_FORMAT = 2
+EXPORT_CHUNK_ROWS = 500
+IMPORT_CHUNK_ROWS = 1000
+FILE_CHUNK_BYTES = 1024 * 1024
+# Incrementals re-export rows changed shortly before their parent was taken,
+# so a write that was in flight while the parent was streaming isn't lost
+INCREMENTAL_OVERLAP = timedelta(minutes=1)
+
+# Backed-up tables, parents before children
+EXPORT_TABLES = [
+    ("projects", Project),
+    ("project_milestones", ProjectMilestone),
+    ("tags", Tag),
+    ("notes", Note),
+    ("note_tags", NoteTag),
+    ("note_links", NoteLink),
+    ("tasks", Task),
+    ("task_checklists", TaskChecklist),
+    ("task_notes", TaskNote),
+    ("calendar_events", CalendarEvent),
+    ("note_calendar_links", NoteCalendarLink),
+    ("user_settings", UserSettings),
+]
+
+# Column an incremental backup filters on. Tables not listed are small or
+# edited without a timestamp (milestones, checklists, links, settings) and
+# are exported whole every time.
+CHANGE_COLUMNS = {
+    "projects": "updated_at",
+    "tags": "created_at",
+    "notes": "updated_at",
+    "note_tags": "created_at",
+    "tasks": "updated_at",
+    "task_notes": "created_at",
+    "calendar_events": "updated_at",
+    "note_calendar_links": "created_at",
+}
+
+
+def _notes_dir() -> Path:
+    return Path(settings.WORKSPACE_DIR).resolve() / "notes"
+
+
+def row_to_json(mapping) -> bytes:
+    """Serialize a row mapping as one NDJSON line (datetimes as ISO strings)."""
+    row = {k: (v.isoformat() if hasattr(v, "isoformat") else v) for k, v in mapping.items()}
+    return json.dumps(row, default=str).encode() + b"\n"
+
+
+class _ChunkSink:
+    """Write-only file object collecting ZIP output until it is drained."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _read_chunks(path: Path) -> AsyncIterator[bytes]:
+    """Read a file in chunks off the event loop."""
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        while chunk := await asyncio.to_thread(f.read, FILE_CHUNK_BYTES):
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(FILE_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _list_note_files(notes_dir: Path) -> list[tuple[str, Path, int, int]]:
+    """(archive path, path, size, mtime_ns) for every note file."""
+    if not notes_dir.is_dir():
+        return []
+    files = []
+    for path in sorted(p for p in notes_dir.rglob("*") if p.is_file()):
+        st = path.stat()
+        files.append(("notes/" + path.relative_to(notes_dir).as_posix(), path, st.st_size, st.st_mtime_ns))
+    return files
+
+
+def _manifest_time(manifest: dict) -> datetime:
+    """A manifest's created_at as a naive UTC datetime, the way rows store it."""
+    created = datetime.fromisoformat(manifest["created_at"])
+    if created.tzinfo is not None:
+        created = created.astimezone(timezone.utc).replace(tzinfo=None)
+    return created
+
+
+def check_parent(manifest: dict) -> None:
+    """Raise ValueError unless *manifest* can be the parent of an incremental backup."""
+    if not isinstance(manifest, dict) or not manifest.get("id") or "files" not in manifest:
+        raise ValueError("Manifest has no archive id or file list; take a new full backup first")
+    try:
+        _manifest_time(manifest)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Manifest has no valid created_at")
+
+
+async def stream_export(parent: dict | None = None) -> AsyncIterator[bytes]:
+    """Yield a complete backup ZIP piece by piece.
+
+    With *parent* (a previous backup's manifest, see check_parent) the
+    archive is incremental. Uses its own session, since the response
+    outlives the request's dependencies. The sink isn't seekable, so
+    zipfile writes data descriptors after each entry instead of patching
+    headers.
+    """
+    started = datetime.now(timezone.utc)
+    since = _manifest_time(parent) - INCREMENTAL_OVERLAP if parent else None
+    sink = _ChunkSink()
+    counts: dict[str, int] = {}
+    files: dict[str, dict] = {}
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        async with async_session() as db:
+            for key, model in EXPORT_TABLES:
+                table = model.__table__
+                query = select(table)
+                if since is not None and key in CHANGE_COLUMNS:
+                    query = query.where(table.c[CHANGE_COLUMNS[key]] > since)
+                counts[key] = 0
+                with zf.open(f"tables/{key}.ndjson", "w", force_zip64=True) as entry:
+                    result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+                    async for partition in result.mappings().partitions():
+                        for mapping in partition:
+                            entry.write(row_to_json(mapping))
+                        counts[key] += len(partition)
+                        if data := sink.drain():
+                            yield data
+                if parent is None:
+                    continue
+                with zf.open(f"keys/{key}.ndjson", "w", force_zip64=True) as entry:
+                    result = await db.stream(
+                        select(*table.primary_key.columns).execution_options(yield_per=EXPORT_CHUNK_ROWS)
+                    )
+                    async for partition in result.mappings().partitions():
+                        for mapping in partition:
+                            entry.write(row_to_json(mapping))
+                        if data := sink.drain():
+                            yield data
+
+        await flush_note_writes()
+        previous = parent["files"] if parent else {}
+        for arcname, path, size, mtime_ns in await asyncio.to_thread(_list_note_files, _notes_dir()):
+            old = previous.get(arcname)
+            if old and old["size"] == size:
+                # Same size: unchanged if untouched, or if only the mtime moved
+                if old["mtime_ns"] == mtime_ns or old["sha256"] == await asyncio.to_thread(_hash_file, path):
+                    files[arcname] = {**old, "mtime_ns": mtime_ns}
+                    continue
+            digest = hashlib.sha256()
+            with zf.open(arcname, "w", force_zip64=True) as entry:
+                async for chunk in _read_chunks(path):
+                    digest.update(chunk)
+                    entry.write(chunk)
+                    if data := sink.drain():
+                        yield data
+            files[arcname] = {"size": size, "mtime_ns": mtime_ns, "sha256": digest.hexdigest()}
+
+        manifest = {
+            "format": ARCHIVE_FORMAT,
+            "id": uuid.uuid4().hex,
+            "kind": "incremental" if parent else "full",
+            "parent_id": parent["id"] if parent else None,
+            "since": since.isoformat() if since else None,
+            "created_at": started.isoformat(),
+            "tables": counts,
+            "files": files,
+        }
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+    yield sink.drain()
+
+
+def read_manifest(zf: zipfile.ZipFile) -> dict | None:
+    """The archive's manifest; a stand-in for legacy data.json backups; None if not a backup."""
+    names = set(zf.namelist())
+    if "manifest.json" in names:
+        return json.loads(zf.read("manifest.json"))
+    if "data.json" in names:
+        return {"kind": "full"}
+    return None
+
+
+def iter_tables(zf: zipfile.ZipFile) -> Iterator[tuple[str, Iterator[dict]]]:
+    """Yield (table, rows) for each backed-up table, parents first.
+
+    NDJSON rows are read lazily; a legacy data.json is loaded whole.
+    """
+    names = set(zf.namelist())
+    legacy = json.loads(zf.read("data.json")) if "data.json" in names else None
+    for key, _ in EXPORT_TABLES:
+        if legacy is not None:
+            yield key, iter(legacy.get(key, []))
+        elif f"tables/{key}.ndjson" in names:
+            yield key, _iter_ndjson(zf, f"tables/{key}.ndjson")
+        else:
+            yield key, iter(())
+
+
+def _iter_ndjson(zf: zipfile.ZipFile, name: str) -> Iterator[dict]:
+    with zf.open(name) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _parse_datetime(val: str | None) -> datetime | None:
+    """Parse an ISO format datetime string back to a datetime object."""
+    if val is None:
+        return None
+    try:
+        return datetime.fromisoformat(val)
+    except (ValueError, TypeError):
+        return None
+
+
+def _row_values(row_data: dict, model, datetime_cols: set[str]) -> dict:
+    """Convert a backed-up row to insert values: known columns only, datetimes parsed."""
+    values = {}
+    for k, v in row_data.items():
+        if k not in model.__table__.columns:
+            continue
+        values[k] = _parse_datetime(v) if k in datetime_cols and isinstance(v, str) else v
+    if model is Note:
+        # Backups from before these columns were stored
+        values.setdefault("preview", build_preview(values.get("content")))
+        values.setdefault("content_length", len(values.get("content") or ""))
+        if values.get("content_hash") is None:
+            values["content_hash"] = content_hash(values.get("content"))
+    elif model is CalendarEvent:
+        # Occurrence rows aren't backed up; let the index rebuild them on read
+        values["occurrences_from"] = None
+        values["occurrences_until"] = None
+    return values
+
+
+def _extract_notes(zf: zipfile.ZipFile, notes_dir: Path) -> int:
+    """Copy every notes/ entry to *notes_dir*, streaming each one. Returns files written."""
+    notes_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for info in zf.infolist():
+        if not info.filename.startswith("notes/") or info.is_dir():
+            continue
+        target = (notes_dir / info.filename[len("notes/"):]).resolve()
+        if not target.is_relative_to(notes_dir):
+            continue  # path traversal
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with zf.open(info) as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, FILE_CHUNK_BYTES)
+        written += 1
+    return written
+
+
+def _remove_notes(notes_dir: Path, arcnames: set[str]) -> int:
+    """Delete note files that a later backup in the chain no longer has."""
+    removed = 0
+    for arcname in arcnames:
+        target = (notes_dir / arcname[len("notes/"):]).resolve()
+        if target.is_relative_to(notes_dir) and target.is_file():
+            target.unlink()
+            removed += 1
+    return removed
+
+
+def _max_rss_mb() -> float:
+    """The process's peak resident set size so far, in MiB."""
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 2**20 if sys.platform == "darwin" else 2**10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def _check_chain(manifests: list[dict | None]) -> None:
+    """Raise ValueError unless the archives are a full backup followed by its incrementals."""
+    if not manifests or manifests[0] is None:
+        raise ValueError("Invalid backup: missing manifest.json or data.json")
+    if manifests[0].get("kind", "full") != "full":
+        raise ValueError("The first archive must be a full backup")
+    for i, (parent, manifest) in enumerate(zip(manifests, manifests[1:]), start=2):
+        if manifest is None or manifest.get("kind") != "incremental":
+            raise ValueError(f"Archive {i} is not an incremental backup")
+        if manifest.get("parent_id") is None or manifest.get("parent_id") != parent.get("id"):
+            raise ValueError(f"Archive {i} was not taken against archive {i - 1}")
+
+
+async def _insert_rows(db: AsyncSession, model, rows: Iterator[dict], upsert: bool) -> int:
+    """Bulk-insert (or upsert) backed-up rows in executemany batches. Returns rows written."""
+    table = model.__table__
+    datetime_cols = {c.name for c in table.columns if isinstance(c.type, DateTime)}
+    pk_cols = [c.name for c in table.primary_key.columns]
+
+    async def flush(batch: list[dict]) -> None:
+        if not upsert:
+            await db.execute(insert(table), batch)
+            return
+        stmt = sqlite_insert(table)
+        updates = {k: stmt.excluded[k] for k in batch[0] if k not in pk_cols}
+        stmt = (
+            stmt.on_conflict_do_update(index_elements=pk_cols, set_=updates)
+            if updates else stmt.on_conflict_do_nothing(index_elements=pk_cols)
+        )
+        await db.execute(stmt, batch)
+
+    written = 0
+    batch: list[dict] = []
+    for row_data in rows:
+        values = _row_values(row_data, model, datetime_cols)
+        # executemany needs the same keys in every row of a batch
+        if batch and (len(batch) >= IMPORT_CHUNK_ROWS or values.keys() != batch[0].keys()):
+            await flush(batch)
+            batch = []
+        batch.append(values)
+        written += 1
+    if batch:
+        await flush(batch)
+    return written
+
+
+async def _delete_missing(db: AsyncSession, model, keys: Iterator[dict]) -> int:
+    """Delete rows whose primary key isn't in *keys*. Returns rows deleted."""
+    table = model.__table__
+    pk_cols = [c.name for c in table.primary_key.columns]
+    keep = f"restore_keys_{table.name}"
+    await db.execute(text(f"DROP TABLE IF EXISTS temp.{keep}"))
+    await db.execute(text(f"CREATE TEMP TABLE {keep} ({', '.join(pk_cols)})"))
+    add_keys = text(f"INSERT INTO temp.{keep} VALUES ({', '.join(':' + c for c in pk_cols)})")
+    batch: list[dict] = []
+    for key in keys:
+        batch.append({c: key[c] for c in pk_cols})
+        if len(batch) >= IMPORT_CHUNK_ROWS:
+            await db.execute(add_keys, batch)
+            batch = []
+    if batch:
+        await db.execute(add_keys, batch)
+    matches = " AND ".join(f"k.{c} = {table.name}.{c}" for c in pk_cols)
+    result = await db.execute(
+        text(f"DELETE FROM {table.name} WHERE NOT EXISTS (SELECT 1 FROM temp.{keep} k WHERE {matches})")
+    )
+    await db.execute(text(f"DROP TABLE temp.{keep}"))
+    return result.rowcount
+
+
+async def restore_chain(db: AsyncSession, fileobjs: list[BinaryIO]) -> dict:
+    """Replace all workspace data with a full backup plus its incrementals, in order.
+
+    *fileobjs* are seekable files. Everything happens in one transaction, so
+    a failed restore leaves the existing data in place. Raises ValueError if
+    the archives don't form a chain. Returns per-table counts and
+    throughput stats.
+    """
+    started = time.perf_counter()
+    rss_before = _max_rss_mb()
+    with ExitStack() as stack:
+        archives = [stack.enter_context(zipfile.ZipFile(f, "r")) for f in fileobjs]
+        manifests = [read_manifest(zf) for zf in archives]
+        _check_chain(manifests)
+
+        # Clearing the indexes first also opens the transaction, so the DDL
+        # below is rolled back with everything else on failure
+        for fts_table, _, _ in FTS_INDEXES:
+            await db.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('delete-all')"))
+        for trigger in search_trigger_names():
+            await db.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+        await db.execute(delete(CalendarEventOccurrence))
+        for _, model in reversed(EXPORT_TABLES):
+            await db.execute(delete(model))
+
+        models = dict(EXPORT_TABLES)
+        counts: dict[str, int] = {}
+        for key, rows in iter_tables(archives[0]):
+            counts[key] = await _insert_rows(db, models[key], rows, upsert=False)
+        rows_written = sum(counts.values())
+
+        applied = []
+        for zf, manifest in zip(archives[1:], manifests[1:]):
+            # Deletions first: a row deleted and recreated under a new id
+            # (a re-added tag, a note replaced at the same path) would
+            # otherwise clash with its old row on the unique name or path
+            deleted = {}
+            for key, model in reversed(EXPORT_TABLES):
+                if f"keys/{key}.ndjson" in zf.namelist():
+                    deleted[key] = await _delete_missing(db, model, _iter_ndjson(zf, f"keys/{key}.ndjson"))
+            upserted = {}
+            for key, rows in iter_tables(zf):
+                upserted[key] = await _insert_rows(db, models[key], rows, upsert=True)
+            rows_written += sum(upserted.values()) + sum(deleted.values())
+            applied.append({"id": manifest["id"], "upserted": upserted, "deleted": deleted})
+
+        # Denormalized search columns, then the triggers and one rebuild per index
+        await db.execute(text(REFRESH_TAGS_TEXT_SQL))
+        await db.execute(text(REFRESH_CHECKLIST_TEXT_SQL))
+        for statement in CHECKLIST_TEXT_TRIGGERS:
+            await db.execute(text(statement))
+        for fts_table, content_table, columns in FTS_INDEXES:
+            for statement in fts_triggers(fts_table, content_table, columns):
+                await db.execute(text(statement))
+            await db.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+        await db.commit()
+
+        # Queued writes of the replaced notes must land before, not over, the restore
+        await flush_note_writes()
+        notes_dir = _notes_dir()
+        files = 0
+        for zf in archives:
+            files += await asyncio.to_thread(_extract_notes, zf, notes_dir)
+        peak_rss_growth_mb = round(_max_rss_mb() - rss_before, 1)
+        # Files deleted somewhere along the chain: listed earlier, gone from the last manifest
+        removed = 0
+        if len(manifests) > 1:
+            earlier = {name for m in manifests[:-1] for name in m.get("files", {})}
+            removed = await asyncio.to_thread(
+                _remove_notes, notes_dir, earlier - manifests[-1]["files"].keys()
+            )
+
+    elapsed = time.perf_counter() - started
+    result = {
+        "status": "ok",
+        "restored": counts,
+        "files": files,
+        "stats": {
+            "rows": rows_written,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows_written / elapsed) if elapsed else None,
+            # How far this restore raised the process's peak RSS; 0 if it
+            # stayed under an earlier peak
+            "peak_rss_growth_mb": peak_rss_growth_mb,
+        },
+    }
+    if applied:
+        result["incrementals"] = applied
+        result["files_removed"] = removed
+    return result
+
+
+async def import_archive(db: AsyncSession, fileobj: BinaryIO) -> dict:
+    """Replace all workspace data with the full backup in *fileobj* (a seekable file).
+
+    Returns restore_chain's summary, or an error dict for archives that
+    aren't full backups.
+    """
+    with zipfile.ZipFile(fileobj, "r") as zf:
+        manifest = read_manifest(zf)
+    try:
+        _check_chain([manifest])
+    except ValueError as e:
+        return {"error": str(e)}
+    fileobj.seek(0)
+    return await restore_chain(db, [fileobj])
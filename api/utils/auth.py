@@ -1,5 +1,8 @@
+import asyncio
 import hashlib
+import logging
 import secrets
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
@@ -7,13 +10,15 @@ import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.config import settings
-from api.database import get_db
+from api.database import async_session, get_db
 from api.models.settings import AuthToken, UserSettings
 
+logger = logging.getLogger(__name__)
+
 ALGORITHM = "HS256"
 TOKEN_EXPIRY_HOURS = 24
 
@@ -57,43 +62,116 @@ def decode_token(token: str) -> dict:
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> CurrentUser:
-    token = credentials.credentials
+# --- Opaque token validation ---
+#
+# Validated tokens are cached for AUTH_TOKEN_CACHE_TTL_SECONDS so authenticated
+# reads don't hit the database at all. last_used_at is buffered in memory and
+# written in one batch every AUTH_LAST_USED_FLUSH_SECONDS instead of on every
+# request. Anything that revokes tokens or changes the username must call
+# invalidate_token_cache().
 
-    # New opaque token path
-    if token.startswith("sdl_"):
-        token_hash = hash_token(token)
+@dataclass
+class _CachedToken:
+    user: CurrentUser
+    expires_at: float  # time.monotonic()
+
+
+_token_cache: dict[str, _CachedToken] = {}  # token_hash -> validated user
+_pending_last_used: dict[str, datetime] = {}  # token_id -> most recent use
+
+
+def invalidate_token_cache(token_id: str | None = None) -> None:
+    """Drop cached validations for one token, or for all tokens if token_id is None."""
+    if token_id is None:
+        _token_cache.clear()
+        return
+    for token_hash, entry in list(_token_cache.items()):
+        if entry.user.token_id == token_id:
+            del _token_cache[token_hash]
+
+
+async def authenticate_token(db: AsyncSession, raw_token: str) -> CurrentUser | None:
+    """Validate an opaque token, using the in-process cache. Returns None if invalid."""
+    token_hash = hash_token(raw_token)
+    now = time.monotonic()
+    entry = _token_cache.get(token_hash)
+    if entry is None or entry.expires_at <= now:
         result = await db.execute(
             select(AuthToken).where(AuthToken.token_hash == token_hash)
         )
         auth_token = result.scalar_one_or_none()
         if auth_token is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-        # Update last_used_at
-        await db.execute(
-            update(AuthToken)
-            .where(AuthToken.id == auth_token.id)
-            .values(last_used_at=datetime.now(timezone.utc))
-        )
-        await db.commit()
+            _token_cache.pop(token_hash, None)
+            return None
 
         # Get username from settings
         username_row = await db.execute(
             select(UserSettings).where(UserSettings.key == "username")
         )
         username = username_row.scalar_one_or_none()
-        uname = username.value if username else "admin"
 
-        return CurrentUser(
-            username=uname,
-            token_id=auth_token.id,
-            scope=auth_token.scope,
-            token_type=auth_token.token_type,
+        entry = _CachedToken(
+            user=CurrentUser(
+                username=username.value if username else "admin",
+                token_id=auth_token.id,
+                scope=auth_token.scope,
+                token_type=auth_token.token_type,
+            ),
+            expires_at=now + settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
         )
+        _token_cache[token_hash] = entry
+
+    _pending_last_used[entry.user.token_id] = datetime.now(timezone.utc)
+    return entry.user
+
+
+async def flush_last_used() -> int:
+    """Write buffered last_used_at values in a single transaction. Returns rows written."""
+    if not _pending_last_used:
+        return 0
+    pending = dict(_pending_last_used)
+    _pending_last_used.clear()
+    async with async_session() as db:
+        # Core executemany; tokens revoked in the meantime simply match no row
+        await db.execute(
+            update(AuthToken.__table__)
+            .where(AuthToken.__table__.c.id == bindparam("token_id"))
+            .values(last_used_at=bindparam("last_used_at")),
+            [{"token_id": token_id, "last_used_at": used_at} for token_id, used_at in pending.items()],
+        )
+        await db.commit()
+    return len(pending)
+
+
+async def run_last_used_flusher() -> None:
+    """Background loop flushing last_used_at; started from the app lifespan."""
+    try:
+        while True:
+            await asyncio.sleep(settings.AUTH_LAST_USED_FLUSH_SECONDS)
+            try:
+                await flush_last_used()
+            except Exception:
+                logger.exception("Failed to flush token last_used_at")
+    finally:
+        # Write whatever is left on shutdown
+        try:
+            await flush_last_used()
+        except Exception:
+            logger.exception("Failed to flush token last_used_at on shutdown")
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> CurrentUser:
+    token = credentials.credentials
+
+    # New opaque token path
+    if token.startswith("sdl_"):
+        current_user = await authenticate_token(db, token)
+        if current_user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        return current_user
 
     # Legacy JWT fallback
     try:
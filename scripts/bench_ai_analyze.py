@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Background AI benchmark for Sundial: one combined analysis call per note
+versus separate auto-tag, task extraction and event linking calls.
+
+Builds a throwaway workspace with notes and calendar events, starts the mock
+provider from scripts/mock_llm_provider.py in-process, and runs
+process_note_ai over every note in both modes. Reports wall time per note,
+provider requests and (estimated) tokens.
+Run from project root: python scripts/bench_ai_analyze.py [--notes N] [--latency-ms N]
+
+Options:
+  --notes N         Notes to analyze per mode (default 20)
+  --latency-ms N    Provider time to first token per request (default 300)
+  --token-ms N      Provider time per generated token (default 10)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Point the app at a throwaway database before api.config is imported
+_workspace = tempfile.mkdtemp(prefix="sundial-ai-bench-")
+os.environ["WORKSPACE_DIR"] = _workspace
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_workspace}/sundial.db"
+
+import uvicorn
+from sqlalchemy import update
+
+from api.config import settings
+from api.database import async_session, engine
+from api.init_db import init_database
+from api.models.calendar import CalendarEvent
+from api.models.settings import UserSettings
+from api.services import ai_prompts, ai_service, note_service
+from api.services.ai_background import process_note_ai
+from api.utils.encryption import encrypt_value
+from mock_llm_provider import build_app, stats  # scripts/ is on sys.path when run directly
+
+PARAGRAPH = (
+    "Met with the platform team about the release. We agreed to deploy the new sync service "
+    "by Friday and to write up the migration notes for the calendar importer. Follow up with "
+    "design on the onboarding screens and review the budget before the planning meeting. "
+)
+
+
+def mock_reply(body: dict) -> str:
+    """Answer each prompt the way a model would, in the shape the caller expects."""
+    system = body["messages"][0]["content"]
+    tags = ["release", "meeting-notes", "sync"]
+    tasks = [{"title": "Deploy sync service", "description": "By Friday", "priority": "high"},
+             {"title": "Write migration notes", "priority": "medium"}]
+    event_ids = []
+    for message in body["messages"]:
+        if "Calendar events:\n" in message["content"]:
+            events = json.loads(message["content"].split("Calendar events:\n", 1)[1].split("\n\n", 1)[0])
+            event_ids = [events[0]["id"]]
+    if system.startswith(ai_prompts.SYSTEM_ANALYZE_NOTE):
+        return json.dumps({"tags": tags, "tasks": tasks, "event_ids": event_ids})
+    if system == ai_prompts.SYSTEM_AUTO_TAG:
+        return json.dumps(tags)
+    if system == ai_prompts.SYSTEM_EXTRACT_TASKS:
+        return json.dumps(tasks)
+    return json.dumps(event_ids)
+
+
+async def seed(note_count: int) -> list[str]:
+    await init_database()
+    async with async_session() as db:
+        await db.execute(update(UserSettings).where(UserSettings.key == "ai_enabled").values(value="true"))
+        for key, value in [
+            ("openrouter_api_key", encrypt_value("bench")),
+            ("ai_auto_tag", "true"), ("ai_auto_extract_tasks", "true"), ("ai_auto_link_events", "true"),
+        ]:
+            await db.merge(UserSettings(key=key, value=value))
+        now = datetime.now(timezone.utc)
+        for i in range(20):
+            db.add(CalendarEvent(
+                title=f"Planning meeting {i}", description="Quarterly planning and budget review",
+                start_time=now + timedelta(days=i - 5), end_time=now + timedelta(days=i - 5, hours=1),
+            ))
+        await db.commit()
+        note_ids = []
+        for i in range(note_count):
+            note = await note_service.create_note(db, title=f"Meeting notes {i}", content=PARAGRAPH * 10)
+            note_ids.append(note.id)
+    return note_ids
+
+
+async def run_mode(note_ids: list[str], combined: bool) -> dict:
+    settings.AI_COMBINED_ANALYSIS = combined
+    before = {k: stats[k] for k in ("requests", "prompt_tokens", "completion_tokens")}
+    started = time.perf_counter()
+    for note_id in note_ids:
+        # Called directly, without the job queue's debounce delay
+        async with async_session() as db:
+            await process_note_ai(db, note_id)
+    seconds = time.perf_counter() - started
+    return {
+        "ms_per_note": seconds / len(note_ids) * 1000,
+        **{k: (stats[k] - before[k]) / len(note_ids) for k in before},
+    }
+
+
+async def main(note_count: int, latency_ms: int, token_ms: int) -> None:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    app = build_app(tokens=0, first_token_ms=latency_ms, token_ms=token_ms, reply=mock_reply)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    settings.AI_OPENROUTER_URL = f"http://127.0.0.1:{port}/v1/chat/completions"
+
+    note_ids = await seed(note_count)
+    results = {
+        "separate": await run_mode(note_ids, combined=False),
+        "combined": await run_mode(note_ids, combined=True),
+    }
+
+    print(f"{note_count} notes, {latency_ms} ms to first token, {token_ms} ms per token")
+    print(f"{'mode':<10} {'ms/note':>9} {'requests':>9} {'prompt tok':>11} {'output tok':>11}")
+    for mode, r in results.items():
+        print(f"{mode:<10} {r['ms_per_note']:>9.0f} {r['requests']:>9.1f} "
+              f"{r['prompt_tokens']:>11.0f} {r['completion_tokens']:>11.0f}")
+    sep, comb = results["separate"], results["combined"]
+    print(f"combined saves {sep['ms_per_note'] / comb['ms_per_note']:.1f}x wall time, "
+          f"{(sep['prompt_tokens'] + sep['completion_tokens']) / (comb['prompt_tokens'] + comb['completion_tokens']):.1f}x tokens")
+
+    await ai_service.close_http_clients()
+    server.should_exit = True
+    await serving
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark combined vs separate background AI calls")
+    parser.add_argument("--notes", type=int, default=20, help="Notes to analyze per mode")
+    parser.add_argument("--latency-ms", type=int, default=300, help="Provider time to first token")
+    parser.add_argument("--token-ms", type=int, default=10, help="Provider time per generated token")
+    args = parser.parse_args()
+    asyncio.run(main(args.notes, args.latency_ms, args.token_ms))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Recurrence expansion benchmark for Sundial.
+
+Builds in-memory recurring masters (no database) and times expanding them
+over a window with a cold and then a warm compiled-rule cache.
+Run from project root: python scripts/bench_recurrence.py [--masters N] [--days N]
+
+Options:
+  --masters N    Number of recurring masters to expand (default 1000)
+  --days N       Length of the expansion window in days (default 30)
+  --rounds N     Warm rounds to average over (default 5)
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.models.calendar import CalendarEvent
+from api.services import recurrence_engine
+
+RULES = [
+    "FREQ=DAILY",
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU",
+    "FREQ=MONTHLY;BYMONTHDAY=15",
+    "FREQ=DAILY;COUNT=200",
+]
+ZONES = [None, "Europe/Berlin", "America/New_York", "Asia/Tokyo"]
+
+
+def build_masters(count: int) -> list[CalendarEvent]:
+    """Create detached recurring masters with a mix of rules and timezones."""
+    base = datetime(2025, 1, 6, 9, 0, tzinfo=timezone.utc)
+    masters = []
+    for i in range(count):
+        start = base + timedelta(hours=i % 48)
+        masters.append(CalendarEvent(
+            id=f"evt_bench_{i}",
+            title=f"Bench {i}",
+            start_time=start,
+            end_time=start + timedelta(minutes=30),
+            all_day=False,
+            rrule=RULES[i % len(RULES)],
+            original_timezone=ZONES[i % len(ZONES)],
+            updated_at=base,
+        ))
+    return masters
+
+
+def main(masters: int, days: int, rounds: int):
+    events = build_masters(masters)
+    window_start = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    window = (window_start, window_start + timedelta(days=days))
+
+    recurrence_engine.clear_cache()
+    t0 = time.perf_counter()
+    occurrences = recurrence_engine.expand(events, window)
+    cold = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        recurrence_engine.expand(events, window)
+    warm = (time.perf_counter() - t0) / rounds
+
+    print(f"Masters: {masters}, window: {days} days, occurrences: {len(occurrences)}")
+    print(f"Cold expand: {cold * 1000:.1f} ms")
+    print(f"Warm expand: {warm * 1000:.1f} ms (avg of {rounds})")
+    if warm:
+        print(f"Speedup:     {cold / warm:.1f}x")
+    print(f"Rule cache:  {recurrence_engine.cache_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark recurring event expansion")
+    parser.add_argument("--masters", type=int, default=1000, help="Number of recurring masters")
+    parser.add_argument("--days", type=int, default=30, help="Expansion window length in days")
+    parser.add_argument("--rounds", type=int, default=5, help="Warm rounds to average over")
+    args = parser.parse_args()
+    main(args.masters, args.days, args.rounds)
@@ -21,6 +21,7 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from api.config import settings
+from api.init_db import FTS_INDEXES, REFRESH_CHECKLIST_TEXT_SQL, REFRESH_TAGS_TEXT_SQL, TAGS_TEXT_SQL
 
 
 async def run_audit(db: AsyncSession) -> dict:
@@ -63,23 +64,20 @@ async def run_audit(db: AsyncSession) -> dict:
         for row in invalid_task_projects.fetchall()
     ]
 
-    # 4. Find FTS entries without corresponding notes
-    orphaned_fts = await db.execute(
-        text("""
-            SELECT fts.id, fts.title FROM notes_fts fts
-            WHERE fts.id NOT IN (SELECT id FROM notes)
-        """)
-    )
-    results["orphaned_fts"] = [{"id": row[0], "title": row[1]} for row in orphaned_fts.fetchall()]
-
-    # 5. Find notes without FTS entries
-    missing_fts = await db.execute(
-        text("""
-            SELECT n.id, n.title FROM notes n
-            WHERE n.id NOT IN (SELECT id FROM notes_fts)
-        """)
+    # 4. Check each FTS index matches the table it indexes
+    results["fts_out_of_sync"] = []
+    for fts_table, _, _ in FTS_INDEXES:
+        try:
+            await db.execute(text(f"INSERT INTO {fts_table}({fts_table}, rank) VALUES ('integrity-check', 1)"))
+        except Exception as e:
+            await db.rollback()
+            results["fts_out_of_sync"].append({"table": fts_table, "error": str(e)})
+
+    # 5. Find notes whose denormalized tags_text doesn't match their tags
+    stale_tags_text = await db.execute(
+        text(f"SELECT id, title FROM notes WHERE COALESCE(tags_text, '') != {TAGS_TEXT_SQL}")
     )
-    results["missing_fts"] = [{"id": row[0], "title": row[1]} for row in missing_fts.fetchall()]
+    results["stale_tags_text"] = [{"id": row[0], "title": row[1]} for row in stale_tags_text.fetchall()]
 
     # 6. Check for duplicate tag names (case sensitivity issues)
     duplicate_tags = await db.execute(
@@ -109,43 +107,14 @@ async def cleanup_orphaned_tags(db: AsyncSession) -> int:
     return result.rowcount
 
 
-async def cleanup_orphaned_fts(db: AsyncSession) -> int:
-    """Remove orphaned FTS entries. Returns count of deleted entries."""
-    result = await db.execute(
-        text("""
-            DELETE FROM notes_fts WHERE id NOT IN (SELECT id FROM notes)
-        """)
-    )
+async def rebuild_fts(db: AsyncSession) -> int:
+    """Recompute denormalized columns and rebuild every FTS index. Returns count of indexes rebuilt."""
+    await db.execute(text(REFRESH_TAGS_TEXT_SQL))
+    await db.execute(text(REFRESH_CHECKLIST_TEXT_SQL))
+    for fts_table, _, _ in FTS_INDEXES:
+        await db.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
     await db.commit()
-    return result.rowcount
-
-
-async def rebuild_missing_fts(db: AsyncSession) -> int:
-    """Rebuild FTS entries for notes missing them. Returns count of rebuilt entries."""
-    missing = await db.execute(
-        text("""
-            SELECT n.id, n.title, n.content FROM notes n
-            WHERE n.id NOT IN (SELECT id FROM notes_fts)
-        """)
-    )
-    rows = missing.fetchall()
-
-    for row in rows:
-        note_id, title, content = row
-        # Get tags for this note
-        tags_result = await db.execute(
-            text("SELECT t.name FROM tags t JOIN note_tags nt ON t.id = nt.tag_id WHERE nt.note_id = :nid"),
-            {"nid": note_id},
-        )
-        tags_str = " ".join(r[0] for r in tags_result.fetchall())
-
-        await db.execute(
-            text("INSERT INTO notes_fts(id, title, content, tags) VALUES (:id, :title, :content, :tags)"),
-            {"id": note_id, "title": title or "", "content": content or "", "tags": tags_str},
-        )
-
-    await db.commit()
-    return len(rows)
+    return len(FTS_INDEXES)
 
 
 async def main(auto_fix: bool = False):
@@ -185,21 +154,21 @@ async def main(auto_fix: bool = False):
             print("Tasks with invalid project refs: None")
 
         # Report FTS issues
-        if results["orphaned_fts"]:
+        if results["fts_out_of_sync"]:
             has_issues = True
-            print(f"\nOrphaned FTS entries ({len(results['orphaned_fts'])}):")
-            for fts in results["orphaned_fts"]:
-                print(f"  - {fts['title']} (id: {fts['id']})")
+            print(f"\nFTS indexes out of sync ({len(results['fts_out_of_sync'])}):")
+            for fts in results["fts_out_of_sync"]:
+                print(f"  - {fts['table']}: {fts['error']}")
         else:
-            print("Orphaned FTS entries: None")
+            print("FTS indexes out of sync: None")
 
-        if results["missing_fts"]:
+        if results["stale_tags_text"]:
             has_issues = True
-            print(f"\nNotes missing FTS entries ({len(results['missing_fts'])}):")
-            for note in results["missing_fts"]:
+            print(f"\nNotes with stale tags_text ({len(results['stale_tags_text'])}):")
+            for note in results["stale_tags_text"]:
                 print(f"  - {note['title']} (id: {note['id']})")
         else:
-            print("Notes missing FTS entries: None")
+            print("Notes with stale tags_text: None")
 
         # Report duplicate tags
         if results["duplicate_tags"]:
@@ -233,13 +202,9 @@ async def main(auto_fix: bool = False):
             count = await cleanup_orphaned_tags(db)
             print(f"Deleted {count} orphaned tags.")
 
-        if results["orphaned_fts"]:
-            count = await cleanup_orphaned_fts(db)
-            print(f"Deleted {count} orphaned FTS entries.")
-
-        if results["missing_fts"]:
-            count = await rebuild_missing_fts(db)
-            print(f"Rebuilt {count} missing FTS entries.")
+        if results["fts_out_of_sync"] or results["stale_tags_text"]:
+            count = await rebuild_fts(db)
+            print(f"Rebuilt {count} FTS indexes.")
 
         print("\nCleanup complete. Re-running audit...")
         results = await run_audit(db)
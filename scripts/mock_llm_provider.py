@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible chat completions server for exercising Sundial's AI
+features without a provider account.
+
+Replies with canned words at a fixed pace, plain or streamed (``"stream":
+true``), so time to first token and connection reuse can be measured. Point
+Sundial at it with
+  AI_OPENROUTER_URL=http://127.0.0.1:8001/v1/chat/completions
+and set any API key in Settings > AI. GET /stats reports how many requests
+arrived over how many TCP connections, and the prompt and completion tokens
+served (estimated at 4 characters per token, also returned as ``usage``).
+Run: python scripts/mock_llm_provider.py [--port N] [--tokens N] [--token-ms N]
+
+Options:
+  --port N            Port to listen on (default 8001)
+  --tokens N          Words per reply (default 200)
+  --first-token-ms N  Delay before the first word (default 300)
+  --token-ms N        Delay between words (default 20)
+  --reply TEXT        Return this text instead of canned words (e.g. JSON for auto-tag)
+  --rate-limit N      Answer 429 (Retry-After: 1) beyond N requests per second
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import Callable
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+WORDS = "the quick brown fox jumps over the lazy dog while sundial keeps the notes in order".split()
+
+stats = {
+    "requests": 0, "streamed": 0, "rate_limited": 0, "connections": set(),
+    "prompt_tokens": 0, "completion_tokens": 0,
+}
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def build_app(
+    tokens: int,
+    first_token_ms: int,
+    token_ms: int,
+    reply: str | Callable[[dict], str] | None,
+    rate_limit: int = 0,
+) -> Starlette:
+    """*reply* is fixed text, a function of the request body, or None for canned words.
+
+    A non-streamed reply takes as long as streaming it would, pacing a fixed
+    reply by its estimated token count.
+    """
+    def words(body: dict) -> list[str]:
+        if reply is not None:
+            return [reply(body) if callable(reply) else reply]
+        return [WORDS[i % len(WORDS)] + " " for i in range(tokens)]
+
+    recent: list[float] = []  # arrival times within the last second
+
+    async def completions(request: Request):
+        body = await request.json()
+        if rate_limit:
+            now = time.monotonic()
+            recent[:] = [t for t in recent if now - t < 1.0]
+            if len(recent) >= rate_limit:
+                stats["rate_limited"] += 1
+                return JSONResponse({"error": {"message": "Rate limit exceeded"}}, status_code=429,
+                                    headers={"Retry-After": "1"})
+            recent.append(now)
+        stats["requests"] += 1
+        stats["connections"].add(request.client)
+        model = body.get("model", "mock")
+        created = int(time.time())
+        prompt_tokens = sum(_tokens(m.get("content") or "") for m in body.get("messages", []))
+        stats["prompt_tokens"] += prompt_tokens
+
+        if not body.get("stream"):
+            content = "".join(words(body))
+            completion_tokens = tokens if reply is None else _tokens(content)
+            stats["completion_tokens"] += completion_tokens
+            await asyncio.sleep((first_token_ms + token_ms * completion_tokens) / 1000)
+            return JSONResponse({
+                "id": "mock", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+
+        stats["streamed"] += 1
+
+        async def chunks():
+            await asyncio.sleep(first_token_ms / 1000)
+            for i, word in enumerate(words(body)):
+                stats["completion_tokens"] += 1
+                if i:
+                    await asyncio.sleep(token_ms / 1000)
+                chunk = {
+                    "id": "mock", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    async def get_stats(request: Request):
+        return JSONResponse({
+            "requests": stats["requests"],
+            "streamed": stats["streamed"],
+            "rate_limited": stats["rate_limited"],
+            "connections": len(stats["connections"]),
+            "prompt_tokens": stats["prompt_tokens"],
+            "completion_tokens": stats["completion_tokens"],
+        })
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", completions, methods=["POST"]),
+        Route("/stats", get_stats),
+    ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI-compatible chat completions API")
+    parser.add_argument("--port", type=int, default=8001, help="Port to listen on")
+    parser.add_argument("--tokens", type=int, default=200, help="Words per reply")
+    parser.add_argument("--first-token-ms", type=int, default=300, help="Delay before the first word")
+    parser.add_argument("--token-ms", type=int, default=20, help="Delay between words")
+    parser.add_argument("--reply", default=None, help="Fixed reply text instead of canned words")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per second before answering 429")
+    args = parser.parse_args()
+    app = build_app(args.tokens, args.first_token_ms, args.token_ms, args.reply, args.rate_limit)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rebuild Sundial's notes from the markdown files in the workspace.
+
+Use after editing note files with another editor or restoring them from a
+file-level backup. Notes whose file is missing are reported, and deleted
+with --prune. The server exposes the same operation as
+POST /api/reindex/workspace.
+Run from project root: python scripts/reindex_notes.py [--prune] [--workers N]
+
+Options:
+  --prune        Delete notes whose markdown file no longer exists
+  --workers N    Parser processes (default: CPU count; 1 parses inline)
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.database import async_session, engine
+from api.init_db import init_database
+from api.services.reindex_service import reindex_notes
+
+
+async def main(prune: bool, workers: int | None) -> int:
+    await init_database()
+    async with async_session() as db:
+        result = await reindex_notes(db, prune=prune, workers=workers)
+    await engine.dispose()
+
+    print(f"Scanned {result['files']} files in {result['seconds']}s")
+    print(f"  inserted:  {result['inserted']}")
+    print(f"  updated:   {result['updated']}")
+    print(f"  unchanged: {result['unchanged']}")
+    if prune:
+        print(f"  pruned:    {result['pruned']}")
+    if result["missing_files"]:
+        print(f"  {result['missing_files']} notes have no file (use --prune to delete them)")
+    for filepath in result["conflicts"]:
+        print(f"  skipped {filepath}: same note id as another file")
+    for filepath, error in result["errors"].items():
+        print(f"  failed {filepath}: {error}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild notes from the workspace's markdown files")
+    parser.add_argument("--prune", action="store_true", help="Delete notes whose file no longer exists")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.prune, args.workers)))
@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+import httpx
+import pytest_asyncio
+
+# Point the app at a throwaway workspace before api.config is imported
+_workspace = tempfile.mkdtemp(prefix="sundial-tests-")
+os.environ["WORKSPACE_DIR"] = _workspace
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_workspace}/sundial.db"
+
+from api.database import async_session, engine  # noqa: E402
+from api.init_db import init_database  # noqa: E402
+from api.main import api_app  # noqa: E402
+from api.models.settings import AuthToken  # noqa: E402
+from api.utils.auth import generate_token  # noqa: E402
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
+    """API client with a session token, on a freshly initialized database."""
+    await init_database()
+    raw, token_hash = generate_token()
+    async with async_session() as db:
+        db.add(AuthToken(token_hash=token_hash, token_type="session", scope="read_write"))
+        await db.commit()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=api_app),
+        base_url="http://test",
+        headers={"Authorization": f"Bearer {raw}"},
+    ) as http:
+        yield http
+    await engine.dispose()
@@ -0,0 +1,23 @@
+"""Range handling of the calendar event list."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def test_start_past_default_horizon_without_end(client):
+    """A lone start beyond the default horizon still gets a range to list."""
+    start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=3 * 365)
+    created = (await client.post("/api/calendar/events", json={
+        "title": "Far off", "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat(),
+    })).json()
+    response = await client.get("/api/calendar/events", params={"start": start.date().isoformat()})
+    assert response.status_code == 200
+    assert created["id"] in [e["id"] for e in response.json()["events"]]
+
+
+async def test_inverted_range_is_rejected(client):
+    response = await client.get("/api/calendar/events", params={"start": "2026-03-01", "end": "2026-02-01"})
+    assert response.status_code == 422
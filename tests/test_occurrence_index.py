@@ -0,0 +1,31 @@
+"""Occurrence index bookkeeping on calendar reads."""
+
+import pytest
+from sqlalchemy import event
+
+from api.database import engine
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def test_repeated_default_window_read_writes_nothing(client):
+    """Once masters are indexed for the default horizon, listing again is read-only."""
+    for i in range(3):
+        await client.post("/api/calendar/events", json={
+            "title": f"Daily {i}", "start_time": "2026-01-05T09:00:00Z", "end_time": "2026-01-05T09:30:00Z",
+            "rrule": "FREQ=DAILY",
+        })
+    assert (await client.get("/api/calendar/events")).status_code == 200
+
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            writes.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        assert (await client.get("/api/calendar/events")).status_code == 200
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    assert writes == []
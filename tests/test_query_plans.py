@@ -0,0 +1,190 @@
+"""Query plan regression test for the hot list, dashboard and background queries.
+
+Each check runs a real route or service call against a fresh database,
+records every statement it sends to SQLite, and runs EXPLAIN QUERY PLAN on
+it. A full scan of one of the large tables fails the check, as does a key
+path that doesn't use the index it was designed around (a poorly chosen
+index can still walk most of the table, e.g. one on a mostly-NULL column
+for "IS NULL").
+"""
+
+import re
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from api.database import async_session, engine
+from api.services import ai_queue, ai_service
+from api.services.calendar_sync import CalDAVSyncService
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+START = "2026-01-01T00:00:00Z"
+END = "2026-02-01T00:00:00Z"
+
+# Tables that grow with the workspace; the small ones (settings, projects,
+# tags, tokens) are fine to scan
+LARGE_TABLES = {
+    "notes", "note_links", "note_tags", "tasks", "task_notes", "task_checklists",
+    "calendar_events", "calendar_event_occurrences", "note_calendar_links",
+    "ai_processing_queue", "ai_response_cache",
+}
+
+# A bare "SCAN <table>" (no index, no covering index) means a full table scan
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+SYNCED_EVENT = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+UID:standup@example.com
+DTSTART:20260105T090000Z
+DTEND:20260105T091500Z
+RRULE:FREQ=DAILY
+SUMMARY:Standup
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+@asynccontextmanager
+async def captured_sql():
+    """Collect (statement, parameters) for everything executed inside the block."""
+    statements: list[tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def explain(statements: list[tuple[str, tuple]]) -> list[tuple[str, list[str]]]:
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append((statement, [row[3] for row in result.fetchall()]))
+    return plans
+
+
+def problems(plans: list[tuple[str, list[str]]], expected_indexes: set[str]) -> list[str]:
+    found = []
+    for statement, plan in plans:
+        for line in plan:
+            match = FULL_SCAN.match(line)
+            if match and match.group(1) in LARGE_TABLES:
+                found.append(f"full table scan ({line}) in: {' '.join(statement.split())}")
+    used = "\n".join(line for _, plan in plans for line in plan)
+    found += [f"expected index {index} not used" for index in sorted(expected_indexes) if index not in used]
+    return found
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def workspace(client):
+    """A few linked notes, tasks and (recurring) events for the routes to read."""
+    target = (await client.post("/api/notes", json={"title": "Meeting notes", "content": "Agenda"})).json()
+    source = (await client.post(
+        "/api/notes", json={"title": "Follow-up", "content": "See [[Meeting notes]] and [[Later note]]"},
+    )).json()
+    task = (await client.post("/api/tasks", json={
+        "title": "Send minutes", "due_date": "2026-01-10T12:00:00Z", "note_ids": [target["id"]],
+    })).json()
+    await client.post("/api/calendar/events", json={
+        "title": "Review", "start_time": "2026-01-12T15:00:00Z", "end_time": "2026-01-12T16:00:00Z",
+    })
+    await client.post("/api/calendar/events", json={
+        "title": "Weekly sync", "start_time": "2026-01-06T10:00:00Z", "end_time": "2026-01-06T11:00:00Z",
+        "rrule": "FREQ=WEEKLY",
+    })
+    return SimpleNamespace(target=target, source=source, task=task)
+
+
+async def list_events(client, ws):
+    await client.get("/api/calendar/events", params={"start": START, "end": END})
+
+
+async def sync_event(client, ws):
+    stats = defaultdict(int, errors=[])
+    async with async_session() as db:
+        await CalDAVSyncService()._upsert_from_remote(
+            db, SimpleNamespace(data=SYNCED_EVENT, url=None), "https://caldav.example.com/cal/", set(), stats,
+        )
+        await db.commit()
+
+
+async def list_notes(client, ws):
+    await client.get("/api/notes")
+
+
+async def list_project_notes(client, ws):
+    await client.get("/api/notes", params={"project_id": "proj_inbox"})
+
+
+async def get_note(client, ws):
+    await client.get(f"/api/notes/{ws.target['id']}")
+    await client.get(f"/api/notes/{ws.target['id']}/backlinks")
+    await client.get(f"/api/notes/{ws.source['id']}/links")
+
+
+async def create_link_target(client, ws):
+    # Resolves the dangling [[Later note]] link in ws.source
+    await client.post("/api/notes", json={"title": "Later note", "content": "Now it exists"})
+
+
+async def list_tasks(client, ws):
+    await client.get("/api/tasks", params={"project_id": "proj_inbox"})
+    await client.get("/api/tasks", params={"milestone_id": ws.task.get("milestone_id") or "ms_none"})
+    await client.get("/api/tasks", params={"status": "in_progress"})
+    await client.get(f"/api/tasks/{ws.task['id']}")
+
+
+async def dashboard(client, ws):
+    await client.get("/api/dashboard/today")
+
+
+async def claim_ai_job(client, ws):
+    async with async_session() as db:
+        await ai_queue.claim_job(db)
+
+
+async def evict_ai_cache(client, ws):
+    async with async_session() as db:
+        for statement in ai_service.cache_eviction_statements(datetime.now(timezone.utc) - timedelta(days=7)):
+            await db.execute(statement)
+        await db.commit()
+
+
+# (name, call, indexes the call's queries must use)
+CHECKS = [
+    ("calendar: events page", list_events, {
+        "ix_calendar_events_start_time_id",
+        "ix_calendar_event_occurrences_start_time",
+        "ix_calendar_events_rrule",
+    }),
+    ("calendar: sync upsert", sync_event, {"ix_calendar_events_external_id"}),
+    ("notes: list", list_notes, {"ix_notes_updated_at"}),
+    ("notes: list by project", list_project_notes, {"ix_notes_project_id"}),
+    ("notes: note with links", get_note, {"ix_note_links_target_note_id", "ix_note_links_source_note_id"}),
+    ("notes: resolve dangling links", create_link_target, {"ix_note_links_target_identifier"}),
+    ("tasks: lists", list_tasks, {"ix_tasks_project_id", "ix_tasks_milestone_id", "ix_tasks_status"}),
+    ("dashboard: today", dashboard, {"ix_tasks_due_date"}),
+    ("ai: next runnable job", claim_ai_job, {"ix_ai_processing_queue_status_run_after"}),
+    ("ai: cache eviction", evict_ai_cache, {"ix_ai_response_cache_created_at", "ix_ai_response_cache_last_used_at"}),
+]
+
+
+@pytest.mark.parametrize("name, call, expected_indexes", CHECKS, ids=[name for name, _, _ in CHECKS])
+async def test_queries_use_indexes(client, workspace, name, call, expected_indexes):
+    async with captured_sql() as statements:
+        await call(client, workspace)
+    assert statements, f"{name} ran no queries"
+    assert problems(await explain(statements), expected_indexes) == []
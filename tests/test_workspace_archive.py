@@ -0,0 +1,30 @@
+"""Backup and restore round trips through the workspace routes."""
+
+import io
+import json
+import zipfile
+
+import pytest
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def test_chain_restore_after_delete_and_recreate(client):
+    """Rows replaced under the same unique name between backups restore cleanly."""
+    note = (await client.post("/api/notes", json={"title": "Tagged", "content": "x", "tags": ["recreated"]})).json()
+    full = (await client.get("/api/export/workspace")).content
+    manifest = json.loads(zipfile.ZipFile(io.BytesIO(full)).read("manifest.json"))
+
+    # Dropping the last use of a tag deletes it; tagging again makes a new row with the same name
+    await client.put(f"/api/notes/{note['id']}", json={"tags": []})
+    await client.put(f"/api/notes/{note['id']}", json={"tags": ["recreated"]})
+    incremental = (await client.post("/api/export/workspace/incremental", json=manifest)).content
+
+    response = await client.post("/api/import/workspace/chain", files=[
+        ("files", ("full.zip", full, "application/zip")),
+        ("files", ("incremental.zip", incremental, "application/zip")),
+    ])
+    assert response.status_code == 200, response.text
+    assert response.json()["incrementals"][0]["deleted"]["tags"] == 1
+    restored = (await client.get(f"/api/notes/{note['id']}")).json()
+    assert restored["tags"] == ["recreated"]
@@ -62,6 +62,43 @@ async function request<T>(method: string, path: string, body?: unknown): Promise
 	return res.json();
 }
 
+/**
+ * POST and read a `text/event-stream` reply, calling `onEvent` with each
+ * parsed `data:` payload as it arrives.
+ */
+async function streamEvents<T>(path: string, body: unknown, onEvent: (event: T) => void): Promise<void> {
+	const headers: Record<string, string> = {
+		'X-Client-ID': clientId,
+		'Content-Type': 'application/json',
+		Accept: 'text/event-stream'
+	};
+	const token = getToken();
+	if (token) {
+		headers['Authorization'] = `Bearer ${token}`;
+	}
+
+	const res = await fetch(`${base}${path}`, { method: 'POST', headers, body: JSON.stringify(body) });
+	if (!res.ok || !res.body) {
+		throw new ApiError(res.status, res.statusText);
+	}
+
+	const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+	let buffer = '';
+	for (;;) {
+		const { value, done } = await reader.read();
+		if (done) break;
+		buffer += value;
+		let end;
+		while ((end = buffer.indexOf('\n\n')) !== -1) {
+			const message = buffer.slice(0, end);
+			buffer = buffer.slice(end + 2);
+			for (const line of message.split('\n')) {
+				if (line.startsWith('data:')) onEvent(JSON.parse(line.slice(5)));
+			}
+		}
+	}
+}
+
 const PAGE_SIZE = 200;
 
 /**
@@ -97,6 +134,7 @@ export const api = {
 	post: <T>(path: string, body?: unknown) => request<T>('POST', path, body),
 	put: <T>(path: string, body?: unknown) => request<T>('PUT', path, body),
 	delete: <T>(path: string) => request<T>('DELETE', path),
+	stream: streamEvents,
 	authHeaders(): Record<string, string> {
 		const token = getToken();
 		return token ? { Authorization: `Bearer ${token}` } : {};
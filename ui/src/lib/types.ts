@@ -108,6 +108,7 @@ export interface NoteListItem {
 	linked_tasks: string[];
 	linked_events: string[];
 	preview: string;
+	content_length: number;
 	created_at: string;
 	updated_at: string;
 }
@@ -328,6 +329,7 @@ export interface EventResponse {
 export interface EventList {
 	events: EventResponse[];
 	total: number;
+	next_cursor: string | null;
 }
 
 // Calendar items (unified type for events + tasks on calendar)
@@ -380,24 +382,19 @@ export interface TagListResponse {
 
 // Search
 export interface SearchResultItem {
+	type: 'note' | 'task' | 'event' | 'project';
 	id: string;
 	title: string;
-	filepath: string;
 	snippet: string;
 	rank: number;
-}
-
-export interface TaskSearchResultItem {
-	id: string;
-	title: string;
-	description: string;
-	status: string;
-	project_id: string;
+	project_id: string | null;
+	status: string | null;
+	start_time: string | null;
 }
 
 export interface SearchResult {
 	results: SearchResultItem[];
-	tasks: TaskSearchResultItem[];
+	counts: Record<string, number>;
 	total: number;
 	query: string;
 }